@@ -0,0 +1,153 @@
+"""
+无界面分析命令行工具
+
+不启动 streamlit 即可运行页面上的分析，或批量生成静态报告、启动本地
+HTTP 接口。
+
+用法:
+    python analysis_api.py features data/uploaded_excel/方案A.xlsx
+    python analysis_api.py analyze 方案A.xlsx --format html --output 方案A.html
+    python analysis_api.py compare 方案A.xlsx 方案B.xlsx
+    python analysis_api.py batch "data/uploaded_excel/*.xlsx" --output-dir reports --workers 4
+    python analysis_api.py serve --port 8765
+
+文件参数可以是路径，也可以是上传目录中的文件名。
+"""
+import argparse
+import glob
+import json
+import sys
+from pathlib import Path
+
+from utils.api_server import DEFAULT_HOST, DEFAULT_PORT, serve
+from utils.paths import UPLOAD_DIR
+from utils.report import (
+    REPORT_FORMATS,
+    analyze_workbook,
+    compare_workbooks,
+    generate_reports,
+    report_html,
+    report_json,
+    to_jsonable,
+    workbook_features
+)
+
+
+def resolve_path(name):
+    """路径存在时直接使用，否则在上传目录中查找"""
+    path = Path(name)
+    if path.exists():
+        return path
+    if (UPLOAD_DIR / name).exists():
+        return UPLOAD_DIR / name
+    raise SystemExit(f"错误：文件 {name} 不存在")
+
+
+def expand_paths(patterns):
+    """展开通配符，保持顺序并去重"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for match in matches:
+            path = resolve_path(match)
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def emit(text, output):
+    if output:
+        Path(output).write_text(text, encoding="utf-8")
+        print(f"已保存到 {output}")
+    else:
+        print(text)
+
+
+def cmd_features(args):
+    features = workbook_features(resolve_path(args.file), args.sheet)
+    emit(json.dumps(to_jsonable(features), ensure_ascii=False, indent=2), args.output)
+
+
+def cmd_analyze(args):
+    report = analyze_workbook(resolve_path(args.file), args.sheet, advanced=args.advanced)
+    if args.format == "html":
+        emit(report_html(report, "inline" if args.inline_js else "cdn"), args.output)
+    else:
+        emit(report_json(report, include_figures=args.figures), args.output)
+
+
+def cmd_compare(args):
+    result = compare_workbooks(resolve_path(args.file_a), resolve_path(args.file_b), tests=not args.no_tests)
+    emit(report_json(result), args.output)
+
+
+def cmd_batch(args):
+    paths = expand_paths(args.files)
+    if not paths:
+        raise SystemExit("错误：没有找到工作簿")
+
+    def progress(done, total, result):
+        status = "完成" if result["status"] == "ok" else f"失败: {result['error']}"
+        print(f"[{done}/{total}] {result['file']} {status}（{result['seconds']:.1f} 秒）", flush=True)
+
+    results = generate_reports(
+        paths, args.output_dir, tuple(args.formats), args.workers,
+        advanced=args.advanced, include_figures=args.figures, progress=progress
+    )
+    n_errors = sum(result["status"] != "ok" for result in results)
+    print(f"共 {len(results)} 个工作簿，失败 {n_errors} 个；索引: {Path(args.output_dir) / 'index.html'}")
+    if n_errors:
+        sys.exit(1)
+
+
+def cmd_serve(args):
+    serve(args.host, args.port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='无界面分析命令行工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('features', help='识别列类型与统计特征')
+    p.add_argument('file', help='工作簿路径或上传目录中的文件名')
+    p.add_argument('--sheet', help='工作表名称（默认第一个）')
+    p.add_argument('--output', help='输出文件（默认打印）')
+    p.set_defaults(func=cmd_features)
+
+    p = subparsers.add_parser('analyze', help='评估分析单个工作簿')
+    p.add_argument('file', help='工作簿路径或上传目录中的文件名')
+    p.add_argument('--sheet', help='工作表名称（默认第一个）')
+    p.add_argument('--format', choices=REPORT_FORMATS, default='json', help='输出格式')
+    p.add_argument('--advanced', action='store_true', help='同时生成高级可视化')
+    p.add_argument('--figures', action='store_true', help='JSON 中包含图表')
+    p.add_argument('--inline-js', action='store_true', help='HTML 内嵌 plotly.js（离线可用）')
+    p.add_argument('--output', help='输出文件（默认打印）')
+    p.set_defaults(func=cmd_analyze)
+
+    p = subparsers.add_parser('compare', help='对比两个工作簿')
+    p.add_argument('file_a', help='方案A')
+    p.add_argument('file_b', help='方案B')
+    p.add_argument('--no-tests', action='store_true', help='不做显著性检验')
+    p.add_argument('--output', help='输出文件（默认打印）')
+    p.set_defaults(func=cmd_compare)
+
+    p = subparsers.add_parser('batch', help='在进程池中批量生成报告')
+    p.add_argument('files', nargs='+', help='工作簿路径或通配符')
+    p.add_argument('--output-dir', default='reports', help='输出目录')
+    p.add_argument('--formats', nargs='+', choices=REPORT_FORMATS, default=list(REPORT_FORMATS), help='输出格式')
+    p.add_argument('--workers', type=int, help='最大工作进程数')
+    p.add_argument('--advanced', action='store_true', help='同时生成高级可视化')
+    p.add_argument('--figures', action='store_true', help='JSON 中包含图表')
+    p.set_defaults(func=cmd_batch)
+
+    p = subparsers.add_parser('serve', help='启动本地 HTTP 接口')
+    p.add_argument('--host', default=DEFAULT_HOST, help='监听地址')
+    p.add_argument('--port', type=int, default=DEFAULT_PORT, help='端口')
+    p.set_defaults(func=cmd_serve)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
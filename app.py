@@ -1,6 +1,8 @@
 import streamlit as st
 import os
 from pathlib import Path
+from utils.lazy_import import warm_up, warmup_enabled
+from utils.timing import begin_page, end_page
 
 # Page configuration
 st.set_page_config(
@@ -9,6 +11,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+begin_page("home")
 
 # Load custom CSS
 def load_css():
@@ -37,6 +40,7 @@ st.markdown("""
 - 🗂️ 分析历史方案
 - ⚖️ 对比不同方案
 - 🎨 创建高级可视化图表
+- 🔎 用 SQL 自由查询数据
 
 ### 快速开始
 1. 在左侧导航栏中选择功能模块
@@ -50,4 +54,10 @@ st.markdown("""
 
 # Footer
 st.markdown("---")
-st.markdown("© 2024 智能评估分析平台 | 版本 0.1.0") 
\ No newline at end of file
+st.markdown("© 2024 智能评估分析平台 | 版本 0.1.0") 
+
+end_page()
+
+# Preload heavy analysis libraries in the background once the landing page is rendered
+if warmup_enabled():
+    warm_up()
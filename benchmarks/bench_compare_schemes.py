@@ -0,0 +1,144 @@
+"""
+compare_schemes 基准测试
+
+在宽表上对比逐列重复计算的旧实现与批量聚合的新实现，验证两者结果一致
+并输出加速比。
+
+用法:
+    python benchmarks/bench_compare_schemes.py --rows 10000 --cols 200
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.comparison import compare_schemes  # noqa: E402
+
+
+def legacy_compare_schemes(df1, df2, features1, features2):
+    """改造前的实现：每个统计量每列计算两次，并在全部数值列上计算相关性"""
+    comparison = {
+        "numeric_comparison": {},
+        "categorical_comparison": {},
+        "correlation_comparison": {}
+    }
+    common_numeric_cols = set.intersection(
+        set(features1["numeric_columns"]),
+        set(features2["numeric_columns"])
+    )
+    common_categorical_cols = set.intersection(
+        set(features1["categorical_columns"]),
+        set(features2["categorical_columns"])
+    )
+    for col in common_numeric_cols:
+        comparison["numeric_comparison"][col] = {
+            "scheme1": {
+                "mean": df1[col].mean(),
+                "std": df1[col].std(),
+                "min": df1[col].min(),
+                "max": df1[col].max(),
+                "median": df1[col].median()
+            },
+            "scheme2": {
+                "mean": df2[col].mean(),
+                "std": df2[col].std(),
+                "min": df2[col].min(),
+                "max": df2[col].max(),
+                "median": df2[col].median()
+            },
+            "difference": {
+                "mean_diff": df2[col].mean() - df1[col].mean(),
+                "std_diff": df2[col].std() - df1[col].std(),
+                "min_diff": df2[col].min() - df1[col].min(),
+                "max_diff": df2[col].max() - df1[col].max(),
+                "median_diff": df2[col].median() - df1[col].median()
+            }
+        }
+    for col in common_categorical_cols:
+        comparison["categorical_comparison"][col] = {
+            "scheme1": df1[col].value_counts().to_dict(),
+            "scheme2": df2[col].value_counts().to_dict()
+        }
+    numeric_cols1 = features1["numeric_columns"]
+    numeric_cols2 = features2["numeric_columns"]
+    if numeric_cols1 and numeric_cols2:
+        corr1 = df1[numeric_cols1].corr()
+        corr2 = df2[numeric_cols2].corr()
+        common_cols = list(set(numeric_cols1) & set(numeric_cols2))
+        if common_cols:
+            corr1 = corr1.loc[common_cols, common_cols]
+            corr2 = corr2.loc[common_cols, common_cols]
+            comparison["correlation_comparison"] = {
+                "corr1": corr1.to_dict(),
+                "corr2": corr2.to_dict(),
+                "corr_diff": (corr2 - corr1).to_dict()
+            }
+    return comparison
+
+
+def make_scheme(rows, numeric_cols, extra_cols, seed, missing_rate=0.0):
+    """生成一个方案：共同数值列 + 本方案独有的数值列 + 两个类别列"""
+    rng = np.random.default_rng(seed)
+    columns = [f"m{i}" for i in range(numeric_cols)] + [f"x{seed}_{i}" for i in range(extra_cols)]
+    values = rng.normal(100, 20, size=(rows, len(columns)))
+    values[rng.random(values.shape) < missing_rate] = np.nan
+    df = pd.DataFrame(values, columns=columns)
+    df["Account"] = rng.choice(["Sales", "Cost", "Payroll"], rows)
+    df["Scenario"] = rng.choice(["Actuals", "Budget", "Forecast"], rows)
+    features = {"numeric_columns": columns, "categorical_columns": ["Account", "Scenario"]}
+    return df, features
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def check_equal(legacy, batched):
+    """两种实现的结果应在浮点误差内一致"""
+    assert legacy["numeric_comparison"].keys() == batched["numeric_comparison"].keys()
+    for col, expected in legacy["numeric_comparison"].items():
+        actual = batched["numeric_comparison"][col]
+        for part in ("scheme1", "scheme2", "difference"):
+            for key, value in expected[part].items():
+                assert np.isclose(value, actual[part][key], equal_nan=True), (col, part, key)
+    for key in ("corr1", "corr2", "corr_diff"):
+        expected = pd.DataFrame(legacy["correlation_comparison"][key])
+        actual = pd.DataFrame(batched["correlation_comparison"][key]).loc[expected.index, expected.columns]
+        assert np.allclose(expected.values, actual.values, equal_nan=True), key
+    assert legacy["categorical_comparison"] == batched["categorical_comparison"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='compare_schemes 基准测试')
+    parser.add_argument('--rows', type=int, default=10000, help='每个方案的行数')
+    parser.add_argument('--cols', type=int, default=200, help='共同数值列数')
+    parser.add_argument('--extra-cols', type=int, default=50, help='每个方案独有的数值列数')
+    parser.add_argument('--missing-rate', type=float, default=0.0, help='数值缺失比例（验证含缺失值时的回退路径）')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数（取最快一次）')
+    args = parser.parse_args()
+
+    df1, features1 = make_scheme(args.rows, args.cols, args.extra_cols, seed=1, missing_rate=args.missing_rate)
+    df2, features2 = make_scheme(args.rows, args.cols, args.extra_cols, seed=2, missing_rate=args.missing_rate)
+
+    legacy_time, legacy = best_of(lambda: legacy_compare_schemes(df1, df2, features1, features2), args.repeat)
+    batched_time, batched = best_of(lambda: compare_schemes(df1, df2, features1, features2), args.repeat)
+    check_equal(legacy, batched)
+
+    print(f"数据规模: {args.rows} 行 × {args.cols} 共同列（每方案另有 {args.extra_cols} 列独有列）")
+    print(f"旧实现:   {legacy_time * 1000:.1f} ms")
+    print(f"批量实现: {batched_time * 1000:.1f} ms")
+    print(f"加速比:   {legacy_time / batched_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+冷启动导入耗时报告
+
+对 app.py 和每个页面，在全新的解释器中以 python -X importtime 执行其顶层
+导入语句，汇总总耗时并列出累计耗时最高的模块；再单独测量各重量级依赖在
+streamlit 已加载后的额外导入耗时，用于判断冷启动时间花在哪里。
+
+用法:
+    python benchmarks/import_time.py --top 10
+"""
+import argparse
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils.lazy_import import HEAVY_MODULES  # noqa: E402
+
+
+def top_level_imports(script):
+    """提取脚本中的顶层导入语句（不执行页面本身）"""
+    tree = ast.parse(script.read_text(encoding="utf-8"))
+    return "\n".join(
+        ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def measure(code):
+    """
+    在新解释器中执行代码并解析 -X importtime 输出
+
+    Returns:
+        list: [(模块名, 自身耗时 ms, 累计耗时 ms, 嵌套深度)]
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return records
+
+
+def report_script(script, top):
+    records = measure(top_level_imports(script))
+    total = sum(self_ms for _, self_ms, _, _ in records)
+    print(f"\n{script.relative_to(ROOT)}: {total:.0f} ms, {len(records)} 个模块")
+    roots = sorted((r for r in records if r[3] == 0), key=lambda r: r[2], reverse=True)
+    for name, _, cumulative_ms, _ in roots[:top]:
+        print(f"    {cumulative_ms:8.1f} ms  {name}")
+
+
+def report_heavy_modules():
+    print("\n重量级依赖（streamlit 已加载后的额外耗时）:")
+    baseline = {name for name, _, _, _ in measure("import streamlit, pandas, numpy")}
+    for module in HEAVY_MODULES:
+        try:
+            records = measure(f"import streamlit, pandas, numpy\nimport {module}")
+        except RuntimeError as e:
+            print(f"    {'-':>8}     {module}（{e}）")
+            continue
+        extra = sum(self_ms for name, self_ms, _, _ in records if name not in baseline)
+        print(f"    {extra:8.1f} ms  {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='冷启动导入耗时报告')
+    parser.add_argument('--top', type=int, default=10, help='每个脚本列出的模块数')
+    parser.add_argument('--skip-heavy', action='store_true', help='不单独测量重量级依赖')
+    args = parser.parse_args()
+
+    scripts = [ROOT / "app.py"] + sorted((ROOT / "pages").glob("*.py"))
+    for script in scripts:
+        report_script(script, args.top)
+    if not args.skip_heavy:
+        report_heavy_modules()
+
+
+if __name__ == "__main__":
+    main()
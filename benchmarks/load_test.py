@@ -0,0 +1,409 @@
+"""
+并发会话负载测试
+
+在临时数据目录中生成若干合成方案工作簿，然后用 streamlit 的无界面
+AppTest 模拟 N 个并发会话，每个会话依次打开首页和各功能页面并完成典型
+操作（选择文件、切换对比模式等）。
+
+AppTest 运行时会替换进程全局的 streamlit Runtime，同一进程内不能并发运行，
+因此每个会话在各自的（spawn 启动的）进程中运行，所有会话就绪后同时开始。
+会话之间只共享磁盘上的缓存（图表缓存、列式副本），进程内的数据集缓存与
+st.cache_data 各自独立，结果比共享一个服务器进程的真实部署偏保守。
+
+记录每个页面、每个操作的延迟分位数，以及测试期间各会话进程（及其子进程，
+需安装 psutil）的 RSS 总和与 CPU 占用，用于估算服务器规格并在本地发现并发回归：出现页面异常或 p95 超过
+--max-p95 时以非零状态退出。各页面的计时日志写在结果 JSON 旁边，可用
+benchmarks/timing_report.py --log 查看各步骤的耗时。
+
+用法:
+    python benchmarks/load_test.py                          # 12 个会话，各点击一轮
+    python benchmarks/load_test.py --sessions 20 --rounds 3 --rows 20000
+    python benchmarks/load_test.py --max-p95 10             # 任一页面 p95 超过 10 秒即失败
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:  # 可选依赖，缺失时从 /proc 读取，不统计会话进程的子进程
+    psutil = None
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SESSIONS = 12
+DEFAULT_ROWS = 5_000
+DEFAULT_COLS = 20
+DEFAULT_FILES = 3
+PAGE_TIMEOUT = 300
+SAMPLE_INTERVAL = 0.2
+
+
+def find_scripts():
+    """首页与各功能页面：[(页面名, 脚本路径)]，页面名与计时日志一致"""
+    pages = {int(path.name.split("_")[0]): path for path in (ROOT / "pages").glob("[0-9]_*.py")}
+    names = [
+        "data_configuration", "evaluation_results", "historical_analysis",
+        "scheme_comparison", "advanced_visualization", "sql_query"
+    ]
+    return [("home", ROOT / "app.py")] + [(name, pages[number]) for number, name in enumerate(names, start=1)]
+
+
+def generate_datasets(data_dir, n_files, rows, cols):
+    """
+    在数据目录下生成合成工作簿，并写入导入时会生成的特征配置和汇总向量
+
+    Returns:
+        list: 工作簿文件名
+    """
+    from benchmarks.run_benchmarks import make_fixture, perturb
+    from utils.data_processor import analyze_data_features
+    from utils.paths import FEATURES_DIR, UPLOAD_DIR
+    from utils.scheme_summary import compute_scheme_summary, save_scheme_summary
+
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    FEATURES_DIR.mkdir(parents=True, exist_ok=True)
+    base = make_fixture(rows, cols)
+    file_names = []
+    for i in range(n_files):
+        df = base if i == 0 else perturb(base, seed=i)
+        file_name = f"scheme_{i + 1}.xlsx"
+        df.to_excel(UPLOAD_DIR / file_name, index=False)
+        features = analyze_data_features(df)
+        # Pages look features up by file name, the comparison page by stem
+        for key in (file_name, Path(file_name).stem):
+            with open(FEATURES_DIR / f"{key}.json", 'w', encoding='utf-8') as f:
+                json.dump(features, f, ensure_ascii=False, default=str)
+        save_scheme_summary(file_name, compute_scheme_summary(df, features))
+        file_names.append(file_name)
+    return file_names
+
+
+def find_widget(at, kind, label):
+    """按标签查找控件（侧边栏筛选控件与页面控件混在同一列表中）"""
+    return next(widget for widget in getattr(at, kind) if widget.label == label)
+
+
+def page_actions(page, files, session):
+    """
+    某个页面上的操作序列：[(操作名, 接收 AppTest 并执行操作的函数)]
+
+    每个会话选择不同的文件，使缓存命中与未命中同时出现。
+    """
+    file_name = files[session % len(files)]
+    other = files[(session + 1) % len(files)]
+    actions = [("open", lambda at: at.run())]
+    if page == "data_configuration":
+        actions.append(("preview", lambda at: at.selectbox(key="preview_file").set_value(file_name).run()))
+    elif page == "evaluation_results":
+        actions.append(("select", lambda at: find_widget(at, "selectbox", "选择要分析的文件").set_value(file_name).run()))
+    elif page == "historical_analysis":
+        actions.append(("select", lambda at: find_widget(at, "multiselect", "选择要分析的文件").set_value(files).run()))
+    elif page == "scheme_comparison":
+        actions.append(("select", lambda at: at.selectbox(key="scheme1").set_value(file_name).run()))
+        actions.append(("select_b", lambda at: at.selectbox(key="scheme2").set_value(other).run()))
+        actions.append(("multi", lambda at: find_widget(at, "radio", "对比模式").set_value("多方案对比").run()))
+    elif page == "advanced_visualization":
+        actions.append(("select", lambda at: find_widget(at, "selectbox", "选择文件").set_value(file_name).run()))
+    return actions
+
+
+def click_through(session, scripts, files, rounds):
+    """
+    一个会话：按顺序打开每个页面并执行操作，记录每个操作的耗时
+
+    同一进程内同一时间只能运行一个 AppTest。
+
+    Returns:
+        list: 每个操作与每个页面的记录
+    """
+    from streamlit.testing.v1 import AppTest
+
+    results = []
+    for round_number in range(rounds):
+        for page, script in scripts:
+            at = AppTest.from_file(str(script), default_timeout=PAGE_TIMEOUT)
+            page_seconds = 0.0
+            for action, run in page_actions(page, files, session):
+                start = time.perf_counter()
+                error = None
+                try:
+                    at = run(at)
+                    if at.exception:
+                        error = at.exception[0].value
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                elapsed = time.perf_counter() - start
+                page_seconds += elapsed
+                results.append({
+                    "session": session, "round": round_number, "page": page,
+                    "action": action, "seconds": elapsed, "error": error
+                })
+                if error:
+                    break
+            results.append({
+                "session": session, "round": round_number, "page": page,
+                "action": None, "seconds": page_seconds, "error": None
+            })
+    return results
+
+
+def session_process(session, scripts, files, rounds, ramp, barrier, queue):
+    """会话进程入口：导入完成后在屏障处等待其他会话，再开始点击"""
+    from streamlit.testing.v1 import AppTest  # noqa: F401  导入不计入第一个页面的耗时
+    from utils import compute_pool
+    from utils.lazy_import import warm_up
+
+    warm_up().join()
+    barrier.wait()
+    if ramp:
+        time.sleep(session * ramp)
+    try:
+        queue.put(click_through(session, scripts, files, rounds))
+    except Exception as e:
+        queue.put([{
+            "session": session, "round": 0, "page": "session", "action": "start",
+            "seconds": 0.0, "error": f"{type(e).__name__}: {e}"
+        }])
+    finally:
+        # multiprocessing joins child processes before atexit handlers would stop the pool workers
+        compute_pool.shutdown()
+
+
+def run_sessions(n_sessions, scripts, files, rounds, ramp=0.0, sampler=None):
+    """
+    在 n_sessions 个进程中同时运行会话
+
+    Returns:
+        tuple: (所有记录, 从全部会话就绪到全部结束的秒数)
+    """
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(n_sessions + 1)
+    queue = context.Queue()
+    processes = [
+        context.Process(
+            target=session_process, args=(session, scripts, files, rounds, ramp, barrier, queue),
+            name=f"load-test-session-{session}"
+        )
+        for session in range(n_sessions)
+    ]
+    for process in processes:
+        process.start()
+    if sampler is not None:
+        sampler.pids = [process.pid for process in processes]
+    barrier.wait()
+    start = time.perf_counter()
+    if sampler is not None:
+        sampler.start()
+    results = []
+    # 先取结果再 join：子进程在队列数据被读走前不会退出
+    for _ in processes:
+        results.extend(queue.get())
+    for process in processes:
+        process.join()
+    return results, time.perf_counter() - start
+
+
+def process_usage(pid):
+    """
+    进程及其子进程的 (RSS 字节数, 累计 CPU 秒数)，进程已退出时返回 None
+
+    没有 psutil 时从 /proc 读取，只统计进程本身。
+    """
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            rss, cpu = 0, 0.0
+            for p in [process] + process.children(recursive=True):
+                times = p.cpu_times()
+                rss += p.memory_info().rss
+                cpu += times.user + times.system
+            return rss, cpu
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # comm 字段可能含空格，从最后一个右括号之后开始数
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return pages * os.sysconf("SC_PAGE_SIZE"), (int(fields[11]) + int(fields[12])) / ticks
+
+
+class ResourceSampler(threading.Thread):
+    """
+    后台定期采样会话进程的 RSS 总和与 CPU 占用
+
+    CPU 为两次采样间各进程用户态 + 内核态时间之和占墙钟时间的比例（多核时可超过 100%）。
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name="load-test-sampler", daemon=True)
+        self.interval = interval
+        self.pids = []
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        last_wall = time.perf_counter()
+        last_cpu = {}
+        while not self._stop_event.wait(self.interval):
+            wall = time.perf_counter()
+            rss = 0
+            cpu_delta = 0.0
+            for pid in self.pids:
+                usage = process_usage(pid)
+                if usage is None:
+                    continue
+                rss += usage[0]
+                cpu_delta += usage[1] - last_cpu.get(pid, usage[1])
+                last_cpu[pid] = usage[1]
+            self.samples.append({
+                "seconds": wall,
+                "rss_mb": rss / 2 ** 20,
+                "cpu_percent": 100 * cpu_delta / (wall - last_wall)
+            })
+            last_wall = wall
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def percentiles(values):
+    values = np.asarray(values)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": len(values), "p50": p50, "p95": p95, "p99": p99, "max": values.max()}
+
+
+def summarize(results, samples, wall_seconds):
+    """汇总每个页面与操作的延迟分位数、错误数以及资源占用"""
+    pages = {}
+    actions = {}
+    errors = {}
+    for entry in results:
+        if entry["action"] is None:
+            pages.setdefault(entry["page"], []).append(entry["seconds"])
+        else:
+            actions.setdefault(f"{entry['page']}/{entry['action']}", []).append(entry["seconds"])
+        if entry["error"]:
+            errors.setdefault(entry["page"], []).append(entry["error"])
+    rss = [s["rss_mb"] for s in samples] or [0.0]
+    cpu = [s["cpu_percent"] for s in samples] or [0.0]
+    return {
+        "wall_seconds": wall_seconds,
+        "pages": {page: percentiles(values) for page, values in pages.items()},
+        "actions": {key: percentiles(values) for key, values in actions.items()},
+        "errors": errors,
+        "resources": {
+            "rss_mb_peak": max(rss),
+            "rss_mb_mean": float(np.mean(rss)),
+            "cpu_percent_mean": float(np.mean(cpu)),
+            "cpu_percent_peak": max(cpu),
+            "cpu_count": os.cpu_count()
+        }
+    }
+
+
+def print_summary(summary):
+    print(f"\n{'页面':<28} {'次数':>6} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'最大 s':>8} {'错误':>6}")
+    for page, stats in summary["pages"].items():
+        n_errors = len(summary["errors"].get(page, []))
+        print(f"{page:<28} {stats['count']:>6} {stats['p50']:>8.2f} {stats['p95']:>8.2f} "
+              f"{stats['p99']:>8.2f} {stats['max']:>8.2f} {n_errors:>6}")
+    print(f"\n{'操作':<40} {'p50 s':>8} {'p95 s':>8}")
+    for key, stats in summary["actions"].items():
+        print(f"{key:<40} {stats['p50']:>8.2f} {stats['p95']:>8.2f}")
+    resources = summary["resources"]
+    print(f"\n总耗时 {summary['wall_seconds']:.1f} s；RSS 峰值 {resources['rss_mb_peak']:.0f} MB"
+          f"（平均 {resources['rss_mb_mean']:.0f} MB）；CPU 平均 {resources['cpu_percent_mean']:.0f}%"
+          f"，峰值 {resources['cpu_percent_peak']:.0f}%（{resources['cpu_count']} 核）")
+    for page, messages in summary["errors"].items():
+        print(f"\n{page} 出现 {len(messages)} 次错误，首个: {messages[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='并发会话负载测试')
+    parser.add_argument('--sessions', type=int, default=DEFAULT_SESSIONS, help='并发会话数')
+    parser.add_argument('--rounds', type=int, default=1, help='每个会话点击的轮数')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS, help='每个合成工作簿的行数')
+    parser.add_argument('--cols', type=int, default=DEFAULT_COLS, help='每个合成工作簿的列数')
+    parser.add_argument('--files', type=int, default=DEFAULT_FILES, help='合成工作簿数量（至少 2 个）')
+    parser.add_argument('--ramp', type=float, default=0.0, help='会话依次开始点击的间隔秒数')
+    parser.add_argument('--cold', action='store_true', help='不做预热，直接在冷缓存上测量')
+    parser.add_argument('--max-p95', type=float, help='任一页面 p95 超过该秒数时以非零状态退出')
+    parser.add_argument('--output', type=Path, help='结果 JSON 路径（默认写入 benchmarks/results/）')
+    args = parser.parse_args()
+    if args.files < 2:
+        parser.error("--files 至少为 2（对比页面需要两个方案）")
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    timing_log = output.with_name(f"{output.stem}_timing.jsonl")
+
+    with tempfile.TemporaryDirectory(prefix="dataviz-load-") as data_dir:
+        # Must be set before anything imports utils.paths
+        os.environ["DATAVIZ_DATA_DIR"] = data_dir
+        os.environ["DATAVIZ_TIMING_LOG"] = str(timing_log)
+        from benchmarks.run_benchmarks import environment
+
+        print(f"生成 {args.files} 个 {args.rows} 行 × {args.cols} 列的工作簿...", flush=True)
+        files = generate_datasets(data_dir, args.files, args.rows, args.cols)
+        scripts = find_scripts()
+
+        if not args.cold:
+            # Fills the on-disk caches only; each session process starts with empty in-process caches
+            print("预热（单会话，不计入结果）...", flush=True)
+            os.environ["DATAVIZ_TIMING"] = "0"
+            run_sessions(1, scripts, files, 1)
+            os.environ["DATAVIZ_TIMING"] = "1"
+
+        print(f"启动 {args.sessions} 个并发会话（每个会话一个进程）...", flush=True)
+        sampler = ResourceSampler()
+        results, wall_seconds = run_sessions(args.sessions, scripts, files, args.rounds, args.ramp, sampler)
+        sampler.stop()
+
+        summary = summarize(results, sampler.samples, wall_seconds)
+        report = {
+            "environment": environment(),
+            "config": {
+                "sessions": args.sessions, "rounds": args.rounds, "rows": args.rows,
+                "cols": args.cols, "files": args.files, "ramp": args.ramp, "cold": args.cold
+            },
+            "summary": summary,
+            "results": results
+        }
+
+    print_summary(summary)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=float)
+    print(f"\n结果已保存到 {output}，页面计时日志: {timing_log}")
+
+    failed = bool(summary["errors"])
+    if args.max_p95 is not None:
+        slow = {page: stats["p95"] for page, stats in summary["pages"].items() if stats["p95"] > args.max_p95}
+        for page, p95 in slow.items():
+            print(f"{page} p95 {p95:.2f} s 超过 {args.max_p95:.2f} s")
+        failed = failed or bool(slow)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
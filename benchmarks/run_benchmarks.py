@@ -0,0 +1,332 @@
+"""
+分析热点基准测试套件
+
+在合成数据（行数 × 列数网格）上测量各分析热点函数的耗时，结果写入 JSON，
+并可与保存的基线比较：任何一项比基线慢超过容差即以非零状态退出。
+
+--check 用于持续集成：缺少基线视为错误，并检查 PROJECT_REQUIREMENTS.md §5.1
+的响应时间要求——数据处理每 100MB（按合成数据的内存占用计）不超过 10 秒、
+每张图表渲染不超过 1 秒，超出即以非零状态退出。
+
+单元格数（行数 × 列数）超过各函数上限的组合会被跳过并记录，可用
+--max-cells 统一放宽。
+
+用法:
+    python benchmarks/run_benchmarks.py                      # 默认网格，与基线比较（若存在）
+    python benchmarks/run_benchmarks.py --rows 10000 --cols 10 100
+    python benchmarks/run_benchmarks.py --save-baseline      # 将本次结果保存为基线
+    python benchmarks/run_benchmarks.py --check              # 必须有基线，并检查 §5.1 要求
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from data_cleaning import clean_and_simulate_data, clean_dataframe  # noqa: E402
+from utils.comparison import compare_schemes  # noqa: E402
+from utils.data_processor import analyze_data, analyze_data_features  # noqa: E402
+from utils.lazy_import import warm_up  # noqa: E402
+from utils.visualizer import create_advanced_visualizations  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_ROWS = (10_000, 100_000, 1_000_000)
+DEFAULT_COLS = (10, 100, 500)
+DEFAULT_TOLERANCE = 0.25
+# 差值小于该秒数时不视为回归（避免毫秒级波动误报）
+MIN_REGRESSION_SECONDS = 0.05
+# 单次运行超过该秒数时不再重复
+SLOW_RUN_SECONDS = 5.0
+# PROJECT_REQUIREMENTS.md §5.1：数据处理（100MB 文件）< 10 秒，图表渲染 < 1 秒
+PROCESSING_SECONDS_PER_100MB = 10.0
+CHART_SECONDS = 1.0
+# 小数据集的处理时间以固定开销为主，按比例折算的要求不低于交互响应要求（< 0.5 秒）
+MIN_TARGET_SECONDS = 0.5
+MB = 1024 * 1024
+
+
+def make_fixture(rows, cols, seed=0, missing_rate=0.01):
+    """
+    生成合成方案数据：约 10% 为类别列，其余为数值列，数值列含少量缺失值
+
+    Args:
+        rows (int): 行数
+        cols (int): 总列数
+        seed (int): 随机种子
+        missing_rate (float): 数值列缺失比例
+
+    Returns:
+        pd.DataFrame: 合成数据
+    """
+    rng = np.random.default_rng(seed)
+    n_categorical = max(1, cols // 10)
+    n_numeric = cols - n_categorical
+
+    values = rng.normal(100, 20, size=(rows, n_numeric))
+    if missing_rate:
+        values[rng.random(values.shape) < missing_rate] = np.nan
+    data = {f"m{i:03d}": values[:, i] for i in range(n_numeric)}
+    for j in range(n_categorical):
+        labels = np.array([f"c{j}_v{k}" for k in range(5 + 5 * (j % 10))], dtype=object)
+        data[f"c{j:03d}"] = labels[rng.integers(0, len(labels), rows)]
+    return pd.DataFrame(data)
+
+
+def perturb(df, seed=1):
+    """生成对比用的第二个方案：数值列乘以 ±10% 的随机扰动"""
+    rng = np.random.default_rng(seed)
+    other = df.copy()
+    numeric = other.select_dtypes("number").columns
+    other[numeric] = other[numeric] * rng.uniform(0.9, 1.1, size=(len(other), len(numeric)))
+    return other
+
+
+def best_of(func, repeat, setup=None):
+    """
+    返回多次运行中的最短耗时（首次运行超过 SLOW_RUN_SECONDS 时只运行一次）
+
+    Args:
+        func (callable): 被测函数，接收 setup 的返回值作为参数
+        repeat (int): 重复次数
+        setup (callable, optional): 每次运行前准备参数，不计入耗时
+    """
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+        if timings[-1] > SLOW_RUN_SECONDS:
+            break
+    return min(timings)
+
+
+def bench_analyze_data_features(df, features, repeat):
+    return best_of(lambda: analyze_data_features(df), repeat)
+
+
+def bench_clean_dataframe(df, features, repeat):
+    # clean_dataframe modifies its input, so every run gets a fresh copy
+    return best_of(lambda data: clean_dataframe(data, features), repeat, setup=lambda: (df.copy(),))
+
+
+def bench_clean_and_simulate_data(df, features, repeat):
+    # Includes the Excel read and write done by the command-line tool
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "input.xlsx"
+        output = Path(tmp) / "output.xlsx"
+        df.to_excel(source, index=False)
+        return best_of(lambda: clean_and_simulate_data(str(source), str(output), features), repeat)
+
+
+def bench_analyze_data(df, features, repeat):
+    # Builds its figures too, so the target adds the per-chart allowance
+    results = []
+    seconds = best_of(lambda: results.append(analyze_data(df, features)), repeat)
+    return {"seconds": seconds, "charts": len(results[-1]["visualizations"])}
+
+
+def bench_compare_schemes(df, features, repeat):
+    other = perturb(df)
+    return best_of(lambda: compare_schemes(df, other, features, features), repeat)
+
+
+def bench_create_advanced_visualizations(df, features, repeat):
+    # The number of charts sets the §5.1 rendering target
+    figures = []
+    seconds = best_of(lambda: figures.append(create_advanced_visualizations(df, features)), repeat)
+    return {"seconds": seconds, "charts": len(figures[-1])}
+
+
+# 函数名 -> (测量函数, 默认单元格上限, §5.1 要求类别："processing" 或 "charts")
+BENCHMARKS = {
+    "analyze_data_features": (bench_analyze_data_features, 50_000_000, "processing"),
+    "clean_dataframe": (bench_clean_dataframe, 10_000_000, "processing"),
+    "clean_and_simulate_data": (bench_clean_and_simulate_data, 200_000, "processing"),
+    "analyze_data": (bench_analyze_data, 1_000_000, "processing"),
+    "compare_schemes": (bench_compare_schemes, 50_000_000, "processing"),
+    "create_advanced_visualizations": (bench_create_advanced_visualizations, 20_000_000, "charts")
+}
+
+
+def run_suite(rows_grid, cols_grid, names, repeat, max_cells=None):
+    """
+    运行整个网格
+
+    Returns:
+        dict: "函数/行数x列数" -> {"function", "rows", "cols", "mb", "seconds"（图表另有 "charts"）或 "skipped"}
+    """
+    results = {}
+    for rows in rows_grid:
+        for cols in cols_grid:
+            cells = rows * cols
+            pending = [n for n in names if cells <= (max_cells or BENCHMARKS[n][1])]
+            for name in names:
+                if name not in pending:
+                    key = f"{name}/{rows}x{cols}"
+                    results[key] = {"function": name, "rows": rows, "cols": cols, "skipped": "超过单元格上限"}
+            if not pending:
+                continue
+
+            df = make_fixture(rows, cols)
+            features = analyze_data_features(df)
+            mb = df.memory_usage(deep=True).sum() / MB
+            for name in pending:
+                key = f"{name}/{rows}x{cols}"
+                measured = BENCHMARKS[name][0](df, features, repeat)
+                if not isinstance(measured, dict):
+                    measured = {"seconds": measured}
+                results[key] = {"function": name, "rows": rows, "cols": cols, "mb": mb, **measured}
+                print(f"{key:<50} {measured['seconds']:10.3f} s", flush=True)
+    return results
+
+
+def environment():
+    """记录运行环境，便于判断结果是否可比"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    与基线比较
+
+    Returns:
+        list: 回归项 [(键, 基线秒数, 本次秒数)]
+    """
+    regressions = []
+    print(f"\n{'基准项':<50} {'基线':>10} {'本次':>10} {'比值':>8}")
+    for key, entry in results.items():
+        base = baseline.get("results", {}).get(key, {})
+        if "seconds" not in entry or "seconds" not in base:
+            continue
+        ratio = entry["seconds"] / base["seconds"] if base["seconds"] > 0 else float("inf")
+        regressed = ratio > 1 + tolerance and entry["seconds"] - base["seconds"] > MIN_REGRESSION_SECONDS
+        flag = "  回归" if regressed else ""
+        print(f"{key:<50} {base['seconds']:10.3f} {entry['seconds']:10.3f} {ratio:8.2f}{flag}")
+        if regressed:
+            regressions.append((key, base["seconds"], entry["seconds"]))
+    return regressions
+
+
+def target_seconds(entry):
+    """§5.1 对该项的耗时要求（秒）：处理时间按数据量折算，另加每张图表的渲染时间"""
+    charts = CHART_SECONDS * entry.get("charts", 0)
+    if BENCHMARKS[entry["function"]][2] == "charts":
+        return max(charts, CHART_SECONDS)
+    return max(PROCESSING_SECONDS_PER_100MB * entry["mb"] / 100, MIN_TARGET_SECONDS) + charts
+
+
+def check_targets(results):
+    """
+    检查 §5.1 的响应时间要求
+
+    Returns:
+        list: 超出要求的项 [(键, 要求秒数, 本次秒数)]
+    """
+    violations = []
+    print(f"\n{'基准项':<50} {'要求':>10} {'本次':>10}")
+    for key, entry in results.items():
+        if "seconds" not in entry:
+            continue
+        target = target_seconds(entry)
+        exceeded = entry["seconds"] > target
+        flag = "  超出" if exceeded else ""
+        print(f"{key:<50} {target:10.3f} {entry['seconds']:10.3f}{flag}")
+        if exceeded:
+            violations.append((key, target, entry["seconds"]))
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分析热点基准测试套件')
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS), help='行数网格')
+    parser.add_argument('--cols', type=int, nargs='+', default=list(DEFAULT_COLS), help='列数网格')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='只运行指定函数')
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数（取最短）')
+    parser.add_argument('--max-cells', type=int, help='统一的单元格上限（默认按函数设置）')
+    parser.add_argument('--output', type=Path, help='结果 JSON 路径（默认写入 benchmarks/results/）')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='基线 JSON 路径')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许的相对变慢比例')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+    parser.add_argument('--check', action='store_true', help='缺少基线视为错误，并检查 §5.1 响应时间要求')
+    args = parser.parse_args()
+
+    names = args.only or list(BENCHMARKS)
+    # Fail before the (long) run rather than after it
+    if args.check and not args.save_baseline and not args.baseline.exists():
+        parser.error(f"未找到基线 {args.baseline}，先在同一台机器上使用 --save-baseline 创建")
+    # Import heavy dependencies up front so first-call import time is not measured
+    warm_up().join()
+    report = {
+        "environment": environment(),
+        "results": run_suite(args.rows, args.cols, names, args.repeat, args.max_cells)
+    }
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+
+    failed = False
+    if args.check:
+        violations = check_targets(report["results"])
+        if violations:
+            print(f"\n{len(violations)} 项超出 §5.1 响应时间要求:")
+            for key, target, current in violations:
+                print(f"    {key}: {current:.3f} s > {target:.3f} s")
+            failed = True
+        else:
+            print("\n全部满足 §5.1 响应时间要求")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"基线已更新: {args.baseline}")
+    elif args.baseline.exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report["results"], baseline, args.tolerance)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回归（容差 {args.tolerance:.0%}）:")
+            for key, base, current in regressions:
+                print(f"    {key}: {base:.3f} s -> {current:.3f} s")
+            failed = True
+        else:
+            print("\n未发现性能回归")
+    else:
+        print(f"未找到基线 {args.baseline}，使用 --save-baseline 创建")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+页面计时日志汇总
+
+读取 utils.timing 写入的 JSONL 日志，按（页面，步骤）统计运行次数与
+p50 / p95 / 最大耗时，用于离线比较各页面的交互延迟。
+
+用法:
+    python benchmarks/timing_report.py
+    python benchmarks/timing_report.py --page scheme_comparison --since 2024-06-01 --min-rows 10000
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils.timing import log_path, read_records  # noqa: E402
+
+TOTAL = "(整页)"
+
+
+def select_records(records, page=None, since=None, min_rows=None):
+    """按页面、起始时间和数据行数筛选运行记录"""
+    selected = []
+    for record in records:
+        if page and record.get("page") != page:
+            continue
+        if since and record.get("timestamp", "") < since:
+            continue
+        if min_rows and (record.get("rows") or 0) < min_rows:
+            continue
+        selected.append(record)
+    return selected
+
+
+def span_timings(records):
+    """
+    收集各（页面，步骤）的耗时；同一次运行中重复出现的步骤先求和
+
+    Returns:
+        dict: (页面, 步骤) -> [每次运行的毫秒数]
+    """
+    timings = {}
+    for record in records:
+        page = record.get("page", "?")
+        timings.setdefault((page, TOTAL), []).append(record["total_ms"])
+        per_run = {}
+        for entry in record.get("spans", []):
+            label = entry["name"]
+            meta = entry.get("meta") or {}
+            step = meta.get("step") or meta.get("tab") or meta.get("chart")
+            if step:
+                label = f"{label}:{step}"
+            per_run[label] = per_run.get(label, 0.0) + entry["ms"]
+        for label, ms in per_run.items():
+            timings.setdefault((page, label), []).append(ms)
+    return timings
+
+
+def print_report(timings):
+    print(f"{'页面':<26} {'步骤':<34} {'次数':>6} {'p50 ms':>10} {'p95 ms':>10} {'最大 ms':>10}")
+    for (page, label), values in sorted(timings.items(), key=lambda item: (item[0][0], item[0][1] != TOTAL, item[0][1])):
+        values = np.asarray(values)
+        p50, p95 = np.percentile(values, [50, 95])
+        print(f"{page:<26} {label:<34} {len(values):>6} {p50:>10.1f} {p95:>10.1f} {values.max():>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='页面计时日志汇总')
+    parser.add_argument('--log', type=Path, help='日志路径（默认读取 DATAVIZ_TIMING_LOG 或 data/logs/timing.jsonl，连同 .1 轮转备份）')
+    parser.add_argument('--page', help='只统计指定页面')
+    parser.add_argument('--since', help='只统计该时间之后的记录（ISO 格式，如 2024-06-01）')
+    parser.add_argument('--min-rows', type=int, help='只统计数据行数不少于该值的记录')
+    args = parser.parse_args()
+
+    path = args.log or log_path()
+    records = select_records(read_records(path), args.page, args.since, args.min_rows)
+    if not records:
+        print(f"{path} 中没有符合条件的计时记录")
+        return
+    sessions = len({record.get("session_id") for record in records})
+    print(f"{path}: {len(records)} 次运行，{sessions} 个会话\n")
+    print_report(span_timings(records))
+
+
+if __name__ == "__main__":
+    main()
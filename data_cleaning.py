@@ -5,9 +5,14 @@ import json
 import argparse
 from datetime import datetime
 
+from utils.data_loader import excel_dimensions
+from utils.memory import fits_budget, format_budget, track
+from utils.paths import CLEANED_DIR, FEATURES_DIR, UPLOAD_DIR
+from utils.timing import begin_run, end_run, set_dataset, span
+
 def load_data_features(file_name):
     """Load data features from JSON file"""
-    features_file = Path(__file__).parent / "data" / "features" / f"{file_name}.json"
+    features_file = FEATURES_DIR / f"{file_name}.json"
     if features_file.exists():
         with open(features_file, 'r', encoding='utf-8') as f:
             return json.load(f)
@@ -37,6 +42,67 @@ def generate_sample_data(features, num_rows=100):
     
     return pd.DataFrame(data)
 
+@track("clean")
+def clean_dataframe(df, features):
+    """
+    按特征配置清洗并模拟数据（不涉及文件读写）
+    
+    Args:
+        df (pd.DataFrame): 原始数据
+        features (dict): 数据特征配置
+    
+    Returns:
+        pd.DataFrame: 清洗后的数据
+    """
+    # 获取数值列和类别列
+    numeric_columns = features.get("numeric_columns", [])
+    categorical_columns = features.get("categorical_columns", [])
+    
+    # 清洗规则1：处理缺失值
+    # 对数值列用0填充
+    df[numeric_columns] = df[numeric_columns].fillna(0)
+    # 对类别列用"未知"填充
+    df[categorical_columns] = df[categorical_columns].fillna("未知")
+    
+    # 清洗规则2：去除重复记录
+    df = df.drop_duplicates()
+    
+    # 数据模拟规则1：对数值列添加随机扰动（±5%）
+    np.random.seed(42)  # 保证可重复性
+    for col in numeric_columns:
+        df[col] = df[col].apply(
+            lambda x: x * np.random.uniform(0.95, 1.05) if x != 0 else 0
+        )
+    
+    # 数据模拟规则2：对特定类别添加额外波动
+    special_categories = features.get("special_categories", {})
+    for category, columns in special_categories.items():
+        if category in categorical_columns:
+            mask = df[category].isin(columns.get("values", []))
+            for col in numeric_columns:
+                df.loc[mask, col] = df.loc[mask, col].apply(
+                    lambda x: x * np.random.uniform(0.9, 1.1) if x != 0 else 0
+                )
+    
+    # 清洗规则3：确保数据类型
+    # 数值列转换为float64
+    for col in numeric_columns:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('float64')
+    
+    # 类别列转换为string
+    for col in categorical_columns:
+        df[col] = df[col].astype('string')
+    
+    # 清洗规则4：处理异常值
+    # 对数值列进行异常值处理（超过3个标准差的值视为异常值）
+    for col in numeric_columns:
+        mean = df[col].mean()
+        std = df[col].std()
+        df.loc[df[col] > mean + 3*std, col] = mean + 3*std
+        df.loc[df[col] < mean - 3*std, col] = mean - 3*std
+    
+    return df
+
 def clean_and_simulate_data(input_file, output_file, features=None, generate_new=False):
     """
     清洗和模拟数据
@@ -53,8 +119,12 @@ def clean_and_simulate_data(input_file, output_file, features=None, generate_new
                 raise ValueError("生成新数据需要特征配置")
             df = generate_sample_data(features)
         else:
-            # 读取Excel文件
-            df = pd.read_excel(input_file)
+            # 读取Excel文件（清洗结果要完整写回，超出内存预算时只提示，不截断）
+            dimensions = excel_dimensions(input_file)
+            if dimensions and not fits_budget("load", *dimensions):
+                print(f"警告：{Path(input_file).name} 共 {dimensions[0]} 行，预计超出内存预算（{format_budget()}）")
+            with span("load", file=Path(input_file).name), track("load"):
+                df = pd.read_excel(input_file)
             
             # 如果没有提供特征配置，尝试从文件名加载
             if features is None:
@@ -64,55 +134,13 @@ def clean_and_simulate_data(input_file, output_file, features=None, generate_new
             if features is None:
                 raise ValueError("无法加载数据特征配置")
         
-        # 获取数值列和类别列
-        numeric_columns = features.get("numeric_columns", [])
-        categorical_columns = features.get("categorical_columns", [])
-        
-        # 清洗规则1：处理缺失值
-        # 对数值列用0填充
-        df[numeric_columns] = df[numeric_columns].fillna(0)
-        # 对类别列用"未知"填充
-        df[categorical_columns] = df[categorical_columns].fillna("未知")
-        
-        # 清洗规则2：去除重复记录
-        df = df.drop_duplicates()
-        
-        # 数据模拟规则1：对数值列添加随机扰动（±5%）
-        np.random.seed(42)  # 保证可重复性
-        for col in numeric_columns:
-            df[col] = df[col].apply(
-                lambda x: x * np.random.uniform(0.95, 1.05) if x != 0 else 0
-            )
-        
-        # 数据模拟规则2：对特定类别添加额外波动
-        special_categories = features.get("special_categories", {})
-        for category, columns in special_categories.items():
-            if category in categorical_columns:
-                mask = df[category].isin(columns.get("values", []))
-                for col in numeric_columns:
-                    df.loc[mask, col] = df.loc[mask, col].apply(
-                        lambda x: x * np.random.uniform(0.9, 1.1) if x != 0 else 0
-                    )
-        
-        # 清洗规则3：确保数据类型
-        # 数值列转换为float64
-        for col in numeric_columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('float64')
-        
-        # 类别列转换为string
-        for col in categorical_columns:
-            df[col] = df[col].astype('string')
-        
-        # 清洗规则4：处理异常值
-        # 对数值列进行异常值处理（超过3个标准差的值视为异常值）
-        for col in numeric_columns:
-            mean = df[col].mean()
-            std = df[col].std()
-            df.loc[df[col] > mean + 3*std, col] = mean + 3*std
-            df.loc[df[col] < mean - 3*std, col] = mean - 3*std
+        set_dataset(*df.shape)
+        with span("compute", step="clean_dataframe"):
+            df = clean_dataframe(df, features)
         
         # 保存清洗后的数据
-        df.to_excel(output_file, index=False)
+        with span("write", file=Path(output_file).name):
+            df.to_excel(output_file, index=False)
         print(f"数据{'生成并' if generate_new else '清洗'}完成，已保存到 {output_file}")
         
         # 返回清洗后的数据框
@@ -132,8 +160,8 @@ def process_specific_file(input_file, output_file=None, generate_new=False):
         generate_new (bool): 是否生成新数据
     """
     # 获取上传文件目录
-    upload_dir = Path(__file__).parent / "data" / "uploaded_excel"
-    output_dir = Path(__file__).parent / "data" / "cleaned_excel"
+    upload_dir = UPLOAD_DIR
+    output_dir = CLEANED_DIR
     
     # 确保输出目录存在
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -162,7 +190,7 @@ def process_specific_file(input_file, output_file=None, generate_new=False):
 
 def list_available_files():
     """列出所有可用的Excel文件"""
-    upload_dir = Path(__file__).parent / "data" / "uploaded_excel"
+    upload_dir = UPLOAD_DIR
     excel_files = list(upload_dir.glob("*.xlsx")) + list(upload_dir.glob("*.xls"))
     
     if not excel_files:
@@ -185,7 +213,9 @@ if __name__ == "__main__":
     if args.list:
         list_available_files()
     elif args.file:
+        begin_run("data_cleaning")
         process_specific_file(args.file, args.output, args.generate)
+        end_run()
     else:
         print("请指定操作：")
         print("  --list     列出所有可用的文件")
@@ -1,11 +1,31 @@
 import streamlit as st
 import pandas as pd
+import glob
 import os
 from pathlib import Path
 import shutil
 import json
 import numpy as np
-import plotly.express as px
+import time
+from utils.data_loader import (
+    file_signature,
+    list_workbooks,
+    load_dataset,
+    loaded_signature,
+    read_excel_within_budget,
+    remove_columnar_copies
+)
+from utils.data_processor import analyze_data_features
+from utils.fragments import fragment
+from utils.paths import CUBES_DIR, FEATURES_DIR, UPLOAD_DIR
+from utils.precompute import enqueue_precompute, show_precompute_progress
+from utils.olap_cube import OLAPCube, suggest_dimensions, suggest_measures, lattice_up_to
+from utils.scheme_summary import SUMMARIES_DIR, compute_scheme_summary, save_scheme_summary
+from utils.lazy_import import lazy_import
+from utils.memory import show_fallbacks
+from utils.timing import begin_page, end_page, set_dataset, span
+
+px = lazy_import("plotly.express")
 
 # Page config
 st.set_page_config(
@@ -13,77 +33,19 @@ st.set_page_config(
     page_icon="📊",
     layout="wide"
 )
+begin_page("data_configuration")
 
 # Title
 st.title("📊 数据配置与管理")
 
 # Create upload directory if it doesn't exist
-UPLOAD_DIR = Path(__file__).parent.parent / "data" / "uploaded_excel"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # Create data features directory
-FEATURES_DIR = Path(__file__).parent.parent / "data" / "features"
 FEATURES_DIR.mkdir(parents=True, exist_ok=True)
 
-def analyze_data_features(df):
-    """Analyze data features and return feature information"""
-    features = {
-        "numeric_columns": [],
-        "categorical_columns": [],
-        "date_columns": [],
-        "text_columns": [],
-        "column_stats": {}
-    }
-    
-    for col in df.columns:
-        col_type = df[col].dtype
-        non_null_count = df[col].count()
-        null_count = df[col].isnull().sum()
-        
-        # Basic statistics
-        stats = {
-            "non_null_count": non_null_count,
-            "null_count": null_count,
-            "null_percentage": (null_count / len(df)) * 100 if len(df) > 0 else 0
-        }
-        
-        # Numeric columns
-        if pd.api.types.is_numeric_dtype(col_type):
-            features["numeric_columns"].append(col)
-            stats.update({
-                "min": df[col].min(),
-                "max": df[col].max(),
-                "mean": df[col].mean(),
-                "std": df[col].std()
-            })
-        
-        # Categorical columns
-        elif df[col].nunique() < len(df) * 0.5:  # If unique values are less than 50% of total rows
-            features["categorical_columns"].append(col)
-            stats.update({
-                "unique_values": df[col].nunique(),
-                "most_common": df[col].value_counts().head(3).to_dict()
-            })
-        
-        # Date columns
-        elif pd.api.types.is_datetime64_dtype(col_type):
-            features["date_columns"].append(col)
-            stats.update({
-                "min_date": df[col].min(),
-                "max_date": df[col].max()
-            })
-        
-        # Text columns
-        else:
-            features["text_columns"].append(col)
-            stats.update({
-                "avg_length": df[col].astype(str).str.len().mean(),
-                "max_length": df[col].astype(str).str.len().max()
-            })
-        
-        features["column_stats"][col] = stats
-    
-    return features
+# Pre-aggregated OLAP cubes built at ingest time
+CUBES_DIR.mkdir(parents=True, exist_ok=True)
 
 def save_data_features(file_name, features):
     """Save data features to JSON file"""
@@ -91,21 +53,93 @@ def save_data_features(file_name, features):
     with open(features_file, 'w', encoding='utf-8') as f:
         json.dump(features, f, ensure_ascii=False, indent=2, default=str)
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def profile_upload(signature, _df):
+    """Data features of the uploaded file, computed once per file version"""
+    return analyze_data_features(_df)
+
+def build_data_cube(cube_name, df, features):
+    """
+    Build the OLAP cube over categorical dimensions and persist it (unless the data was truncated)
+
+    A re-uploaded workbook that starts with the rows of the saved cube only has its new rows aggregated.
+    """
+    dimensions = suggest_dimensions(df, features)
+    measures = suggest_measures(df, features, dimensions)
+    if not dimensions or not measures:
+        return None
+    # Materialize the full lattice for a handful of dimensions, otherwise cap cuboid width
+    lattice = None if len(dimensions) <= 6 else lattice_up_to(dimensions, 3)
+    cube = OLAPCube(dimensions, measures, lattice)
+    previous = OLAPCube.load(CUBES_DIR / f"{cube_name}.pkl")
+    if (
+        previous is not None
+        and (previous.dimensions, previous.measures, previous.lattice) == (cube.dimensions, cube.measures, cube.lattice)
+        and previous.extends(df)
+    ):
+        cube = previous.append(df.iloc[previous.row_count:])
+    else:
+        cube.append(df)
+    # A cube over rows cut by the memory budget must not be reused later as if it were complete
+    if not df.attrs.get("memory_fallback"):
+        cube.save(CUBES_DIR / f"{cube_name}.pkl")
+    return cube
+
+def load_data_cube(cube_name, df, features, source_path):
+    """Load a persisted cube, rebuilding it when the source file is newer"""
+    cube_file = CUBES_DIR / f"{cube_name}.pkl"
+    if cube_file.exists() and cube_file.stat().st_mtime >= Path(source_path).stat().st_mtime:
+        return OLAPCube.load(cube_file)
+    return build_data_cube(cube_name, df, features)
+
+@fragment
+def display_cube_explorer(cube, key):
+    """Slice-and-dice explorer answered from the pre-aggregated cube; its controls rerun only the explorer"""
+    st.write("多维汇总分析")
+    group_by = st.multiselect(
+        "分组维度",
+        cube.dimensions,
+        default=cube.dimensions[:1],
+        key=f"{key}_group_by"
+    )
+    measure = st.selectbox("汇总指标", cube.measures, key=f"{key}_measure")
+    
+    filters = {}
+    filter_cols = st.columns(len(cube.dimensions))
+    for filter_col, dim in zip(filter_cols, cube.dimensions):
+        with filter_col:
+            values = st.multiselect(dim, cube.dimension_values(dim), key=f"{key}_filter_{dim}")
+            if values:
+                filters[dim] = values
+    
+    start = time.perf_counter()
+    result = cube.query(filters, group_by)
+    elapsed = time.perf_counter() - start
+    
+    stat_names = {"sum": "合计", "count": "数量", "mean": "平均值", "min": "最小值", "max": "最大值"}
+    if group_by:
+        table = result[measure].rename(columns=stat_names)
+    else:
+        table = result[measure].rename(index=stat_names).to_frame("全部").T
+    st.dataframe(table, use_container_width=True)
+    st.caption(f"查询耗时 {elapsed * 1000:.3f} 毫秒（预聚合立方体，{len(cube.cuboids)} 个汇总表，{cube.row_count} 行原始数据）")
+
 def load_excel_file(file_path):
     """Load Excel file with proper data type conversion"""
     try:
         # Read Excel file with specific data types
-        df = pd.read_excel(
-            file_path,
-            dtype={
-                '指标名称': str,
-                '指标值': float,
-                '权重': float,
-                '评分标准_及格线': float,
-                '评分标准_优秀线': float,
-                '单位': str
-            }
-        )
+        with span("load", file=Path(file_path).name):
+            df = read_excel_within_budget(
+                file_path,
+                dtype={
+                    '指标名称': str,
+                    '指标值': float,
+                    '权重': float,
+                    '评分标准_及格线': float,
+                    '评分标准_优秀线': float,
+                    '单位': str
+                }
+            )
         
         # Convert numeric columns to float
         numeric_columns = ['指标值', '权重', '评分标准_及格线', '评分标准_优秀线']
@@ -118,28 +152,44 @@ def load_excel_file(file_path):
         st.error(f"加载文件时出错: {str(e)}")
         return None
 
-# File upload section
-st.header("上传新文件")
-uploaded_file = st.file_uploader(
-    "选择Excel文件上传",
-    type=['xlsx', 'xls'],
-    help="支持.xlsx和.xls格式的文件"
-)
-
-if uploaded_file is not None:
-    try:
-        # Save the uploaded file
-        file_path = UPLOAD_DIR / uploaded_file.name
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        # Load and process the file
-        df = load_excel_file(file_path)
-        if df is not None:
-            # Continue with the rest of the processing...
+@fragment
+def render_file_preview(existing_files):
+    """Preview and profile one file; the file and sheet selectors rerun only this section"""
+    selected_file = st.selectbox(
+        "选择要预览的文件",
+        [f.name for f in existing_files],
+        key="preview_file"
+    )
+    
+    if selected_file:
+        try:
+            file_path = UPLOAD_DIR / selected_file
+            # First read the Excel file to get sheet names
+            with span("load", file=selected_file):
+                excel_file = pd.ExcelFile(file_path)
+                sheet_names = excel_file.sheet_names
+            
+                # Sheet selection
+                if len(sheet_names) > 1:
+                    selected_sheet = st.selectbox(
+                        "选择工作表",
+                        sheet_names,
+                        key="sheet_select"
+                    )
+                    df = load_dataset(file_path, selected_sheet)
+                else:
+                    df = load_dataset(file_path)
+            
+            set_dataset(*df.shape)
+            show_fallbacks()
+            
             # Analyze data features
-            features = analyze_data_features(df)
-            save_data_features(uploaded_file.name, features)
+            with span("profile"):
+                features = analyze_data_features(df)
+                save_data_features(selected_file, features)
+            if len(sheet_names) == 1 or selected_sheet == sheet_names[0]:
+                with span("compute", step="scheme_summary"):
+                    save_scheme_summary(selected_file, compute_scheme_summary(df, features))
             
             # Display data preview
             st.subheader("数据预览")
@@ -194,14 +244,16 @@ if uploaded_file is not None:
                 
                 # Correlation matrix
                 st.write("相关性分析")
-                corr_matrix = numeric_df.corr()
-                fig = px.imshow(
-                    corr_matrix,
-                    title="相关性热力图",
-                    color_continuous_scale="RdBu",
-                    aspect="auto"
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                with span("compute", step="correlation"):
+                    corr_matrix = numeric_df.corr()
+                with span("render", chart="correlation_heatmap"):
+                    fig = px.imshow(
+                        corr_matrix,
+                        title="相关性热力图",
+                        color_continuous_scale="RdBu",
+                        aspect="auto"
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
             
             # Categorical columns analysis
             if features["categorical_columns"]:
@@ -209,76 +261,60 @@ if uploaded_file is not None:
                 for col in features["categorical_columns"]:
                     value_counts = df[col].value_counts()
                     st.bar_chart(value_counts)
-    except Exception as e:
-        st.error(f"处理文件时出错: {str(e)}")
-
-# Display existing files
-st.header("已上传文件")
-existing_files = list(UPLOAD_DIR.glob("*.xlsx")) + list(UPLOAD_DIR.glob("*.xls"))
-
-if not existing_files:
-    st.info("暂无上传的文件")
-else:
-    # Create a dataframe to display files
-    files_df = pd.DataFrame({
-        "文件名": [f.name for f in existing_files],
-        "大小": [f"{f.stat().st_size / 1024:.1f} KB" for f in existing_files],
-        "上传时间": [pd.Timestamp(f.stat().st_mtime, unit='s').strftime('%Y-%m-%d %H:%M:%S') for f in existing_files]
-    })
-    
-    # Display files in a table
-    st.dataframe(files_df, use_container_width=True)
-    
-    # File management options
-    st.subheader("文件管理")
-    file_to_delete = st.selectbox(
-        "选择要删除的文件",
-        [f.name for f in existing_files],
-        key="delete_file"
-    )
-    
-    if st.button("删除选中文件"):
-        try:
-            os.remove(UPLOAD_DIR / file_to_delete)
-            # Also remove the features file if it exists
-            features_file = FEATURES_DIR / f"{file_to_delete}.json"
-            if features_file.exists():
-                os.remove(features_file)
-            st.success(f"文件 {file_to_delete} 已删除")
-            st.experimental_rerun()
-        except Exception as e:
-            st.error(f"删除文件时出错: {str(e)}")
-
-# File preview and analysis section
-st.header("文件预览与数据分析")
-if existing_files:
-    selected_file = st.selectbox(
-        "选择要预览的文件",
-        [f.name for f in existing_files],
-        key="preview_file"
-    )
-    
-    if selected_file:
-        try:
-            file_path = UPLOAD_DIR / selected_file
-            # First read the Excel file to get sheet names
-            excel_file = pd.ExcelFile(file_path)
-            sheet_names = excel_file.sheet_names
             
-            # Sheet selection
-            if len(sheet_names) > 1:
-                selected_sheet = st.selectbox(
-                    "选择工作表",
-                    sheet_names,
-                    key="sheet_select"
-                )
-                df = pd.read_excel(file_path, sheet_name=selected_sheet)
-            else:
-                df = pd.read_excel(file_path)
+            # Multi-dimensional rollups
+            cube_name = selected_file if len(sheet_names) == 1 else f"{selected_file}_{selected_sheet}"
+            with span("compute", step="cube"):
+                cube = load_data_cube(cube_name, df, features, file_path)
+            if cube is not None:
+                display_cube_explorer(cube, "preview_cube")
             
+        except Exception as e:
+            st.error(f"读取文件时出错: {str(e)}")
+
+# File upload section
+st.header("上传新文件")
+uploaded_file = st.file_uploader(
+    "选择Excel文件上传",
+    type=['xlsx', 'xls'],
+    help="支持.xlsx和.xls格式的文件"
+)
+
+if uploaded_file is not None:
+    try:
+        # Save the uploaded file once per upload; the widget keeps it across reruns and
+        # rewriting would change the file signature and invalidate every cache keyed by it
+        file_path = UPLOAD_DIR / uploaded_file.name
+        upload_id = getattr(uploaded_file, "file_id", None) or getattr(uploaded_file, "id", None)
+        # Ingest (profile, summaries, cube, precompute) once per upload, not on every widget interaction;
+        # a file deleted while the uploader still holds it is ingested again
+        ingest = st.session_state.get("precompute_upload_id") != upload_id or not file_path.exists()
+        if ingest:
+            with open(file_path, "wb") as f:
+                f.write(uploaded_file.getbuffer())
+        
+        # Load and process the file
+        df = load_excel_file(file_path)
+        if df is not None:
+            set_dataset(*df.shape)
+            show_fallbacks()
+            # Continue with the rest of the processing...
             # Analyze data features
-            features = analyze_data_features(df)
-            save_data_features(selected_file, features)
+            with span("profile"):
+                features = profile_upload(loaded_signature(file_signature(file_path), df), df)
+            if ingest:
+                save_data_features(uploaded_file.name, features)
+                # Summary vectors for N-way scheme comparison
+                with span("compute", step="scheme_summary"):
+                    save_scheme_summary(uploaded_file.name, compute_scheme_summary(df, features))
+                # Multi-dimensional rollups, persisted for later visits
+                with span("compute", step="cube"):
+                    cube = build_data_cube(uploaded_file.name, df, features)
+                # Warm the data and figure caches the other pages read, in the background
+                enqueue_precompute(file_path)
+                st.session_state["precompute_upload_id"] = upload_id
+            else:
+                cube = load_data_cube(uploaded_file.name, df, features, file_path)
             
             # Display data preview
             st.subheader("数据预览")
@@ -333,14 +369,16 @@ if existing_files:
                 
                 # Correlation matrix
                 st.write("相关性分析")
-                corr_matrix = numeric_df.corr()
-                fig = px.imshow(
-                    corr_matrix,
-                    title="相关性热力图",
-                    color_continuous_scale="RdBu",
-                    aspect="auto"
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                with span("compute", step="correlation"):
+                    corr_matrix = numeric_df.corr()
+                with span("render", chart="correlation_heatmap"):
+                    fig = px.imshow(
+                        corr_matrix,
+                        title="相关性热力图",
+                        color_continuous_scale="RdBu",
+                        aspect="auto"
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
             
             # Categorical columns analysis
             if features["categorical_columns"]:
@@ -349,7 +387,65 @@ if existing_files:
                     value_counts = df[col].value_counts()
                     st.bar_chart(value_counts)
             
+            # Multi-dimensional rollups from the cube built at ingest time
+            if cube is not None:
+                display_cube_explorer(cube, "upload_cube")
+    except Exception as e:
+        st.error(f"处理文件时出错: {str(e)}")
+
+show_precompute_progress()
+
+# Display existing files
+st.header("已上传文件")
+existing_files = list_workbooks(UPLOAD_DIR)
+
+if not existing_files:
+    st.info("暂无上传的文件")
+else:
+    # Create a dataframe to display files
+    files_df = pd.DataFrame({
+        "文件名": [f.name for f in existing_files],
+        "大小": [f"{f.stat().st_size / 1024:.1f} KB" for f in existing_files],
+        "上传时间": [pd.Timestamp(f.stat().st_mtime, unit='s').strftime('%Y-%m-%d %H:%M:%S') for f in existing_files]
+    })
+    
+    # Display files in a table
+    st.dataframe(files_df, use_container_width=True)
+    
+    # File management options
+    st.subheader("文件管理")
+    file_to_delete = st.selectbox(
+        "选择要删除的文件",
+        [f.name for f in existing_files],
+        key="delete_file"
+    )
+    
+    if st.button("删除选中文件"):
+        try:
+            os.remove(UPLOAD_DIR / file_to_delete)
+            # Also remove the features file if it exists
+            features_file = FEATURES_DIR / f"{file_to_delete}.json"
+            if features_file.exists():
+                os.remove(features_file)
+            summary_file = SUMMARIES_DIR / f"{file_to_delete}.json"
+            if summary_file.exists():
+                os.remove(summary_file)
+            # Drop persisted cubes of the file: "<file>.pkl", or "<file>_<sheet>.pkl" per sheet
+            cube_name = glob.escape(file_to_delete)
+            for pattern in (f"{cube_name}.pkl", f"{cube_name}_*.pkl"):
+                for cube_file in CUBES_DIR.glob(pattern):
+                    os.remove(cube_file)
+            remove_columnar_copies(file_to_delete)
+            st.success(f"文件 {file_to_delete} 已删除")
+            st.experimental_rerun()
         except Exception as e:
-            st.error(f"读取文件时出错: {str(e)}")
+            st.error(f"删除文件时出错: {str(e)}")
+
+# File preview and analysis section
+st.header("文件预览与数据分析")
+if existing_files:
+    render_file_preview(existing_files)
 else:
-    st.info("请先上传文件以预览数据") 
\ No newline at end of file
+    st.info("请先上传文件以预览数据")
+
+end_page()
@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from pathlib import Path
 import json
 import numpy as np
-import graphviz
+from utils.data_loader import file_signature, list_workbooks, load_dataset, loaded_signature
+from utils.data_processor import analysis_figures, analyze_data
+from utils.figure_cache import cached_figures
+from utils.filter_sidebar import apply_filter, filter_datasets, filter_key, pending_filter_state, warn_empty
+from utils.fragments import fragment
+from utils.paths import FEATURES_DIR, UPLOAD_DIR
+from utils.precompute import show_precompute_progress
+from utils.memory import show_fallbacks
+from utils.timing import begin_page, end_page, set_dataset, span
 
 # Page config
 st.set_page_config(
@@ -13,14 +18,11 @@ st.set_page_config(
     page_icon="📈",
     layout="wide"
 )
+begin_page("evaluation_results")
 
 # Title
 st.title("📈 评估结果详情")
 
-# Load data features
-FEATURES_DIR = Path(__file__).parent.parent / "data" / "features"
-UPLOAD_DIR = Path(__file__).parent.parent / "data" / "uploaded_excel"
-
 def load_data_features(file_name):
     """Load data features from JSON file"""
     features_file = FEATURES_DIR / f"{file_name}.json"
@@ -54,129 +56,140 @@ def create_mermaid_chart(df, features):
     
     return mermaid_code
 
-def analyze_data(df, features):
-    """Analyze data and return analysis results"""
-    analysis = {
-        "numeric_analysis": {},
-        "categorical_analysis": {},
-        "correlations": {},
-        "trends": {},
-        "visualizations": {}
-    }
-    
-    # Analyze numeric columns
-    for col in features["numeric_columns"]:
-        stats = features["column_stats"][col]
-        analysis["numeric_analysis"][col] = {
-            "summary": {
-                "min": stats["min"],
-                "max": stats["max"],
-                "mean": stats["mean"],
-                "std": stats["std"]
-            },
-            "distribution": df[col].value_counts().sort_index().to_dict()
-        }
-        
-        # Create bar chart
-        fig_bar = px.bar(
-            df,
-            x=df.index,
-            y=col,
-            title=f"{col}柱状图"
-        )
-        analysis["visualizations"][f"{col}_bar"] = fig_bar
-        
-        # Create line chart
-        fig_line = px.line(
-            df,
-            x=df.index,
-            y=col,
-            title=f"{col}趋势图"
-        )
-        analysis["visualizations"][f"{col}_line"] = fig_line
-    
-    # Analyze categorical columns
-    for col in features["categorical_columns"]:
-        stats = features["column_stats"][col]
-        analysis["categorical_analysis"][col] = {
-            "unique_values": stats["unique_values"],
-            "most_common": stats["most_common"],
-            "distribution": df[col].value_counts().to_dict()
-        }
-        
-        # Create pie chart
-        fig_pie = px.pie(
-            df,
-            names=col,
-            title=f"{col}分布"
-        )
-        analysis["visualizations"][f"{col}_pie"] = fig_pie
-    
-    # Calculate correlations between numeric columns
-    if len(features["numeric_columns"]) > 1:
-        numeric_df = df[features["numeric_columns"]]
-        corr_matrix = numeric_df.corr()
-        analysis["correlations"] = corr_matrix.to_dict()
-        
-        # Create correlation heatmap
-        fig_heatmap = px.imshow(
-            corr_matrix,
-            title="相关性热力图",
-            color_continuous_scale="RdBu"
-        )
-        analysis["visualizations"]["correlation_heatmap"] = fig_heatmap
+@fragment
+def render_sheet_view(selected_file):
+    """
+    Load, filter and chart one sheet; the sheet selector reruns only this view
+
+    Fragments can't write to the sidebar, so the view returns (signature, df, categorical columns)
+    for the page to render the shared filter sidebar; after a sheet switch its options follow on
+    the next full run.
+    """
+    try:
+        # Load the Excel file
+        file_path = UPLOAD_DIR / selected_file
+        with span("load", file=selected_file):
+            excel_file = pd.ExcelFile(file_path)
+            sheet_names = excel_file.sheet_names
         
-        # Create radar chart for top correlated features
-        top_correlations = []
-        for i in range(len(corr_matrix.columns)):
-            for j in range(i+1, len(corr_matrix.columns)):
-                if abs(corr_matrix.iloc[i,j]) > 0.3:
-                    top_correlations.append((
-                        corr_matrix.columns[i],
-                        corr_matrix.columns[j],
-                        corr_matrix.iloc[i,j]
-                    ))
+            # Sheet selection
+            if len(sheet_names) > 1:
+                selected_sheet = st.selectbox(
+                    "选择工作表",
+                    sheet_names,
+                    key="evaluation_sheet"
+                )
+                df = load_dataset(file_path, selected_sheet)
+            else:
+                df = load_dataset(file_path)
+        set_dataset(*df.shape)
+        show_fallbacks()
         
-        if top_correlations:
-            fig_radar = go.Figure()
-            for col1, col2, corr in top_correlations:
-                fig_radar.add_trace(go.Scatterpolar(
-                    r=[df[col1].mean(), df[col2].mean()],
-                    theta=[col1, col2],
-                    fill='toself',
-                    name=f"{col1}-{col2}"
-                ))
-            fig_radar.update_layout(
-                polar=dict(
-                    radialaxis=dict(
-                        visible=True,
-                        range=[0, max(df[col].mean() for col in features["numeric_columns"]) * 1.2]
-                    )
-                ),
-                title="相关性雷达图"
+        # Load and analyze data features
+        features = load_data_features(selected_file)
+        if features:
+            # Shared category filter; every chart below uses the same row selection
+            # Truncated loads get their own key so their figures never stand in for the full data
+            signature = loaded_signature(
+                file_signature(file_path, selected_sheet if len(sheet_names) > 1 else None), df
             )
-            analysis["visualizations"]["correlation_radar"] = fig_radar
-    
-    # Analyze trends if there are date columns
-    if features["date_columns"]:
-        for date_col in features["date_columns"]:
-            for num_col in features["numeric_columns"]:
-                trend = df.groupby(date_col)[num_col].mean()
-                analysis["trends"][f"{date_col}_{num_col}"] = trend.to_dict()
-                
-                # Create trend line chart
-                fig_trend = px.line(
-                    x=trend.index,
-                    y=trend.values,
-                    title=f"{num_col}随时间变化趋势"
+            categorical_columns = [c for c in features["categorical_columns"] if c in df.columns]
+            dataset = (signature, df, categorical_columns)
+            # The sidebar is rendered after this view, so use the conditions it is about to return
+            state = pending_filter_state(categorical_columns)
+            with span("profile", step="filter"):
+                df = apply_filter(signature, df, categorical_columns, state)
+            if warn_empty({selected_file: df}):
+                # Skip rather than st.stop(): the sidebar rendered after this view must stay reachable
+                return dataset
+            
+            with span("compute", step="analyze_data"):
+                analysis = analyze_data(df, features, figures=False)
+            
+            # Figures come from the shared disk cache when this dataset/filter was charted before
+            with span("render", step="build_figures"):
+                analysis["visualizations"], _ = cached_figures(
+                    (signature, filter_key(state)),
+                    "evaluation",
+                    features,
+                    lambda: (analysis_figures(df, features), {})
                 )
-                analysis["visualizations"][f"{date_col}_{num_col}_trend"] = fig_trend
-    
-    return analysis
+            
+            # Display analysis results
+            st.header("数据分析结果")
+            
+            # Create tabs for different visualization types
+            tab1, tab2, tab3, tab4 = st.tabs(["基础分析", "柱状图", "雷达图", "趋势图"])
+            
+            with tab1, span("render", tab="basic"):
+                # Numeric columns analysis
+                if analysis["numeric_analysis"]:
+                    st.subheader("数值型指标分析")
+                    for col, data in analysis["numeric_analysis"].items():
+                        st.write(f"### {col}")
+                        col1, col2, col3, col4 = st.columns(4)
+                        with col1:
+                            st.metric("最小值", f"{data['summary']['min']:.2f}")
+                        with col2:
+                            st.metric("最大值", f"{data['summary']['max']:.2f}")
+                        with col3:
+                            st.metric("平均值", f"{data['summary']['mean']:.2f}")
+                        with col4:
+                            st.metric("标准差", f"{data['summary']['std']:.2f}")
+                
+                # Categorical columns analysis
+                if analysis["categorical_analysis"]:
+                    st.subheader("类别型指标分析")
+                    for col, data in analysis["categorical_analysis"].items():
+                        st.write(f"### {col}")
+                        st.write(f"唯一值数量: {data['unique_values']}")
+                        st.write("最常见值:")
+                        for value, count in data["most_common"].items():
+                            st.write(f"- {value}: {count}次")
+                
+                # Display Mermaid chart
+                st.subheader("数据关系图")
+                mermaid_code = create_mermaid_chart(df, features)
+                st.graphviz_chart(mermaid_code)
+            
+            with tab2, span("render", tab="bar"):
+                # Display bar charts
+                if analysis["visualizations"]:
+                    st.subheader("柱状图分析")
+                    for viz_name, fig in analysis["visualizations"].items():
+                        if viz_name.endswith("_bar"):
+                            st.plotly_chart(fig, use_container_width=True)
+            
+            with tab3, span("render", tab="radar"):
+                # Display radar charts
+                if "correlation_radar" in analysis["visualizations"]:
+                    st.subheader("雷达图分析")
+                    st.plotly_chart(analysis["visualizations"]["correlation_radar"], use_container_width=True)
+                
+                # Display correlation heatmap
+                if "correlation_heatmap" in analysis["visualizations"]:
+                    st.subheader("相关性热力图")
+                    st.plotly_chart(analysis["visualizations"]["correlation_heatmap"], use_container_width=True)
+            
+            with tab4, span("render", tab="trend"):
+                # Display trend charts
+                if analysis["visualizations"]:
+                    st.subheader("趋势分析")
+                    for viz_name, fig in analysis["visualizations"].items():
+                        if viz_name.endswith("_trend"):
+                            st.plotly_chart(fig, use_container_width=True)
+            
+            return dataset
+        else:
+            st.warning("未找到数据特征信息，请先在数据配置页面分析数据")
+            
+    except Exception as e:
+        st.error(f"处理数据时出错: {str(e)}")
+    return None
 
 # File selection
 st.header("选择评估方案")
-existing_files = list(UPLOAD_DIR.glob("*.xlsx")) + list(UPLOAD_DIR.glob("*.xls"))
+existing_files = list_workbooks(UPLOAD_DIR)
 
 if not existing_files:
     st.info("请先在数据配置页面上传文件")
@@ -187,93 +200,9 @@ else:
     )
     
     if selected_file:
-        try:
-            # Load the Excel file
-            file_path = UPLOAD_DIR / selected_file
-            excel_file = pd.ExcelFile(file_path)
-            sheet_names = excel_file.sheet_names
-            
-            # Sheet selection
-            if len(sheet_names) > 1:
-                selected_sheet = st.selectbox(
-                    "选择工作表",
-                    sheet_names
-                )
-                df = pd.read_excel(file_path, sheet_name=selected_sheet)
-            else:
-                df = pd.read_excel(file_path)
-            
-            # Load and analyze data features
-            features = load_data_features(selected_file)
-            if features:
-                analysis = analyze_data(df, features)
-                
-                # Display analysis results
-                st.header("数据分析结果")
-                
-                # Create tabs for different visualization types
-                tab1, tab2, tab3, tab4 = st.tabs(["基础分析", "柱状图", "雷达图", "趋势图"])
-                
-                with tab1:
-                    # Numeric columns analysis
-                    if analysis["numeric_analysis"]:
-                        st.subheader("数值型指标分析")
-                        for col, data in analysis["numeric_analysis"].items():
-                            st.write(f"### {col}")
-                            col1, col2, col3, col4 = st.columns(4)
-                            with col1:
-                                st.metric("最小值", f"{data['summary']['min']:.2f}")
-                            with col2:
-                                st.metric("最大值", f"{data['summary']['max']:.2f}")
-                            with col3:
-                                st.metric("平均值", f"{data['summary']['mean']:.2f}")
-                            with col4:
-                                st.metric("标准差", f"{data['summary']['std']:.2f}")
-                    
-                    # Categorical columns analysis
-                    if analysis["categorical_analysis"]:
-                        st.subheader("类别型指标分析")
-                        for col, data in analysis["categorical_analysis"].items():
-                            st.write(f"### {col}")
-                            st.write(f"唯一值数量: {data['unique_values']}")
-                            st.write("最常见值:")
-                            for value, count in data["most_common"].items():
-                                st.write(f"- {value}: {count}次")
-                    
-                    # Display Mermaid chart
-                    st.subheader("数据关系图")
-                    mermaid_code = create_mermaid_chart(df, features)
-                    st.graphviz_chart(mermaid_code)
-                
-                with tab2:
-                    # Display bar charts
-                    if analysis["visualizations"]:
-                        st.subheader("柱状图分析")
-                        for viz_name, fig in analysis["visualizations"].items():
-                            if viz_name.endswith("_bar"):
-                                st.plotly_chart(fig, use_container_width=True)
-                
-                with tab3:
-                    # Display radar charts
-                    if "correlation_radar" in analysis["visualizations"]:
-                        st.subheader("雷达图分析")
-                        st.plotly_chart(analysis["visualizations"]["correlation_radar"], use_container_width=True)
-                    
-                    # Display correlation heatmap
-                    if "correlation_heatmap" in analysis["visualizations"]:
-                        st.subheader("相关性热力图")
-                        st.plotly_chart(analysis["visualizations"]["correlation_heatmap"], use_container_width=True)
-                
-                with tab4:
-                    # Display trend charts
-                    if analysis["visualizations"]:
-                        st.subheader("趋势分析")
-                        for viz_name, fig in analysis["visualizations"].items():
-                            if viz_name.endswith("_trend"):
-                                st.plotly_chart(fig, use_container_width=True)
-                
-            else:
-                st.warning("未找到数据特征信息，请先在数据配置页面分析数据")
-                
-        except Exception as e:
-            st.error(f"处理数据时出错: {str(e)}") 
\ No newline at end of file
+        show_precompute_progress(selected_file)
+        dataset = render_sheet_view(selected_file)
+        if dataset is not None:
+            filter_datasets({selected_file: dataset})
+
+end_page()
@@ -1,11 +1,29 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from pathlib import Path
 import json
 import numpy as np
 from datetime import datetime
+from utils.data_loader import file_signature, iter_excel_files, list_workbooks, loaded_signature
+from utils.filter_sidebar import (
+    apply_filter,
+    current_filter_key,
+    filter_datasets,
+    filter_key as state_key,
+    pending_filter_state,
+    warn_empty
+)
+from utils.fragments import fragment
+from utils.box_summary import box_summaries
+from utils.paths import FEATURES_DIR, UPLOAD_DIR
+from utils.rolling import RollingStats
+from utils.stats_engine import column_summary, long_summary, summarize_datasets
+from utils.lazy_import import lazy_import
+from utils.memory import show_fallbacks, track
+from utils.timing import begin_page, end_page, set_dataset, span
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 # Page config
 st.set_page_config(
@@ -13,31 +31,328 @@ st.set_page_config(
     page_icon="🗂️",
     layout="wide"
 )
+begin_page("historical_analysis")
 
 # Title
 st.title("🗂️ 历史方案分析")
 
+STAT_LABELS = {"mean": "平均值", "std": "标准差", "min": "最小值", "max": "最大值", "median": "中位数"}
+
 # Load data features
 def load_data_features(file_name):
     """Load data features from JSON file"""
-    features_file = Path(__file__).parent.parent / "data" / "features" / f"{file_name}.json"
+    features_file = FEATURES_DIR / f"{file_name}.json"
     if features_file.exists():
         with open(features_file, 'r', encoding='utf-8') as f:
             return json.load(f)
     return None
 
-def load_excel_file(file_path):
-    """Load Excel file with proper data type conversion"""
-    try:
-        df = pd.read_excel(file_path)
-        return df
-    except Exception as e:
-        st.error(f"加载文件时出错: {str(e)}")
-        return None
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_dataset_summary(signatures, columns, filter_key, _dfs):
+    """Summary statistics for every file and column, computed once per data version and filter"""
+    return summarize_datasets(_dfs, columns)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_box_summaries(signature, columns, filter_key, _df):
+    """Quartile/whisker/outlier summaries per file, computed once per data version and filter"""
+    return box_summaries(_df, list(columns))
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def get_rolling_stats(signature, column, filter_key, _values):
+    """Prefix-sum rolling engine per (dataset, column), reused across window changes"""
+    return RollingStats(_values)
+
+def common_columns(features):
+    """Numeric columns shared by every file with features, in the column order of the first file"""
+    numeric_sets = [f["numeric_columns"] for f in features.values() if f]
+    return [col for col in numeric_sets[0] if all(col in cols for cols in numeric_sets[1:])] if numeric_sets else []
+
+def categorical_columns(features, file_name):
+    """Filterable columns of one file (none when its features are missing)"""
+    return features[file_name]["categorical_columns"] if features[file_name] else []
+
+def file_summary(file_name, signature, df, columns, filter_key):
+    """One file's row of the shared summary table; the page-wide table is these rows stacked"""
+    return get_dataset_summary((signature,), tuple(columns), filter_key, {file_name: df})
+
+def render_overview(placeholder, file_name, df, filtered, summary, elapsed, expanded):
+    """Size, load time and summary statistics of one scheme"""
+    timing = f"{elapsed:.2f} 秒" if elapsed else "缓存"
+    with placeholder.container():
+        with st.expander(f"✅ {file_name}: {len(df)} 行 × {len(df.columns)} 列（{timing}）", expanded=expanded):
+            if len(filtered) < len(df):
+                st.caption(f"筛选后 {len(filtered)} / {len(df)} 行")
+            if len(summary.columns):
+                columns = summary.columns.get_level_values(0).unique()
+                stats = summary.loc[file_name].unstack().reindex(index=columns, columns=list(STAT_LABELS))
+                st.dataframe(stats.rename(columns=STAT_LABELS), use_container_width=True)
+
+def load_excel_files(file_names, features):
+    """
+    Load the selected files concurrently and render each scheme's overview as soon as it arrives
+
+    Rows are filtered with the conditions the sidebar is about to apply, and each file's summary
+    row is computed on arrival; the tabs reuse those rows once every file has loaded.
+    """
+    dfs, elapsed, signatures = {}, {}, {}
+    progress = st.progress(0.0, text="正在加载文件...")
+    overviews = {file_name: st.empty() for file_name in file_names}
+    for file_name in file_names:
+        overviews[file_name].caption(f"⏳ 等待加载: {file_name}")
+    
+    columns = common_columns(features)
+    state = pending_filter_state({col for f in file_names for col in categorical_columns(features, f)})
+    key = state_key(state)
+    
+    paths = [UPLOAD_DIR / file_name for file_name in file_names]
+    for done, (path, df, error, seconds) in enumerate(iter_excel_files(paths), start=1):
+        file_name = Path(path).name
+        if error is not None:
+            overviews[file_name].error(f"加载文件时出错: {file_name}: {str(error)}")
+        else:
+            dfs[file_name], elapsed[file_name] = df, seconds
+            # Cache keys follow the rows actually loaded (files may be truncated to the memory budget)
+            signatures[file_name] = loaded_signature(file_signature(path), df)
+            filtered = apply_filter(signatures[file_name], df, categorical_columns(features, file_name), state)
+            summary = file_summary(file_name, signatures[file_name], filtered, columns, key)
+            render_overview(overviews[file_name], file_name, df, filtered, summary, seconds, expanded=True)
+        progress.progress(done / len(file_names), text=f"已加载 {done}/{len(file_names)} 个文件")
+    
+    progress.empty()
+    order = [file_name for file_name in file_names if file_name in dfs]
+    return {f: dfs[f] for f in order}, {f: signatures[f] for f in order}, elapsed, overviews
+
+@fragment
+def render_time_series(dfs, common_numeric_cols, summary):
+    """Time series tab; changing the metric reruns only this tab"""
+    st.header("时间序列分析")
+    
+    if common_numeric_cols:
+        selected_col = st.selectbox(
+            "选择要分析的指标",
+            common_numeric_cols
+        )
+        
+        # Create time series plot
+        fig = go.Figure()
+        
+        for file_name, df in dfs.items():
+            if selected_col in df.columns:
+                fig.add_trace(go.Scatter(
+                    x=df.index,
+                    y=df[selected_col],
+                    name=file_name,
+                    mode='lines+markers'
+                ))
+        
+        fig.update_layout(
+            title=f"{selected_col} 时间序列分析",
+            xaxis_title="时间",
+            yaxis_title=selected_col,
+            showlegend=True
+        )
+        
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Calculate and display statistics
+        st.subheader("统计指标")
+        stats_df = column_summary(summary, selected_col).rename(columns=STAT_LABELS).reset_index()
+        
+        st.dataframe(stats_df, use_container_width=True)
+    else:
+        st.warning("未找到共同的数值型列")
+
+@fragment
+def render_comparison(dfs, common_numeric_cols, summary, signatures, filter_key):
+    """Box-plot comparison tab; changing the metrics reruns only this tab"""
+    st.header("对比分析")
+    
+    if common_numeric_cols:
+        selected_cols = st.multiselect(
+            "选择要对比的指标",
+            common_numeric_cols,
+            default=common_numeric_cols[:3]
+        )
+        
+        if selected_cols:
+            # Create comparison plot from precomputed box summaries; only outliers ship as points
+            fig = go.Figure()
+            total_outliers = 0
+            shown_outliers = 0
+            
+            for file_name, df in dfs.items():
+                boxes = get_box_summaries(
+                    signatures[file_name],
+                    tuple(common_numeric_cols),
+                    filter_key,
+                    df
+                )
+                for col in selected_cols:
+                    if col not in boxes:
+                        continue
+                    box = boxes[col]
+                    label = f"{file_name} - {col}"
+                    fig.add_trace(go.Box(
+                        x=[label],
+                        q1=[box["q1"]],
+                        median=[box["median"]],
+                        q3=[box["q3"]],
+                        lowerfence=[box["lowerfence"]],
+                        upperfence=[box["upperfence"]],
+                        mean=[box["mean"]],
+                        sd=[box["sd"]],
+                        name=label,
+                        legendgroup=label,
+                        boxpoints=False
+                    ))
+                    if len(box["outliers"]):
+                        fig.add_trace(go.Scatter(
+                            x=[label] * len(box["outliers"]),
+                            y=box["outliers"],
+                            name=label,
+                            legendgroup=label,
+                            showlegend=False,
+                            mode='markers',
+                            marker=dict(size=4, opacity=0.6)
+                        ))
+                    total_outliers += box["n_outliers"]
+                    shown_outliers += len(box["outliers"])
+            
+            fig.update_layout(
+                title="指标对比分析",
+                yaxis_title="值",
+                showlegend=True,
+                boxmode='overlay'
+            )
+            
+            st.plotly_chart(fig, use_container_width=True)
+            if total_outliers > shown_outliers:
+                st.caption(f"共 {total_outliers} 个离群点，图中抽样显示 {shown_outliers} 个")
+            
+            # Calculate and display comparison statistics
+            st.subheader("对比统计")
+            comparison_df = long_summary(summary, selected_cols).rename(columns=STAT_LABELS).reset_index()
+            st.dataframe(comparison_df, use_container_width=True)
+    else:
+        st.warning("未找到共同的数值型列")
+
+@fragment
+def render_trend(dfs, common_numeric_cols, summary, signatures, filter_key):
+    """Rolling trend tab; the metric and window controls rerun only this tab"""
+    st.header("趋势模式分析")
+    
+    if common_numeric_cols:
+        selected_col = st.selectbox(
+            "选择要分析的指标",
+            common_numeric_cols,
+            key="trend_col"
+        )
+        
+        # Calculate rolling statistics
+        window_size = st.slider("滚动窗口大小", 2, 10, 3)
+        compare_windows = st.multiselect(
+            "叠加对比的窗口大小",
+            list(range(2, 11)),
+            key="trend_compare_windows"
+        )
+        
+        for file_name, df in dfs.items():
+            if selected_col in df.columns:
+                st.subheader(f"{file_name} - {selected_col} 趋势分析")
+                
+                # Rolling statistics from cached prefix sums; a new window size is one O(n) pass
+                engine = get_rolling_stats(
+                    signatures[file_name],
+                    selected_col,
+                    filter_key,
+                    df[selected_col].to_numpy(dtype="float64")
+                )
+                rolling_mean, rolling_std = engine.window(window_size)
+                
+                # Create trend plot
+                fig = go.Figure()
+                
+                fig.add_trace(go.Scatter(
+                    x=df.index,
+                    y=df[selected_col],
+                    name="原始数据",
+                    mode='lines+markers'
+                ))
+                
+                fig.add_trace(go.Scatter(
+                    x=df.index,
+                    y=rolling_mean,
+                    name="滚动平均",
+                    mode='lines'
+                ))
+                
+                fig.add_trace(go.Scatter(
+                    x=df.index,
+                    y=rolling_mean + rolling_std,
+                    name="上界",
+                    mode='lines',
+                    line=dict(dash='dash')
+                ))
+                
+                fig.add_trace(go.Scatter(
+                    x=df.index,
+                    y=rolling_mean - rolling_std,
+                    name="下界",
+                    mode='lines',
+                    line=dict(dash='dash')
+                ))
+                
+                fig.update_layout(
+                    title=f"{selected_col} 趋势分析",
+                    xaxis_title="时间",
+                    yaxis_title=selected_col,
+                    showlegend=True
+                )
+                
+                st.plotly_chart(fig, use_container_width=True, key=f"trend_{file_name}")
+                
+                # Overlay several window sizes computed in one batch
+                if compare_windows:
+                    window_means, _ = engine.windows(compare_windows)
+                    fig_windows = go.Figure()
+                    fig_windows.add_trace(go.Scatter(
+                        x=df.index,
+                        y=df[selected_col],
+                        name="原始数据",
+                        mode='lines',
+                        line=dict(color='lightgray')
+                    ))
+                    for size, means in zip(compare_windows, window_means):
+                        fig_windows.add_trace(go.Scatter(
+                            x=df.index,
+                            y=means,
+                            name=f"窗口 {size}",
+                            mode='lines'
+                        ))
+                    fig_windows.update_layout(
+                        title=f"{selected_col} 多窗口滚动平均对比",
+                        xaxis_title="时间",
+                        yaxis_title=selected_col,
+                        showlegend=True
+                    )
+                    st.plotly_chart(fig_windows, use_container_width=True, key=f"trend_windows_{file_name}")
+                
+                # Trend statistics reuse the shared summary
+                col_mean = summary.loc[file_name, (selected_col, "mean")]
+                col_std = summary.loc[file_name, (selected_col, "std")]
+                trend_stats = {
+                    "趋势方向": "上升" if df[selected_col].iloc[-1] > df[selected_col].iloc[0] else "下降",
+                    "波动性": f"{col_std:.2f}",
+                    "稳定性": f"{1 - (col_std / col_mean):.2f}" if col_mean != 0 else "N/A"
+                }
+                
+                st.write("趋势统计")
+                st.json(trend_stats)
+    else:
+        st.warning("未找到共同的数值型列")
 
 # Get uploaded files
-UPLOAD_DIR = Path(__file__).parent.parent / "data" / "uploaded_excel"
-existing_files = list(UPLOAD_DIR.glob("*.xlsx")) + list(UPLOAD_DIR.glob("*.xls"))
+existing_files = list_workbooks(UPLOAD_DIR)
 
 if not existing_files:
     st.warning("请先在数据配置页面上传文件")
@@ -52,212 +367,51 @@ else:
     if len(selected_files) < 2:
         st.warning("请至少选择两个文件进行分析")
     else:
-        # Load and process selected files
-        dfs = {}
-        features = {}
+        # Load and process selected files in parallel
+        features = {file_name: load_data_features(file_name) for file_name in selected_files}
+        with span("load", files=len(selected_files)), track("load"):
+            raw_dfs, signatures, elapsed, overviews = load_excel_files(selected_files, features)
+        features = {file_name: features[file_name] for file_name in raw_dfs}
+        for df in raw_dfs.values():
+            set_dataset(*df.shape)
+        show_fallbacks()
         
-        for file_name in selected_files:
-            file_path = UPLOAD_DIR / file_name
-            df = load_excel_file(file_path)
-            if df is not None:
-                dfs[file_name] = df
-                features[file_name] = load_data_features(file_name)
+        # Shared category filter applied to every loaded scheme
+        with span("profile", step="filter"):
+            dfs = filter_datasets({
+                file_name: (signatures[file_name], df, categorical_columns(features, file_name))
+                for file_name, df in raw_dfs.items()
+            })
+        if warn_empty(dfs):
+            end_page()
+            st.stop()
         
         if len(dfs) >= 2:
+            common_numeric_cols = common_columns(features)
+            filter_key = current_filter_key()
+            
+            # The per-file rows computed on arrival, stacked; recomputed only if the filter or the
+            # common columns changed once every file was known
+            with span("compute", step="summary"):
+                summary = pd.concat([
+                    file_summary(file_name, signatures[file_name], df, common_numeric_cols, filter_key)
+                    for file_name, df in dfs.items()
+                ])
+            for file_name, df in dfs.items():
+                render_overview(
+                    overviews[file_name], file_name, raw_dfs[file_name], df, summary, elapsed[file_name], expanded=False
+                )
+            
             # Create tabs for different analysis types
             tab1, tab2, tab3 = st.tabs(["时间序列分析", "对比分析", "趋势模式分析"])
             
-            with tab1:
-                st.header("时间序列分析")
-                
-                # Get common numeric columns across all files
-                common_numeric_cols = set.intersection(
-                    *[set(features[f]["numeric_columns"]) for f in features if features[f]]
-                )
-                
-                if common_numeric_cols:
-                    selected_col = st.selectbox(
-                        "选择要分析的指标",
-                        list(common_numeric_cols)
-                    )
-                    
-                    # Create time series plot
-                    fig = go.Figure()
-                    
-                    for file_name, df in dfs.items():
-                        if selected_col in df.columns:
-                            fig.add_trace(go.Scatter(
-                                x=df.index,
-                                y=df[selected_col],
-                                name=file_name,
-                                mode='lines+markers'
-                            ))
-                    
-                    fig.update_layout(
-                        title=f"{selected_col} 时间序列分析",
-                        xaxis_title="时间",
-                        yaxis_title=selected_col,
-                        showlegend=True
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Calculate and display statistics
-                    st.subheader("统计指标")
-                    stats_df = pd.DataFrame()
-                    
-                    for file_name, df in dfs.items():
-                        if selected_col in df.columns:
-                            stats = {
-                                "文件": file_name,
-                                "平均值": df[selected_col].mean(),
-                                "标准差": df[selected_col].std(),
-                                "最小值": df[selected_col].min(),
-                                "最大值": df[selected_col].max(),
-                                "中位数": df[selected_col].median()
-                            }
-                            stats_df = pd.concat([stats_df, pd.DataFrame([stats])], ignore_index=True)
-                    
-                    st.dataframe(stats_df, use_container_width=True)
-                else:
-                    st.warning("未找到共同的数值型列")
+            with tab1, span("render", tab="time_series"):
+                render_time_series(dfs, common_numeric_cols, summary)
             
-            with tab2:
-                st.header("对比分析")
-                
-                # Get common numeric columns
-                common_numeric_cols = set.intersection(
-                    *[set(features[f]["numeric_columns"]) for f in features if features[f]]
-                )
-                
-                if common_numeric_cols:
-                    selected_cols = st.multiselect(
-                        "选择要对比的指标",
-                        list(common_numeric_cols),
-                        default=list(common_numeric_cols)[:3] if len(common_numeric_cols) >= 3 else list(common_numeric_cols)
-                    )
-                    
-                    if selected_cols:
-                        # Create comparison plot
-                        fig = go.Figure()
-                        
-                        for file_name, df in dfs.items():
-                            for col in selected_cols:
-                                if col in df.columns:
-                                    fig.add_trace(go.Box(
-                                        y=df[col],
-                                        name=f"{file_name} - {col}",
-                                        boxpoints='all'
-                                    ))
-                        
-                        fig.update_layout(
-                            title="指标对比分析",
-                            yaxis_title="值",
-                            showlegend=True,
-                            boxmode='group'
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True)
-                        
-                        # Calculate and display comparison statistics
-                        st.subheader("对比统计")
-                        comparison_stats = []
-                        
-                        for file_name, df in dfs.items():
-                            for col in selected_cols:
-                                if col in df.columns:
-                                    stats = {
-                                        "文件": file_name,
-                                        "指标": col,
-                                        "平均值": df[col].mean(),
-                                        "标准差": df[col].std(),
-                                        "最小值": df[col].min(),
-                                        "最大值": df[col].max(),
-                                        "中位数": df[col].median()
-                                    }
-                                    comparison_stats.append(stats)
-                        
-                        comparison_df = pd.DataFrame(comparison_stats)
-                        st.dataframe(comparison_df, use_container_width=True)
-                else:
-                    st.warning("未找到共同的数值型列")
+            with tab2, span("render", tab="comparison"):
+                render_comparison(dfs, common_numeric_cols, summary, signatures, filter_key)
             
-            with tab3:
-                st.header("趋势模式分析")
-                
-                # Get common numeric columns
-                common_numeric_cols = set.intersection(
-                    *[set(features[f]["numeric_columns"]) for f in features if features[f]]
-                )
-                
-                if common_numeric_cols:
-                    selected_col = st.selectbox(
-                        "选择要分析的指标",
-                        list(common_numeric_cols),
-                        key="trend_col"
-                    )
-                    
-                    # Calculate rolling statistics
-                    window_size = st.slider("滚动窗口大小", 2, 10, 3)
-                    
-                    for file_name, df in dfs.items():
-                        if selected_col in df.columns:
-                            st.subheader(f"{file_name} - {selected_col} 趋势分析")
-                            
-                            # Calculate rolling statistics
-                            rolling_mean = df[selected_col].rolling(window=window_size).mean()
-                            rolling_std = df[selected_col].rolling(window=window_size).std()
-                            
-                            # Create trend plot
-                            fig = go.Figure()
-                            
-                            fig.add_trace(go.Scatter(
-                                x=df.index,
-                                y=df[selected_col],
-                                name="原始数据",
-                                mode='lines+markers'
-                            ))
-                            
-                            fig.add_trace(go.Scatter(
-                                x=df.index,
-                                y=rolling_mean,
-                                name="滚动平均",
-                                mode='lines'
-                            ))
-                            
-                            fig.add_trace(go.Scatter(
-                                x=df.index,
-                                y=rolling_mean + rolling_std,
-                                name="上界",
-                                mode='lines',
-                                line=dict(dash='dash')
-                            ))
-                            
-                            fig.add_trace(go.Scatter(
-                                x=df.index,
-                                y=rolling_mean - rolling_std,
-                                name="下界",
-                                mode='lines',
-                                line=dict(dash='dash')
-                            ))
-                            
-                            fig.update_layout(
-                                title=f"{selected_col} 趋势分析",
-                                xaxis_title="时间",
-                                yaxis_title=selected_col,
-                                showlegend=True
-                            )
-                            
-                            st.plotly_chart(fig, use_container_width=True)
-                            
-                            # Calculate trend statistics
-                            trend_stats = {
-                                "趋势方向": "上升" if df[selected_col].iloc[-1] > df[selected_col].iloc[0] else "下降",
-                                "波动性": f"{df[selected_col].std():.2f}",
-                                "稳定性": f"{1 - (df[selected_col].std() / df[selected_col].mean()):.2f}" if df[selected_col].mean() != 0 else "N/A"
-                            }
-                            
-                            st.write("趋势统计")
-                            st.json(trend_stats)
-                else:
-                    st.warning("未找到共同的数值型列") 
\ No newline at end of file
+            with tab3, span("render", tab="trend"):
+                render_trend(dfs, common_numeric_cols, summary, signatures, filter_key)
+
+end_page()
@@ -1,10 +1,35 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from pathlib import Path
 import json
 import numpy as np
+from utils.comparison import compare_schemes
+from utils.compute_pool import compute
+from utils.data_loader import file_signature, list_workbooks, load_dataset, loaded_signature
+from utils.filter_sidebar import current_filter_key, filter_datasets, warn_empty
+from utils.fragments import fragment
+from utils.lazy_import import lazy_import
+from utils.memory import show_fallbacks
+from utils.olap_cube import suggest_dimensions
+from utils.paths import FEATURES_DIR, UPLOAD_DIR
+from utils.precompute import show_precompute_progress
+from utils.row_diff import RowDiff
+from utils.scheme_summary import (
+    SUMMARIES_DIR,
+    category_count_matrix,
+    common_numeric_columns,
+    compute_scheme_summary,
+    load_scheme_summary,
+    pairwise_difference,
+    save_scheme_summary,
+    scheme_distance,
+    summary_matrix
+)
+from utils.significance import significance_table
+from utils.timing import begin_page, end_page, set_dataset, span
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 # Page config
 st.set_page_config(
@@ -12,6 +37,7 @@ st.set_page_config(
     page_icon="⚖️",
     layout="wide"
 )
+begin_page("scheme_comparison")
 
 # Title
 st.title("⚖️ 方案对比分析")
@@ -25,9 +51,9 @@ def load_data_features(file_name):
     if "_cleaned_" in file_stem:
         # Extract original file name
         original_name = file_stem.split("_cleaned_")[0]
-        features_file = Path(__file__).parent.parent / "data" / "features" / f"{original_name}.json"
+        features_file = FEATURES_DIR / f"{original_name}.json"
     else:
-        features_file = Path(__file__).parent.parent / "data" / "features" / f"{file_stem}.json"
+        features_file = FEATURES_DIR / f"{file_stem}.json"
     
     if features_file.exists():
         with open(features_file, 'r', encoding='utf-8') as f:
@@ -38,93 +64,457 @@ def load_data_features(file_name):
 def load_excel_file(file_path):
     """Load Excel file with proper data type conversion"""
     try:
-        df = pd.read_excel(file_path)
+        with span("load", file=Path(file_path).name):
+            df = load_dataset(file_path)
         return df
     except Exception as e:
         st.error(f"加载文件时出错: {str(e)}")
         return None
 
-def compare_schemes(df1, df2, features1, features2):
-    """Compare two schemes and return comparison results"""
-    comparison = {
-        "numeric_comparison": {},
-        "categorical_comparison": {},
-        "correlation_comparison": {}
-    }
-    
-    # Get common numeric columns
-    common_numeric_cols = set.intersection(
-        set(features1["numeric_columns"]),
-        set(features2["numeric_columns"])
+SUMMARY_STAT_LABELS = {
+    "mean": "均值",
+    "median": "中位数",
+    "std": "标准差",
+    "min": "最小值",
+    "max": "最大值",
+    "sum": "合计",
+    "q05": "5%分位数",
+    "q25": "25%分位数",
+    "q75": "75%分位数",
+    "q95": "95%分位数",
+    "count": "数量"
+}
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def load_cached_scheme_summary(file_name, summary_mtime):
+    """Stored summary vector, cached until the summary file changes"""
+    return load_scheme_summary(file_name)
+
+def get_scheme_summary(file_name):
+    """Summary vector of a scheme; files ingested before summaries existed are summarized once"""
+    summary_file = SUMMARIES_DIR / f"{file_name}.json"
+    source_file = UPLOAD_DIR / file_name
+    if not summary_file.exists() or summary_file.stat().st_mtime < source_file.stat().st_mtime:
+        features = load_data_features(file_name)
+        df = load_excel_file(source_file)
+        if features is None or df is None:
+            return None
+        save_scheme_summary(file_name, compute_scheme_summary(df, features))
+    return load_cached_scheme_summary(file_name, summary_file.stat().st_mtime_ns)
+
+def get_significance_table(signatures, filter_key, columns, n_resamples, confidence, df1, df2):
+    """Significance tests per (files, filter, columns, bootstrap settings), computed in the shared pool"""
+    return compute(
+        ("significance", signatures, filter_key, columns, n_resamples, confidence),
+        significance_table, df1, df2, list(columns), n_resamples, confidence,
+        label="正在进行显著性检验"
     )
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_row_diff(signatures, filter_key, keys, value_columns, tolerance, _df1, _df2):
+    """Row-level diff cached per (files, filter, keys, compared columns, tolerance)"""
+    return RowDiff.compute(_df1, _df2, list(keys), list(value_columns), tolerance)
+
+ROW_DIFF_LABELS = {"changed": "变化的单元格", "added": "方案B新增的行", "removed": "方案B删除的行"}
+
+@fragment
+def render_row_diff(scheme1, scheme2, df1, df2, features1, signatures):
+    """Keyed row-level diff with paged detail tables; its controls rerun only this section"""
+    common_columns = [col for col in df1.columns if col in df2.columns]
+    default_keys = [col for col in suggest_dimensions(df1, features1) if col in df2.columns]
+    keys = st.multiselect("选择键列（用于匹配两个方案的行）", common_columns, default=default_keys, key="row_diff_keys")
+    if not keys:
+        st.info("请至少选择一个键列")
+        return
     
-    # Get common categorical columns
-    common_categorical_cols = set.intersection(
-        set(features1["categorical_columns"]),
-        set(features2["categorical_columns"])
-    )
+    numeric_columns = [
+        col for col in features1["numeric_columns"]
+        if col in df2.columns and col not in keys
+    ]
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        value_columns = st.multiselect("选择对比的数值列", numeric_columns, default=numeric_columns, key="row_diff_columns")
+    with col2:
+        tolerance = st.number_input("容差", min_value=0.0, value=0.0, format="%g", key="row_diff_tolerance")
     
-    # Numeric comparison
-    for col in common_numeric_cols:
-        comparison["numeric_comparison"][col] = {
-            "scheme1": {
-                "mean": df1[col].mean(),
-                "std": df1[col].std(),
-                "min": df1[col].min(),
-                "max": df1[col].max(),
-                "median": df1[col].median()
-            },
-            "scheme2": {
-                "mean": df2[col].mean(),
-                "std": df2[col].std(),
-                "min": df2[col].min(),
-                "max": df2[col].max(),
-                "median": df2[col].median()
-            },
-            "difference": {
-                "mean_diff": df2[col].mean() - df1[col].mean(),
-                "std_diff": df2[col].std() - df1[col].std(),
-                "min_diff": df2[col].min() - df1[col].min(),
-                "max_diff": df2[col].max() - df1[col].max(),
-                "median_diff": df2[col].median() - df1[col].median()
-            }
-        }
+    with st.spinner("正在计算行级差异..."), span("compute", step="row_diff"):
+        diff = get_row_diff(
+            signatures,
+            current_filter_key(),
+            tuple(keys),
+            tuple(value_columns),
+            tolerance,
+            df1,
+            df2
+        )
     
-    # Categorical comparison
-    for col in common_categorical_cols:
-        comparison["categorical_comparison"][col] = {
-            "scheme1": df1[col].value_counts().to_dict(),
-            "scheme2": df2[col].value_counts().to_dict()
-        }
+    summary = diff.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("匹配行数", summary["matched"])
+    col2.metric("变化行数", summary["changed_rows"], f"{summary['changed_cells']} 个单元格", delta_color="off")
+    col3.metric("新增行数", summary["added"])
+    col4.metric("删除行数", summary["removed"])
+    if summary["duplicate_keys_a"] or summary["duplicate_keys_b"]:
+        st.warning(
+            f"键不唯一：方案A有 {summary['duplicate_keys_a']} 个重复键，方案B有 {summary['duplicate_keys_b']} 个重复键，"
+            "重复键按出现顺序逐行配对"
+        )
     
-    # Correlation comparison
-    numeric_cols1 = features1["numeric_columns"]
-    numeric_cols2 = features2["numeric_columns"]
+    if summary["changed_cells"]:
+        st.subheader("按列汇总")
+        st.dataframe(
+            diff.column_summary().rename(columns={
+                "changed_cells": "变化单元格数",
+                "delta_sum": "差值合计",
+                "mean_abs_delta": "平均绝对差值"
+            }),
+            use_container_width=True
+        )
     
-    if numeric_cols1 and numeric_cols2:
-        corr1 = df1[numeric_cols1].corr()
-        corr2 = df2[numeric_cols2].corr()
+    st.subheader("差异明细")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        kind = st.selectbox("明细类型", list(ROW_DIFF_LABELS), format_func=ROW_DIFF_LABELS.get, key="row_diff_kind")
+    with col2:
+        page_size = st.selectbox("每页行数", [50, 100, 500, 1000], index=1, key="row_diff_page_size")
+    n_pages = diff.n_pages(kind, page_size)
+    with col3:
+        page_number = st.number_input("页码", min_value=1, max_value=n_pages, value=1, key="row_diff_page")
+    
+    st.caption(f"共 {diff.n_rows(kind)} 行，第 {page_number} / {n_pages} 页")
+    page = diff.page(kind, page_number - 1, page_size)
+    if kind == "changed":
+        page = page.rename(columns={"column": "指标", "value_a": "方案A", "value_b": "方案B", "delta": "差值 (B - A)"})
+    st.dataframe(page, use_container_width=True)
+
+@fragment
+def render_numeric_comparison(scheme1, scheme2, comparison):
+    """Numeric tab; changing the metric selection reruns only this tab"""
+    st.header("数值指标对比")
+    
+    if comparison["numeric_comparison"]:
+        # Select metrics to compare
+        selected_metrics = st.multiselect(
+            "选择要对比的指标",
+            list(comparison["numeric_comparison"].keys()),
+            default=list(comparison["numeric_comparison"].keys())[:3] if len(comparison["numeric_comparison"]) >= 3 else list(comparison["numeric_comparison"].keys())
+        )
         
-        # Get common columns for correlation comparison
-        common_cols = list(set(numeric_cols1) & set(numeric_cols2))
-        if common_cols:
-            corr1 = corr1.loc[common_cols, common_cols]
-            corr2 = corr2.loc[common_cols, common_cols]
-            comparison["correlation_comparison"] = {
-                "corr1": corr1.to_dict(),
-                "corr2": corr2.to_dict(),
-                "corr_diff": (corr2 - corr1).to_dict()
-            }
+        if selected_metrics:
+            # Create comparison plot
+            fig = go.Figure()
+            
+            for metric in selected_metrics:
+                comp = comparison["numeric_comparison"][metric]
+                
+                # Add bars for scheme1
+                fig.add_trace(go.Bar(
+                    name=f"{Path(scheme1).stem} - {metric}",
+                    x=[metric],
+                    y=[comp["scheme1"]["mean"]],
+                    error_y=dict(
+                        type='data',
+                        array=[comp["scheme1"]["std"]],
+                        visible=True
+                    )
+                ))
+                
+                # Add bars for scheme2
+                fig.add_trace(go.Bar(
+                    name=f"{Path(scheme2).stem} - {metric}",
+                    x=[metric],
+                    y=[comp["scheme2"]["mean"]],
+                    error_y=dict(
+                        type='data',
+                        array=[comp["scheme2"]["std"]],
+                        visible=True
+                    )
+                ))
+            
+            fig.update_layout(
+                title="指标均值对比",
+                barmode='group',
+                showlegend=True
+            )
+            
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Display detailed comparison
+            st.subheader("详细对比")
+            comparison_data = []
+            
+            for metric in selected_metrics:
+                comp = comparison["numeric_comparison"][metric]
+                comparison_data.append({
+                    "指标": metric,
+                    f"{Path(scheme1).stem}均值": f"{comp['scheme1']['mean']:.2f}",
+                    f"{Path(scheme1).stem}标准差": f"{comp['scheme1']['std']:.2f}",
+                    f"{Path(scheme2).stem}均值": f"{comp['scheme2']['mean']:.2f}",
+                    f"{Path(scheme2).stem}标准差": f"{comp['scheme2']['std']:.2f}",
+                    "均值差异": f"{comp['difference']['mean_diff']:.2f}",
+                    "标准差差异": f"{comp['difference']['std_diff']:.2f}"
+                })
+            
+            st.dataframe(pd.DataFrame(comparison_data), use_container_width=True)
+    else:
+        st.warning("未找到可对比的数值型指标")
+
+@fragment
+def render_categorical_comparison(scheme1, scheme2, comparison):
+    """Categorical tab; changing the selected columns reruns only this tab"""
+    st.header("类别指标对比")
     
-    return comparison
+    if comparison["categorical_comparison"]:
+        # Select categorical columns to compare
+        selected_cats = st.multiselect(
+            "选择要对比的类别指标",
+            list(comparison["categorical_comparison"].keys()),
+            default=list(comparison["categorical_comparison"].keys())[:2] if len(comparison["categorical_comparison"]) >= 2 else list(comparison["categorical_comparison"].keys())
+        )
+        
+        if selected_cats:
+            for cat in selected_cats:
+                st.subheader(f"{cat} 分布对比")
+                
+                # Create comparison plot
+                fig = go.Figure()
+                
+                # Get all unique categories
+                all_cats = set(comparison["categorical_comparison"][cat]["scheme1"].keys()) | set(comparison["categorical_comparison"][cat]["scheme2"].keys())
+                
+                # Add bars for scheme1
+                fig.add_trace(go.Bar(
+                    name=Path(scheme1).stem,
+                    x=list(all_cats),
+                    y=[comparison["categorical_comparison"][cat]["scheme1"].get(c, 0) for c in all_cats]
+                ))
+                
+                # Add bars for scheme2
+                fig.add_trace(go.Bar(
+                    name=Path(scheme2).stem,
+                    x=list(all_cats),
+                    y=[comparison["categorical_comparison"][cat]["scheme2"].get(c, 0) for c in all_cats]
+                ))
+                
+                fig.update_layout(
+                    title=f"{cat} 分布对比",
+                    barmode='group',
+                    showlegend=True
+                )
+                
+                st.plotly_chart(fig, use_container_width=True)
+                
+                # Display detailed comparison
+                st.subheader("详细对比")
+                comparison_data = []
+                
+                for cat_value in all_cats:
+                    count1 = comparison["categorical_comparison"][cat]["scheme1"].get(cat_value, 0)
+                    count2 = comparison["categorical_comparison"][cat]["scheme2"].get(cat_value, 0)
+                    comparison_data.append({
+                        "类别": cat_value,
+                        f"{Path(scheme1).stem}数量": count1,
+                        f"{Path(scheme2).stem}数量": count2,
+                        "数量差异": count2 - count1
+                    })
+                
+                st.dataframe(pd.DataFrame(comparison_data), use_container_width=True)
+    else:
+        st.warning("未找到可对比的类别型指标")
+
+@fragment
+def render_significance(comparison, signatures, filter_key, df1, df2):
+    """Significance tab; bootstrap and alpha controls rerun only this tab"""
+    st.header("显著性检验")
+    
+    test_columns = list(comparison["numeric_comparison"].keys())
+    if test_columns:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            n_resamples = st.select_slider(
+                "Bootstrap 重抽样次数",
+                options=[500, 1000, 2000, 5000, 10000],
+                value=2000
+            )
+        with col2:
+            confidence = st.selectbox("置信水平", [0.90, 0.95, 0.99], index=1)
+        with col3:
+            alpha = st.selectbox("显著性水平 α", [0.01, 0.05, 0.10], index=1)
+        
+        with span("compute", step="significance"):
+            tests = get_significance_table(
+                signatures,
+                filter_key,
+                tuple(test_columns),
+                n_resamples,
+                confidence,
+                df1,
+                df2
+            )
+        
+        significant = (tests["t_pvalue"] < alpha) | (tests["u_pvalue"] < alpha)
+        st.metric("存在显著差异的指标", f"{int(significant.sum())} / {len(tests)}")
+        
+        # Mean difference with bootstrap confidence interval per metric
+        fig = go.Figure(go.Scatter(
+            x=tests["mean_diff"],
+            y=tests.index,
+            mode='markers',
+            marker=dict(color=np.where(significant, "crimson", "gray"), size=9),
+            error_x=dict(
+                type='data',
+                symmetric=False,
+                array=tests["ci_upper"] - tests["mean_diff"],
+                arrayminus=tests["mean_diff"] - tests["ci_lower"]
+            )
+        ))
+        fig.add_vline(x=0, line_dash="dash", line_color="black")
+        fig.update_layout(
+            title=f"均值差 (B - A) 及 {confidence:.0%} Bootstrap 置信区间",
+            xaxis_title="均值差",
+            yaxis_title="指标",
+            height=max(300, 30 * len(tests))
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        table = tests.rename(columns={
+            "mean_diff": "均值差 (B - A)",
+            "t_statistic": "Welch t",
+            "t_dof": "自由度",
+            "t_pvalue": "t 检验 p 值",
+            "u_statistic": "Mann-Whitney U",
+            "u_pvalue": "U 检验 p 值",
+            "ci_lower": "置信区间下限",
+            "ci_upper": "置信区间上限"
+        })
+        table["显著"] = np.where(significant, "是", "否")
+        table.index.name = "指标"
+        st.dataframe(table, use_container_width=True)
+    else:
+        st.warning("未找到可检验的数值型指标")
+
+@fragment
+def render_multi_scheme_comparison(existing_files):
+    """N-way comparison built from stored per-scheme summary vectors; its controls rerun only this section"""
+    file_names = [f.name for f in existing_files]
+    selected_schemes = st.multiselect("选择要对比的方案", file_names, default=file_names)
+    if len(selected_schemes) < 2:
+        st.warning("请至少选择两个方案进行对比")
+        return
+    
+    with span("load", step="scheme_summaries"):
+        summaries = {}
+        for file_name in selected_schemes:
+            summary = get_scheme_summary(file_name)
+            if summary is not None:
+                summaries[Path(file_name).stem] = summary
+    
+    columns = common_numeric_columns(summaries)
+    if len(summaries) < 2 or not columns:
+        st.warning("未找到可对比的数值型指标")
+        return
+    st.caption("多方案对比基于导入时保存的汇总向量（全量数据），不受类别筛选影响")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        metric = st.selectbox("选择对比指标", columns, key="multi_metric")
+    with col2:
+        stat = st.selectbox(
+            "选择统计量",
+            list(SUMMARY_STAT_LABELS),
+            format_func=SUMMARY_STAT_LABELS.get,
+            key="multi_stat"
+        )
+    stat_label = SUMMARY_STAT_LABELS[stat]
+    
+    matrix = summary_matrix(summaries, stat, columns)
+    values = matrix[metric]
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["排名", "差异矩阵", "整体距离", "类别分布"])
+    
+    with tab1, span("render", tab="ranking"):
+        ranking = values.sort_values(ascending=False)
+        fig = go.Figure(go.Bar(x=ranking.index, y=ranking.values))
+        fig.update_layout(
+            title=f"{metric} {stat_label} 排名",
+            xaxis_title="方案",
+            yaxis_title=stat_label
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(
+            pd.DataFrame({
+                "排名": range(1, len(ranking) + 1),
+                "方案": ranking.index,
+                stat_label: ranking.values
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    with tab2, span("render", tab="difference_matrix"):
+        diff = pairwise_difference(values)
+        fig = go.Figure(data=go.Heatmap(
+            z=diff.values,
+            x=diff.columns,
+            y=diff.index,
+            colorscale='RdBu',
+            zmid=0
+        ))
+        fig.update_layout(
+            title=f"{metric} {stat_label} 两两差异（列方案 - 行方案）",
+            xaxis_title="方案",
+            yaxis_title="方案"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with tab3, span("render", tab="distance"):
+        distance = scheme_distance(matrix)
+        fig = go.Figure(data=go.Heatmap(
+            z=distance.values,
+            x=distance.columns,
+            y=distance.index,
+            colorscale='Viridis'
+        ))
+        fig.update_layout(
+            title=f"基于全部指标{stat_label}的方案距离（标准化欧氏距离）",
+            xaxis_title="方案",
+            yaxis_title="方案"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        st.subheader(f"各方案{stat_label}汇总")
+        st.dataframe(matrix, use_container_width=True)
+    
+    with tab4, span("render", tab="categories"):
+        categorical_columns = sorted({col for summary in summaries.values() for col in summary["categorical"]})
+        if categorical_columns:
+            category = st.selectbox("选择类别指标", categorical_columns, key="multi_category")
+            counts = category_count_matrix(summaries, category)
+            fig = go.Figure()
+            for value in counts.columns:
+                fig.add_trace(go.Bar(name=str(value), x=counts.index, y=counts[value]))
+            fig.update_layout(
+                title=f"{category} 分布对比",
+                barmode='stack',
+                showlegend=True
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(counts, use_container_width=True)
+        else:
+            st.warning("未找到可对比的类别型指标")
 
 # Get uploaded files
-UPLOAD_DIR = Path(__file__).parent.parent / "data" / "uploaded_excel"
-existing_files = list(UPLOAD_DIR.glob("*.xlsx")) + list(UPLOAD_DIR.glob("*.xls"))
+existing_files = list_workbooks(UPLOAD_DIR)
 
 if not existing_files:
     st.warning("请先在数据配置页面上传文件")
 else:
+    comparison_mode = st.radio("对比模式", ["两方案对比", "多方案对比"], horizontal=True)
+    if comparison_mode == "多方案对比":
+        render_multi_scheme_comparison(existing_files)
+        end_page()
+        st.stop()
+    
     # File selection
     col1, col2 = st.columns(2)
     
@@ -143,153 +533,51 @@ else:
         )
     
     if scheme1 and scheme2:
+        show_precompute_progress(scheme1)
+        show_precompute_progress(scheme2)
         # Load files and features
         df1 = load_excel_file(UPLOAD_DIR / scheme1)
         df2 = load_excel_file(UPLOAD_DIR / scheme2)
         
         if df1 is not None and df2 is not None:
+            set_dataset(*df1.shape)
+            set_dataset(*df2.shape)
+            show_fallbacks()
             features1 = load_data_features(scheme1)
             features2 = load_data_features(scheme2)
             
             if features1 and features2:
+                # Cache keys follow the rows actually loaded (files may be truncated to the memory budget)
+                signatures = (
+                    loaded_signature(file_signature(UPLOAD_DIR / scheme1), df1),
+                    loaded_signature(file_signature(UPLOAD_DIR / scheme2), df2)
+                )
+                
+                # Shared category filter applied to both schemes
+                with span("profile", step="filter"):
+                    filtered = filter_datasets({
+                        scheme1: (signatures[0], df1, features1["categorical_columns"]),
+                        scheme2: (signatures[1], df2, features2["categorical_columns"])
+                    })
+                df1, df2 = filtered[scheme1], filtered[scheme2]
+                if warn_empty(filtered):
+                    end_page()
+                    st.stop()
+                
                 # Compare schemes
-                comparison = compare_schemes(df1, df2, features1, features2)
+                with span("compute", step="compare_schemes"):
+                    comparison = compare_schemes(df1, df2, features1, features2)
                 
                 # Create tabs for different comparison types
-                tab1, tab2, tab3 = st.tabs(["数值对比", "类别对比", "相关性对比"])
+                tab1, tab2, tab3, tab4, tab5 = st.tabs(["数值对比", "类别对比", "相关性对比", "统计检验", "行级差异"])
                 
-                with tab1:
-                    st.header("数值指标对比")
-                    
-                    if comparison["numeric_comparison"]:
-                        # Select metrics to compare
-                        selected_metrics = st.multiselect(
-                            "选择要对比的指标",
-                            list(comparison["numeric_comparison"].keys()),
-                            default=list(comparison["numeric_comparison"].keys())[:3] if len(comparison["numeric_comparison"]) >= 3 else list(comparison["numeric_comparison"].keys())
-                        )
-                        
-                        if selected_metrics:
-                            # Create comparison plot
-                            fig = go.Figure()
-                            
-                            for metric in selected_metrics:
-                                comp = comparison["numeric_comparison"][metric]
-                                
-                                # Add bars for scheme1
-                                fig.add_trace(go.Bar(
-                                    name=f"{Path(scheme1).stem} - {metric}",
-                                    x=[metric],
-                                    y=[comp["scheme1"]["mean"]],
-                                    error_y=dict(
-                                        type='data',
-                                        array=[comp["scheme1"]["std"]],
-                                        visible=True
-                                    )
-                                ))
-                                
-                                # Add bars for scheme2
-                                fig.add_trace(go.Bar(
-                                    name=f"{Path(scheme2).stem} - {metric}",
-                                    x=[metric],
-                                    y=[comp["scheme2"]["mean"]],
-                                    error_y=dict(
-                                        type='data',
-                                        array=[comp["scheme2"]["std"]],
-                                        visible=True
-                                    )
-                                ))
-                            
-                            fig.update_layout(
-                                title="指标均值对比",
-                                barmode='group',
-                                showlegend=True
-                            )
-                            
-                            st.plotly_chart(fig, use_container_width=True)
-                            
-                            # Display detailed comparison
-                            st.subheader("详细对比")
-                            comparison_data = []
-                            
-                            for metric in selected_metrics:
-                                comp = comparison["numeric_comparison"][metric]
-                                comparison_data.append({
-                                    "指标": metric,
-                                    f"{Path(scheme1).stem}均值": f"{comp['scheme1']['mean']:.2f}",
-                                    f"{Path(scheme1).stem}标准差": f"{comp['scheme1']['std']:.2f}",
-                                    f"{Path(scheme2).stem}均值": f"{comp['scheme2']['mean']:.2f}",
-                                    f"{Path(scheme2).stem}标准差": f"{comp['scheme2']['std']:.2f}",
-                                    "均值差异": f"{comp['difference']['mean_diff']:.2f}",
-                                    "标准差差异": f"{comp['difference']['std_diff']:.2f}"
-                                })
-                            
-                            st.dataframe(pd.DataFrame(comparison_data), use_container_width=True)
-                    else:
-                        st.warning("未找到可对比的数值型指标")
+                with tab1, span("render", tab="numeric"):
+                    render_numeric_comparison(scheme1, scheme2, comparison)
                 
-                with tab2:
-                    st.header("类别指标对比")
-                    
-                    if comparison["categorical_comparison"]:
-                        # Select categorical columns to compare
-                        selected_cats = st.multiselect(
-                            "选择要对比的类别指标",
-                            list(comparison["categorical_comparison"].keys()),
-                            default=list(comparison["categorical_comparison"].keys())[:2] if len(comparison["categorical_comparison"]) >= 2 else list(comparison["categorical_comparison"].keys())
-                        )
-                        
-                        if selected_cats:
-                            for cat in selected_cats:
-                                st.subheader(f"{cat} 分布对比")
-                                
-                                # Create comparison plot
-                                fig = go.Figure()
-                                
-                                # Get all unique categories
-                                all_cats = set(comparison["categorical_comparison"][cat]["scheme1"].keys()) | set(comparison["categorical_comparison"][cat]["scheme2"].keys())
-                                
-                                # Add bars for scheme1
-                                fig.add_trace(go.Bar(
-                                    name=Path(scheme1).stem,
-                                    x=list(all_cats),
-                                    y=[comparison["categorical_comparison"][cat]["scheme1"].get(c, 0) for c in all_cats]
-                                ))
-                                
-                                # Add bars for scheme2
-                                fig.add_trace(go.Bar(
-                                    name=Path(scheme2).stem,
-                                    x=list(all_cats),
-                                    y=[comparison["categorical_comparison"][cat]["scheme2"].get(c, 0) for c in all_cats]
-                                ))
-                                
-                                fig.update_layout(
-                                    title=f"{cat} 分布对比",
-                                    barmode='group',
-                                    showlegend=True
-                                )
-                                
-                                st.plotly_chart(fig, use_container_width=True)
-                                
-                                # Display detailed comparison
-                                st.subheader("详细对比")
-                                comparison_data = []
-                                
-                                for cat_value in all_cats:
-                                    count1 = comparison["categorical_comparison"][cat]["scheme1"].get(cat_value, 0)
-                                    count2 = comparison["categorical_comparison"][cat]["scheme2"].get(cat_value, 0)
-                                    comparison_data.append({
-                                        "类别": cat_value,
-                                        f"{Path(scheme1).stem}数量": count1,
-                                        f"{Path(scheme2).stem}数量": count2,
-                                        "数量差异": count2 - count1
-                                    })
-                                
-                                st.dataframe(pd.DataFrame(comparison_data), use_container_width=True)
-                    else:
-                        st.warning("未找到可对比的类别型指标")
+                with tab2, span("render", tab="categorical"):
+                    render_categorical_comparison(scheme1, scheme2, comparison)
                 
-                with tab3:
+                with tab3, span("render", tab="correlation"):
                     st.header("相关性对比")
                     
                     if comparison["correlation_comparison"]:
@@ -320,7 +608,16 @@ else:
                         st.dataframe(corr_diff, use_container_width=True)
                     else:
                         st.warning("未找到可对比的相关性数据")
+                
+                with tab4, span("render", tab="significance"):
+                    render_significance(comparison, signatures, current_filter_key(), df1, df2)
+                
+                with tab5, span("render", tab="row_diff"):
+                    st.header("行级差异")
+                    render_row_diff(scheme1, scheme2, df1, df2, features1, signatures)
             else:
                 st.error("无法加载数据特征配置，请确保特征配置文件存在且格式正确")
         else:
-            st.error("无法加载文件，请确保文件存在且格式正确") 
\ No newline at end of file
+            st.error("无法加载文件，请确保文件存在且格式正确")
+
+end_page()
@@ -1,12 +1,26 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from pathlib import Path
 import json
 import numpy as np
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
+from utils.comparison import correlation_matrix
+from utils.compute_pool import compute
+from utils.correlation_network import DEFAULT_THRESHOLD, correlation_network_figure
+from utils.data_loader import file_signature, list_workbooks, load_dataset, loaded_signature
+from utils.figure_cache import cached_figures
+from utils.filter_sidebar import current_filter_key, filter_datasets, warn_empty
+from utils.fragments import fragment
+from utils.memory import notify_fallback, show_fallbacks
+from utils.parallel_coords import (
+    DEFAULT_CLUSTERS,
+    PARALLEL_MODES,
+    cluster_rows,
+    parallel_coordinates_figure,
+    resolve_mode
+)
+from utils.paths import FEATURES_DIR, UPLOAD_DIR
+from utils.pca import fit_pca
+from utils.precompute import show_precompute_progress
+from utils.timing import begin_page, end_page, set_dataset, span
+from utils.visualizer import pca_figures, scatter_matrix_figure
 
 # Page config
 st.set_page_config(
@@ -14,14 +28,11 @@ st.set_page_config(
     page_icon="🎨",
     layout="wide"
 )
+begin_page("advanced_visualization")
 
 # Title
 st.title("🎨 高级可视化分析")
 
-# Load data features
-FEATURES_DIR = Path(__file__).parent.parent / "data" / "features"
-UPLOAD_DIR = Path(__file__).parent.parent / "data" / "uploaded_excel"
-
 def load_data_features(file_name):
     """Load data features from JSON file"""
     features_file = FEATURES_DIR / f"{file_name}.json"
@@ -30,123 +41,136 @@ def load_data_features(file_name):
             return json.load(f)
     return None
 
-def create_advanced_visualizations(df, features):
-    """Create advanced visualizations based on data features"""
-    visualizations = {}
+def get_pca(signature, filter_key, columns, n_components, df):
+    """PCA per (dataset, filter, columns, n_components), computed in the shared pool and reused across reruns"""
+    # stage/size: budget-checked here before offloading, worker memory recorded in this run
+    return compute(
+        ("pca", signature, filter_key, columns, n_components),
+        fit_pca, df, list(columns), n_components,
+        label="正在计算主成分",
+        stage="pca",
+        size=(len(df), len(columns))
+    )
+
+def get_correlation(signature, filter_key, columns, df):
+    """Correlation matrix per (dataset, filter, columns), computed in the shared pool"""
+    return compute(
+        ("correlation", signature, filter_key, columns),
+        correlation_matrix, df, list(columns),
+        label="正在计算相关系数"
+    )
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_correlation_network(signature, filter_key, columns, threshold, _corr):
+    """Network figure (including its layout) cached per threshold"""
+    return correlation_network_figure(_corr.to_numpy(), list(columns), threshold)
+
+def get_clusters(signature, filter_key, columns, n_clusters, df):
+    """Mini-batch k-means clusters per (dataset, filter, columns, k), computed in the shared pool"""
+    return compute(
+        ("clusters", signature, filter_key, columns, n_clusters),
+        cluster_rows, df, list(columns), n_clusters,
+        label="正在聚类"
+    )
+
+def render_pca(dataset, numeric_columns, df):
+    """PCA projections and explained variance"""
+    if len(numeric_columns) < 2:
+        return
+    signature, filter_key = dataset
+    n_components = min(3, len(numeric_columns))
     
-    # PCA Analysis
-    if len(features["numeric_columns"]) > 1:
-        # Prepare data
-        numeric_data = df[features["numeric_columns"]].dropna()
-        scaler = StandardScaler()
-        scaled_data = scaler.fit_transform(numeric_data)
-        
-        # Perform PCA
-        pca = PCA(n_components=min(3, len(features["numeric_columns"])))
-        pca_result = pca.fit_transform(scaled_data)
-        
-        # Create 2D PCA plot
-        fig_2d = px.scatter(
-            x=pca_result[:, 0],
-            y=pca_result[:, 1],
-            title="PCA 2D 投影",
-            labels={'x': '主成分1', 'y': '主成分2'}
-        )
-        visualizations["pca_2d"] = fig_2d
-        
-        # Create 3D PCA plot if possible
-        if pca_result.shape[1] > 2:
-            fig_3d = px.scatter_3d(
-                x=pca_result[:, 0],
-                y=pca_result[:, 1],
-                z=pca_result[:, 2],
-                title="PCA 3D 投影",
-                labels={'x': '主成分1', 'y': '主成分2', 'z': '主成分3'}
-            )
-            visualizations["pca_3d"] = fig_3d
-        
-        # Create explained variance plot
-        explained_variance = pca.explained_variance_ratio_
-        fig_variance = go.Figure()
-        fig_variance.add_trace(go.Bar(
-            x=[f"PC{i+1}" for i in range(len(explained_variance))],
-            y=explained_variance,
-            text=[f"{v:.1%}" for v in explained_variance],
-            textposition="auto",
-        ))
-        fig_variance.update_layout(
-            title="主成分解释方差比例",
-            xaxis_title="主成分",
-            yaxis_title="解释方差比例"
-        )
-        visualizations["pca_variance"] = fig_variance
+    def build_pca():
+        with span("compute", step="pca"):
+            pca = get_pca(signature, filter_key, numeric_columns, n_components, df)
+        if pca["fallback"]:
+            notify_fallback("pca", pca["fallback"])
+        info = {
+            "n_samples": pca["n_samples"],
+            "n_projected": len(pca["projection"]),
+            "density": pca["density"] is not None
+        }
+        return pca_figures(pca), info
     
-    # Correlation Network
-    if len(features["numeric_columns"]) > 1:
-        corr_matrix = df[features["numeric_columns"]].corr()
-        threshold = 0.5  # Only show correlations above threshold
-        
-        # Create network graph
-        fig_network = go.Figure()
-        
-        # Add edges
-        for i in range(len(corr_matrix.columns)):
-            for j in range(i+1, len(corr_matrix.columns)):
-                corr = corr_matrix.iloc[i, j]
-                if abs(corr) > threshold:
-                    fig_network.add_trace(go.Scatter(
-                        x=[i, j],
-                        y=[0, 0],
-                        mode='lines',
-                        line=dict(
-                            width=abs(corr) * 5,
-                            color='red' if corr < 0 else 'blue'
-                        ),
-                        hoverinfo='text',
-                        text=f"相关系数: {corr:.2f}"
-                    ))
-        
-        # Add nodes
-        fig_network.add_trace(go.Scatter(
-            x=list(range(len(corr_matrix.columns))),
-            y=[0] * len(corr_matrix.columns),
-            mode='markers+text',
-            marker=dict(size=20),
-            text=corr_matrix.columns,
-            textposition="top center"
-        ))
-        
-        fig_network.update_layout(
-            title="相关性网络图",
-            showlegend=False,
-            xaxis=dict(showticklabels=False),
-            yaxis=dict(showticklabels=False)
-        )
-        visualizations["correlation_network"] = fig_network
+    figures, pca_info = cached_figures(dataset, "pca", [numeric_columns, n_components], build_pca)
+    show_fallbacks()
+    if pca_info["density"]:
+        st.caption(f"数据共 {pca_info['n_samples']} 行，投影图以密度方式显示全部行")
+    elif pca_info["n_projected"] < pca_info["n_samples"]:
+        st.caption(f"投影图抽样显示 {pca_info['n_projected']} / {pca_info['n_samples']} 行；主成分与解释方差基于全部数据计算")
+    for name in ("pca_2d", "pca_3d", "pca_variance"):
+        if name in figures:
+            st.plotly_chart(figures[name], use_container_width=True)
+
+@fragment
+def render_correlation_network(dataset, numeric_columns, df):
+    """Correlation network tab; the threshold slider reruns only this tab"""
+    network_threshold = st.slider(
+        "相关系数阈值 |r|",
+        min_value=0.0,
+        max_value=0.95,
+        value=DEFAULT_THRESHOLD,
+        step=0.05,
+        key="network_threshold"
+    )
+    if len(numeric_columns) < 2:
+        return
+    signature, filter_key = dataset
     
-    # Scatter Matrix
-    if len(features["numeric_columns"]) > 1:
-        fig_matrix = px.scatter_matrix(
-            df,
-            dimensions=features["numeric_columns"][:5],  # Limit to 5 dimensions for clarity
-            title="散点矩阵图"
-        )
-        visualizations["scatter_matrix"] = fig_matrix
+    def build_network():
+        with span("compute", step="correlation_network"):
+            corr = get_correlation(signature, filter_key, numeric_columns, df)
+            network = get_correlation_network(signature, filter_key, numeric_columns, network_threshold, corr)
+        return {"correlation_network": network}, {}
     
-    # Parallel Coordinates
-    if len(features["numeric_columns"]) > 1:
-        fig_parallel = px.parallel_coordinates(
-            df,
-            dimensions=features["numeric_columns"][:5],  # Limit to 5 dimensions for clarity
-            title="平行坐标图"
+    figures, _ = cached_figures(dataset, "correlation_network", [numeric_columns, network_threshold], build_network)
+    st.plotly_chart(figures["correlation_network"], use_container_width=True)
+
+@fragment
+def render_parallel_coordinates(dataset, numeric_columns, df):
+    """Parallel coordinates tab; dimension, mode and cluster controls rerun only this tab"""
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        parallel_dimensions = st.multiselect(
+            "选择维度",
+            list(numeric_columns),
+            default=list(numeric_columns[:5]),
+            key="parallel_dimensions"
+        )
+    with col2:
+        parallel_mode = st.selectbox(
+            "渲染方式",
+            list(PARALLEL_MODES),
+            format_func=PARALLEL_MODES.get,
+            key="parallel_mode"
         )
-        visualizations["parallel_coordinates"] = fig_parallel
+    with col3:
+        n_clusters = st.slider("簇数量", 2, 20, DEFAULT_CLUSTERS, key="parallel_clusters")
+    if len(parallel_dimensions) < 2:
+        st.info("请至少选择两个维度")
+        return
+    signature, filter_key = dataset
+    parallel_mode = resolve_mode(parallel_mode, len(df))
+    
+    def build_parallel():
+        clusters = None
+        if parallel_mode != "all":
+            with span("compute", step="clusters"):
+                clusters = get_clusters(signature, filter_key, tuple(parallel_dimensions), n_clusters, df)
+        figure = parallel_coordinates_figure(df, parallel_dimensions, parallel_mode, clusters, n_clusters=n_clusters)
+        return {"parallel_coordinates": figure}, {}
     
-    return visualizations
+    figures, _ = cached_figures(
+        dataset,
+        "parallel_coordinates",
+        [parallel_dimensions, parallel_mode, n_clusters],
+        build_parallel
+    )
+    st.plotly_chart(figures["parallel_coordinates"], use_container_width=True)
 
 # File selection
 st.header("选择要分析的文件")
-existing_files = list(UPLOAD_DIR.glob("*.xlsx")) + list(UPLOAD_DIR.glob("*.xls"))
+existing_files = list_workbooks(UPLOAD_DIR)
 
 if not existing_files:
     st.info("请先在数据配置页面上传文件")
@@ -157,45 +181,62 @@ else:
     )
     
     if selected_file:
+        show_precompute_progress(selected_file)
         try:
             # Load Excel file
-            df = pd.read_excel(UPLOAD_DIR / selected_file)
+            with span("load", file=selected_file):
+                df = load_dataset(UPLOAD_DIR / selected_file)
+            set_dataset(*df.shape)
+            show_fallbacks()
             
             # Load data features
             features = load_data_features(selected_file)
             
             if features:
-                # Create visualizations
-                visualizations = create_advanced_visualizations(df, features)
-                
-                # Display visualizations
-                st.header("高级可视化分析结果")
+                # Shared category filter; all visualizations use the same row selection
+                # Truncated loads get their own key so their figures never stand in for the full data
+                signature = loaded_signature(file_signature(UPLOAD_DIR / selected_file), df)
+                categorical_columns = [c for c in features["categorical_columns"] if c in df.columns]
+                with span("profile", step="filter"):
+                    df = filter_datasets({selected_file: (signature, df, categorical_columns)})[selected_file]
+                if warn_empty({selected_file: df}):
+                    end_page()
+                    st.stop()
                 
                 # Create tabs for different visualization types
+                st.header("高级可视化分析结果")
                 tab1, tab2, tab3, tab4 = st.tabs(["PCA分析", "相关性网络", "散点矩阵", "平行坐标"])
                 
-                with tab1:
-                    if "pca_2d" in visualizations:
-                        st.plotly_chart(visualizations["pca_2d"], use_container_width=True)
-                    if "pca_3d" in visualizations:
-                        st.plotly_chart(visualizations["pca_3d"], use_container_width=True)
-                    if "pca_variance" in visualizations:
-                        st.plotly_chart(visualizations["pca_variance"], use_container_width=True)
+                # Each chart group is served from the shared figure cache and only computed
+                # (PCA, correlations, clusters) on a miss
+                dataset = (signature, current_filter_key())
+                numeric_columns = tuple(features["numeric_columns"])
+                
+                with tab1, span("render", tab="pca"):
+                    render_pca(dataset, numeric_columns, df)
                 
-                with tab2:
-                    if "correlation_network" in visualizations:
-                        st.plotly_chart(visualizations["correlation_network"], use_container_width=True)
+                with tab2, span("render", tab="correlation_network"):
+                    render_correlation_network(dataset, numeric_columns, df)
                 
-                with tab3:
-                    if "scatter_matrix" in visualizations:
-                        st.plotly_chart(visualizations["scatter_matrix"], use_container_width=True)
+                with tab3, span("render", tab="scatter_matrix"):
+                    if len(numeric_columns) > 1:
+                        matrix_dimensions = list(numeric_columns[:5])  # Limit to 5 dimensions for clarity
+                        figures, _ = cached_figures(
+                            dataset,
+                            "scatter_matrix",
+                            matrix_dimensions,
+                            lambda: ({"scatter_matrix": scatter_matrix_figure(df, matrix_dimensions)}, {})
+                        )
+                        show_fallbacks()
+                        st.plotly_chart(figures["scatter_matrix"], use_container_width=True)
                 
-                with tab4:
-                    if "parallel_coordinates" in visualizations:
-                        st.plotly_chart(visualizations["parallel_coordinates"], use_container_width=True)
+                with tab4, span("render", tab="parallel_coordinates"):
+                    render_parallel_coordinates(dataset, numeric_columns, df)
             
             else:
                 st.warning("未找到数据特征信息，请先在数据配置页面分析数据")
             
         except Exception as e:
-            st.error(f"处理数据时出错: {str(e)}") 
\ No newline at end of file
+            st.error(f"处理数据时出错: {str(e)}")
+
+end_page()
@@ -0,0 +1,111 @@
+import streamlit as st
+import math
+import time
+from utils.fragments import fragment
+from utils.memory import show_fallbacks
+from utils.sql_engine import (
+    PAGE_SIZES,
+    count_rows,
+    dataset_tables,
+    engine_name,
+    fetch_all,
+    fetch_page,
+    save_query_result,
+    sql_threads,
+    table_columns
+)
+from utils.timing import begin_page, end_page, span
+
+# Page config
+st.set_page_config(
+    page_title="SQL 查询",
+    page_icon="🔎",
+    layout="wide"
+)
+begin_page("sql_query")
+
+# Title
+st.title("🔎 SQL 查询")
+
+@fragment
+def render_table_schema(tables):
+    """Column list of one table; only the selected table gets a columnar copy"""
+    table = st.selectbox("查看表结构", list(tables.keys()), key="sql_schema_table")
+    try:
+        columns = table_columns(tables[table])
+        st.dataframe(
+            {"列名": [name for name, _ in columns], "类型": [dtype for _, dtype in columns]},
+            use_container_width=True
+        )
+    except Exception as e:
+        st.error(f"读取表结构时出错: {str(e)}")
+
+@fragment
+def render_results(sql, tables, page_size):
+    """Paginated result grid; paging and saving rerun only this section"""
+    try:
+        total = count_rows(sql, tables)
+    except Exception as e:
+        st.error(f"查询出错: {str(e)}")
+        show_fallbacks()
+        return
+
+    n_pages = max(1, math.ceil(total / page_size))
+    if st.session_state.get("sql_page", 1) > n_pages:
+        st.session_state.sql_page = n_pages
+    page = st.number_input("页码", min_value=1, max_value=n_pages, step=1, key="sql_page")
+
+    start = time.perf_counter()
+    with span("render", step="page"):
+        rows = fetch_page(sql, tables, page, page_size)
+    show_fallbacks()
+    st.dataframe(rows, use_container_width=True)
+    st.caption(f"共 {total} 行，第 {page}/{n_pages} 页（本页查询用时 {time.perf_counter() - start:.2f} 秒）")
+
+    # Save the result as a dataset usable by the other pages
+    st.subheader("保存为数据集")
+    name = st.text_input("数据集名称", value="查询结果", key="sql_save_name")
+    if st.button("保存为数据集"):
+        try:
+            with st.spinner("正在保存..."):
+                file_path = save_query_result(fetch_all(sql, tables), name)
+            st.success(f"已保存为 {file_path.name}，可在其他页面中选择该文件进行分析")
+        except Exception as e:
+            st.error(f"保存时出错: {str(e)}")
+
+tables = dataset_tables()
+if not tables:
+    st.info("请先在数据配置页面上传文件")
+else:
+    # Engine information
+    if engine_name() == "duckdb":
+        st.caption(f"查询引擎: DuckDB（{sql_threads()} 个线程），直接查询工作簿的列式副本")
+    else:
+        st.info("未安装 duckdb，查询用到的表将整表读入 SQLite 内存数据库执行。安装 duckdb 后可直接查询列式副本，速度更快。")
+
+    # Available tables
+    with st.expander("可用的表", expanded=False):
+        st.markdown("\n".join(f'- `"{name}"`（{path.name}）' for name, path in tables.items()))
+        render_table_schema(tables)
+
+    # Query editor
+    first_table = next(iter(tables))
+    with st.form("sql_form"):
+        sql = st.text_area(
+            "SQL（只支持 SELECT 查询，表名为去掉扩展名的文件名）",
+            value=st.session_state.get("sql_query", f'SELECT * FROM "{first_table}"'),
+            height=160
+        )
+        page_size = st.selectbox("每页行数", PAGE_SIZES, key="sql_page_size")
+        submitted = st.form_submit_button("执行查询")
+
+    if submitted:
+        st.session_state.sql_query = sql
+        st.session_state.sql_page = 1
+
+    # Query results
+    if "sql_query" in st.session_state:
+        st.header("查询结果")
+        render_results(st.session_state.sql_query, tables, page_size)
+
+end_page()
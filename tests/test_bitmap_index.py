@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bitmap_index import BitmapIndex
+
+
+@pytest.fixture
+def df():
+    """稀疏与稠密取值混合的类别列，含缺失值"""
+    rng = np.random.default_rng(0)
+    n = 5000
+    data = pd.DataFrame({
+        # "rare" 只占约 1%，按行号数组存储；其余按位图存储
+        "region": rng.choice(["north", "south", "rare"], n, p=[0.6, 0.39, 0.01]),
+        "year": rng.integers(2020, 2023, n),
+        "scenario": rng.choice(["plan", "actual"], n),
+    })
+    data.loc[rng.random(n) < 0.03, "scenario"] = None
+    return data
+
+
+def mask(df, conditions, mode):
+    """pandas 参考结果：isin 掩码按 AND/OR 组合"""
+    data = df.fillna({"scenario": "未知"})
+    masks = [data[col].isin(values) for col, values in conditions.items() if values]
+    combined = masks[0]
+    for m in masks[1:]:
+        combined = combined & m if mode == "and" else combined | m
+    return np.flatnonzero(combined.to_numpy())
+
+
+@pytest.mark.parametrize("conditions, mode", [
+    ({"region": ["rare"]}, "and"),
+    ({"region": ["north", "rare"], "year": [2021]}, "and"),
+    ({"region": ["rare"], "scenario": ["plan"]}, "or"),
+    ({"scenario": ["未知"]}, "and"),
+    ({"region": ["south"], "year": [2020, 2022], "scenario": ["actual", "未知"]}, "and"),
+])
+def test_select_matches_isin(df, conditions, mode):
+    index = BitmapIndex.build(df, ["region", "year", "scenario"])
+    bitmap = index.select(conditions, mode)
+    expected = mask(df, conditions, mode)
+    np.testing.assert_array_equal(index.rows(bitmap), expected)
+    assert index.count(bitmap) == len(expected)
+
+
+def test_without_conditions_returns_none(df):
+    index = BitmapIndex.build(df, ["region"])
+    assert index.select({}) is None
+    # 索引中不存在的列（其他页面的条件）被忽略
+    assert index.select({"other": ["x"]}) is None
+
+
+def test_unknown_value_selects_no_rows(df):
+    index = BitmapIndex.build(df, ["region"])
+    assert index.rows(index.select({"region": ["west"]})).size == 0
+
+
+def test_values_include_missing_label(df):
+    index = BitmapIndex.build(df, ["scenario"])
+    assert sorted(index.values("scenario")) == ["actual", "plan", "未知"]
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.comparison import COMPARE_STATS, describe_columns
+
+
+def frame(n, missing):
+    rng = np.random.default_rng(n)
+    df = pd.DataFrame({
+        "a": rng.normal(10, 2, n),
+        "b": rng.integers(0, 100, n),
+        "c": rng.exponential(3, n),
+    })
+    if missing:
+        df.loc[df.index[::7], "a"] = np.nan
+        df["c"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("n, missing", [(1000, False), (1000, True), (1, False), (0, False)])
+def test_describe_columns_matches_agg(n, missing):
+    df = frame(n, missing)
+    columns = ["a", "b", "c"]
+    expected = df[columns].agg(list(COMPARE_STATS)).astype("float64")
+    pd.testing.assert_frame_equal(describe_columns(df, columns), expected, check_exact=False, rtol=1e-12)
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import correlation_network
+from utils.correlation_network import correlation_edges, correlation_network_figure, network_layout
+
+
+def correlation(n_columns, n_factors=3, noise=1.0, seed=0):
+    """由少数潜在因子生成的相关矩阵"""
+    rng = np.random.default_rng(seed)
+    data = rng.normal(size=(500, n_factors)) @ rng.normal(size=(n_factors, n_columns))
+    data += rng.normal(scale=noise, size=data.shape)
+    return pd.DataFrame(data, columns=[f"c{i}" for i in range(n_columns)]).corr()
+
+
+def test_edges_match_pairwise_reference():
+    corr = correlation(40)
+    expected = [
+        (i, j, corr.iloc[i, j])
+        for i in range(len(corr)) for j in range(i + 1, len(corr))
+        if abs(corr.iloc[i, j]) > 0.5
+    ]
+    sources, targets, weights = correlation_edges(corr.to_numpy(), 0.5)
+    assert list(zip(sources, targets)) == [(i, j) for i, j, _ in expected]
+    np.testing.assert_allclose(weights, [w for _, _, w in expected])
+
+
+def test_figure_draws_all_edges_in_one_trace():
+    corr = correlation(30)
+    sources, _, weights = correlation_edges(corr.to_numpy())
+    fig = correlation_network_figure(corr.to_numpy(), list(corr.columns))
+    edges, nodes = fig.data
+    assert edges.type == nodes.type == "scattergl"
+    assert len(edges.x) == 3 * len(sources)
+    assert all(x is None for x in edges.x[2::3])
+
+    # The hover of the first node lists its strongest edge first
+    partners = np.abs(corr.iloc[0, 1:])
+    strongest = partners[partners > 0.5].idxmax()
+    assert nodes.hovertext[0].split("<br>")[2].startswith(f"{strongest}:")
+
+
+@pytest.mark.parametrize("n_columns", [50, 250])
+def test_layout_is_finite_and_spread(n_columns):
+    corr = correlation(n_columns).to_numpy()
+    positions = network_layout(n_columns, *correlation_edges(corr))
+    assert positions.shape == (n_columns, 2)
+    assert np.isfinite(positions).all()
+    assert np.abs(positions).max() == pytest.approx(1.0)
+    assert len(np.unique(positions.round(6), axis=0)) == n_columns
+
+
+def test_sparse_spectral_positions_span_dense_eigenvectors(monkeypatch):
+    corr = correlation(120, noise=0.3).to_numpy()
+    sources, targets, weights = correlation_edges(corr, 0.3)
+    strength = np.abs(weights)
+    dense = correlation_network._spectral_positions(120, sources, targets, strength, np.random.default_rng(0))
+    monkeypatch.setattr(correlation_network, "DENSE_LAYOUT_MAX_NODES", 10)
+    sparse = correlation_network._spectral_positions(120, sources, targets, strength, np.random.default_rng(0))
+    # Same two-dimensional eigenspace, up to rotation within it
+    q_dense, _ = np.linalg.qr(dense)
+    q_sparse, _ = np.linalg.qr(sparse)
+    np.testing.assert_allclose(np.linalg.svd(q_dense.T @ q_sparse, compute_uv=False), 1.0, atol=1e-3)
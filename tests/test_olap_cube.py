@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.olap_cube import OLAPCube, lattice_up_to
+
+
+@pytest.fixture
+def df():
+    """三个维度（含缺失值）、两个度量的随机数据"""
+    rng = np.random.default_rng(0)
+    n = 2000
+    data = pd.DataFrame({
+        "account": rng.choice(["cash", "debt", "equity"], n),
+        "unit": rng.choice(["north", "south", "east", "west"], n),
+        "year": rng.integers(2020, 2024, n),
+        "revenue": rng.normal(100, 20, n),
+        "cost": rng.normal(50, 10, n),
+    })
+    data.loc[rng.random(n) < 0.05, "cost"] = np.nan
+    data.loc[rng.random(n) < 0.02, "unit"] = None
+    return data
+
+
+DIMENSIONS = ["account", "unit", "year"]
+MEASURES = ["revenue", "cost"]
+
+
+def reference(df, group_by, filters=None):
+    """pandas 参考结果：过滤后按 group_by 分组聚合"""
+    data = df.assign(unit=df["unit"].fillna("未知"))
+    for dim, values in (filters or {}).items():
+        data = data[data[dim].isin(values if isinstance(values, list) else [values])]
+    stats = ["sum", "count", "mean", "min", "max"]
+    if not group_by:
+        return pd.concat({m: data[m].agg(stats) for m in MEASURES})
+    return data.groupby(group_by)[MEASURES].agg(stats)
+
+
+def assert_matches(result, expected):
+    columns = [(m, stat) for m in MEASURES for stat in ["sum", "count", "mean", "min", "max"]]
+    if isinstance(result, pd.Series):
+        np.testing.assert_allclose(result[columns].to_numpy(float), expected[columns].to_numpy(float))
+    else:
+        actual = result[columns].sort_index()
+        np.testing.assert_allclose(actual.to_numpy(float), expected[columns].to_numpy(float))
+        assert list(actual.index) == list(expected.index)
+
+
+@pytest.mark.parametrize("group_by, filters", [
+    ([], None),
+    (["account"], None),
+    (["unit", "year"], None),
+    (["account"], {"year": [2021, 2022]}),
+    ([], {"account": "cash", "unit": "north", "year": 2020}),
+    (["year"], {"unit": "未知"}),
+])
+def test_query_matches_groupby(df, group_by, filters):
+    cube = OLAPCube.build(df, DIMENSIONS, MEASURES)
+    assert_matches(cube.query(filters, group_by), reference(df, group_by, filters))
+
+
+def test_partial_lattice_answers_from_base_cuboid(df):
+    cube = OLAPCube.build(df, DIMENSIONS, MEASURES, lattice_up_to(DIMENSIONS, 1))
+    assert_matches(cube.query(group_by=["account", "year"]), reference(df, ["account", "year"]))
+
+
+def test_append_equals_full_build(df):
+    full = OLAPCube.build(df, DIMENSIONS, MEASURES)
+    incremental = OLAPCube.build(df.iloc[:1200], DIMENSIONS, MEASURES).append(df.iloc[1200:])
+    assert incremental.row_count == full.row_count
+    assert incremental.row_digest == full.row_digest
+    for combo in full.cuboids:
+        pd.testing.assert_frame_equal(incremental.cuboids[combo], full.cuboids[combo])
+
+
+def test_extends_only_when_prefix_matches(df):
+    cube = OLAPCube.build(df.iloc[:1200], DIMENSIONS, MEASURES)
+    assert cube.extends(df)
+    assert not cube.extends(df.iloc[:1000])
+    changed = df.copy()
+    changed.loc[5, "revenue"] += 1
+    assert not cube.extends(changed)
+
+
+def test_query_for_absent_value_is_empty():
+    cube = OLAPCube.build(pd.DataFrame({"d": ["a", "b"], "m": [1.0, 2.0]}), ["d"], ["m"])
+    result = cube.query({"d": "c"})
+    assert result[("m", "count")] == 0
+    assert np.isnan(result[("m", "min")])
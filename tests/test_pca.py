@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+from utils import pca as pca_module
+from utils.pca import fit_pca
+
+
+@pytest.fixture
+def df():
+    """五个相关的数值列，含缺失值与一个常数列"""
+    rng = np.random.default_rng(0)
+    n = 3000
+    base = rng.normal(size=(n, 2))
+    data = pd.DataFrame({
+        "a": base[:, 0],
+        "b": base[:, 0] * 2 + rng.normal(0, 0.3, n),
+        "c": base[:, 1],
+        "d": base[:, 1] - base[:, 0] + rng.normal(0, 0.5, n),
+        "e": np.full(n, 7.0),
+    })
+    data.loc[rng.random(n) < 0.02, "c"] = np.nan
+    return data
+
+
+COLUMNS = ["a", "b", "c", "d", "e"]
+
+
+def reference(df, n_components):
+    """sklearn 参考结果：剔除缺失行后 StandardScaler + PCA"""
+    data = df[COLUMNS].dropna().to_numpy()
+    scaled = StandardScaler().fit_transform(data)
+    return PCA(n_components=n_components).fit(scaled)
+
+
+def assert_matches(result, expected):
+    # Loadings are only defined up to sign
+    signs = np.sign((result["components"] * expected.components_).sum(axis=1))
+    np.testing.assert_allclose(result["components"] * signs[:, None], expected.components_, atol=1e-6)
+    np.testing.assert_allclose(result["explained_variance"], expected.explained_variance_, rtol=1e-6)
+    np.testing.assert_allclose(result["explained_variance_ratio"], expected.explained_variance_ratio_, rtol=1e-6)
+
+
+def test_exact_matches_sklearn(df):
+    result = fit_pca(df, COLUMNS, 3)
+    assert result["method"] == "exact"
+    assert result["n_samples"] == df[COLUMNS].dropna().shape[0]
+    assert_matches(result, reference(df, 3))
+
+
+def test_covariance_matches_sklearn(df, monkeypatch):
+    monkeypatch.setattr(pca_module, "EXACT_MAX_ROWS", 100)
+    result = fit_pca(df, COLUMNS, 3, chunk_size=700)
+    assert result["method"] == "covariance"
+    assert result["fallback"] is None
+    assert_matches(result, reference(df, 3))
+
+
+def test_incremental_matches_sklearn_in_single_batch(df, monkeypatch):
+    monkeypatch.setattr(pca_module, "EXACT_MAX_ROWS", 100)
+    monkeypatch.setattr(pca_module, "COVARIANCE_MAX_COLUMNS", 2)
+    # One partial_fit batch covering all rows is the same fit as PCA
+    result = fit_pca(df, COLUMNS, 3, chunk_size=len(df))
+    assert result["method"] == "incremental"
+    assert_matches(result, reference(df, 3))
+
+
+def test_over_budget_falls_back_to_covariance(df, monkeypatch):
+    monkeypatch.setattr(pca_module, "fits_budget", lambda stage, rows, cols: stage != "pca")
+    result = fit_pca(df, COLUMNS, 3)
+    assert result["method"] == "covariance"
+    assert result["fallback"]
+    assert_matches(result, reference(df, 3))
+
+
+def test_over_budget_matrix_is_sampled(df, monkeypatch):
+    monkeypatch.setattr(pca_module, "fits_budget", lambda stage, rows, cols: False)
+    monkeypatch.setattr(pca_module, "affordable_rows", lambda stage, rows, cols: 1000)
+    result = fit_pca(df, COLUMNS, 3)
+    assert result["fallback"]
+    assert result["n_samples"] <= 1000
+    assert set(result["sample_index"]) <= set(df.index)
+
+
+def test_projection_uses_sampled_rows(df):
+    result = fit_pca(df, COLUMNS, 2, max_points=500)
+    expected = reference(df, 2)
+    rows = df.loc[result["sample_index"], COLUMNS].to_numpy()
+    scaler = StandardScaler().fit(df[COLUMNS].dropna().to_numpy())
+    signs = np.sign((result["components"] * expected.components_).sum(axis=1))
+    np.testing.assert_allclose(result["projection"] * signs, expected.transform(scaler.transform(rows)), atol=1e-6)
+    assert len(result["projection"]) == 500
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.rolling import RollingStats
+
+
+def exact(values, size, ddof=1):
+    """两遍法逐窗口计算的参考结果；窗口不完整或含缺失值处为 NaN"""
+    windows = np.lib.stride_tricks.sliding_window_view(values, size)
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    mean[size - 1:] = windows.mean(axis=1)
+    std[size - 1:] = windows.std(axis=1, ddof=ddof)
+    return mean, std
+
+
+@pytest.fixture
+def values():
+    """带缺失值、且均值远大于波动的序列（前缀和相减最容易损失精度的情形）"""
+    rng = np.random.default_rng(0)
+    x = 1e6 + rng.normal(0, 1e-2, 500)
+    x[[10, 11, 200, 499]] = np.nan
+    # 一段常数：窗口内离差平方和为 0
+    x[300:320] = 1e6
+    return x
+
+
+@pytest.mark.parametrize("size", [2, 3, 7, 50])
+def test_window_matches_two_pass_reference(values, size):
+    mean, std = RollingStats(values).window(size)
+    expected_mean, expected_std = exact(values, size)
+    np.testing.assert_allclose(mean, expected_mean, rtol=1e-12)
+    np.testing.assert_allclose(std, expected_std, rtol=1e-6, atol=1e-9)
+
+
+@pytest.mark.parametrize("size", [2, 5, 30])
+def test_window_matches_pandas_rolling(size):
+    rng = np.random.default_rng(1)
+    series = pd.Series(rng.normal(100, 20, 1000))
+    series[rng.random(1000) < 0.02] = np.nan
+    mean, std = RollingStats(series).window(size)
+    np.testing.assert_allclose(mean, series.rolling(size).mean(), rtol=1e-10)
+    np.testing.assert_allclose(std, series.rolling(size).std(), rtol=1e-8)
+
+
+def test_windows_batch_equals_single_windows(values):
+    engine = RollingStats(values)
+    sizes = [2, 5, 10]
+    means, stds = engine.windows(sizes)
+    for row, size in enumerate(sizes):
+        mean, std = engine.window(size)
+        np.testing.assert_array_equal(means[row], mean)
+        np.testing.assert_array_equal(stds[row], std)
+
+
+def test_population_std(values):
+    _, std = RollingStats(values).window(4, ddof=0)
+    np.testing.assert_allclose(std, exact(values, 4, ddof=0)[1], rtol=1e-6, atol=1e-9)
+
+
+def test_window_longer_than_series():
+    mean, std = RollingStats([1.0, 2.0, 3.0]).window(5)
+    assert np.isnan(mean).all() and np.isnan(std).all()
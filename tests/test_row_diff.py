@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.row_diff import RowDiff
+
+KEYS = ["account", "year"]
+VALUES = ["revenue", "cost"]
+
+
+@pytest.fixture
+def schemes():
+    """方案B删去部分行、新增部分行、修改部分单元格；两边都有重复键"""
+    rng = np.random.default_rng(0)
+    n = 400
+    a = pd.DataFrame({
+        "account": rng.choice([f"acc{i}" for i in range(60)], n),
+        "year": rng.integers(2020, 2024, n),
+        "revenue": rng.normal(100, 20, n).round(2),
+        "cost": rng.normal(50, 10, n).round(2),
+    })
+    a.loc[::25, "cost"] = np.nan
+    b = a.drop(index=a.index[::9]).copy()
+    b.loc[b.index[::5], "revenue"] += 1.5
+    b.loc[b.index[::11], "cost"] = np.nan
+    extra = a.sample(30, random_state=1).assign(year=2030)
+    b = pd.concat([b, extra], ignore_index=True)
+    return a.reset_index(drop=True), b
+
+
+def reference(a, b, tolerance=0.0):
+    """pandas 参考结果：键加上出现序号后做外连接"""
+    left = a.assign(_n=a.groupby(KEYS).cumcount(), _row_a=np.arange(len(a)))
+    right = b.assign(_n=b.groupby(KEYS).cumcount(), _row_b=np.arange(len(b)))
+    merged = left.merge(right, on=KEYS + ["_n"], how="outer", suffixes=("_a", "_b"))
+    removed = sorted(merged.loc[merged["_row_b"].isna(), "_row_a"].astype(int))
+    added = sorted(merged.loc[merged["_row_a"].isna(), "_row_b"].astype(int))
+    matched = merged.dropna(subset=["_row_a", "_row_b"])
+    cells = set()
+    for col in VALUES:
+        va, vb = matched[f"{col}_a"], matched[f"{col}_b"]
+        changed = ~(((vb - va).abs() <= tolerance) | (va.isna() & vb.isna()))
+        cells |= {(int(row), col) for row in matched.loc[changed, "_row_a"]}
+    return removed, added, cells
+
+
+def cells_of(diff):
+    return {
+        (int(diff.matched_a[row]), diff.value_columns[col])
+        for row, col in zip(diff.cell_rows, diff.cell_columns)
+    }
+
+
+@pytest.mark.parametrize("tolerance", [0.0, 2.0])
+def test_compute_matches_pandas_merge(schemes, tolerance):
+    a, b = schemes
+    diff = RowDiff.compute(a, b, KEYS, VALUES, tolerance=tolerance)
+    removed, added, cells = reference(a, b, tolerance)
+    assert diff.removed.tolist() == removed
+    assert diff.added.tolist() == added
+    assert cells_of(diff) == cells
+
+
+def test_pages_cover_every_changed_cell(schemes):
+    a, b = schemes
+    diff = RowDiff.compute(a, b, KEYS, VALUES)
+    pages = pd.concat(diff.iter_pages("changed", page_size=17), ignore_index=True)
+    assert len(pages) == diff.n_rows("changed")
+    np.testing.assert_allclose(pages["delta"], pages["value_b"] - pages["value_a"])
+    totals = pages.groupby("column")["delta"].sum()
+    np.testing.assert_allclose(diff.column_summary()["delta_sum"][totals.index], totals)
+
+
+def test_duplicate_keys_are_counted(schemes):
+    a, b = schemes
+    summary = RowDiff.compute(a, b, KEYS, VALUES).summary()
+    expected = int((a.groupby(KEYS).size() > 1).sum())
+    assert expected > 0
+    assert summary["duplicate_keys_a"] == expected
+    assert summary["duplicate_keys_b"] == int((b.groupby(KEYS).size() > 1).sum())
+
+
+def test_identical_schemes_have_no_differences(schemes):
+    a, _ = schemes
+    summary = RowDiff.compute(a, a.copy(), KEYS).summary()
+    assert (summary["changed_cells"], summary["added"], summary["removed"]) == (0, 0, 0)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from utils.significance import bootstrap_mean_diff, mann_whitney, significance_table, welch_ttest
+
+
+@pytest.fixture
+def samples():
+    """两个方案的三列数据，方案B第一列均值偏移，含缺失值"""
+    rng = np.random.default_rng(0)
+    a = rng.normal(0, 1, (400, 3))
+    b = rng.normal(0, 2, (300, 3))
+    b[:, 0] += 0.5
+    a[rng.random(a.shape) < 0.05] = np.nan
+    b[rng.random(b.shape) < 0.05] = np.nan
+    return a, b
+
+
+def test_welch_ttest_matches_scipy(samples):
+    a, b = samples
+    t, dof, p = welch_ttest(a, b)
+    expected = stats.ttest_ind(b, a, equal_var=False, nan_policy="omit", axis=0)
+    np.testing.assert_allclose(t, expected.statistic)
+    np.testing.assert_allclose(p, expected.pvalue)
+    np.testing.assert_allclose(dof, expected.df)
+
+
+def test_mann_whitney_matches_scipy_per_column(samples):
+    a, b = samples
+    u, p = mann_whitney(a, b)
+    for k in range(a.shape[1]):
+        x, y = a[:, k], b[:, k]
+        expected = stats.mannwhitneyu(y[~np.isnan(y)], x[~np.isnan(x)], alternative="two-sided")
+        assert u[k] == pytest.approx(expected.statistic)
+        assert p[k] == pytest.approx(expected.pvalue)
+
+
+def test_bootstrap_matches_resampled_means(samples):
+    """与逐次 np.random.choice 重抽样的参考结果在抽样误差范围内一致"""
+    a, b = samples
+    lower, upper = bootstrap_mean_diff(a, b, n_resamples=2000, confidence=0.9)
+
+    rng = np.random.default_rng(1)
+    diffs = np.array([
+        [np.nanmean(rng.choice(b[:, k], len(b))) - np.nanmean(rng.choice(a[:, k], len(a))) for k in range(3)]
+        for _ in range(2000)
+    ])
+    expected_lower, expected_upper = np.percentile(diffs, [5, 95], axis=0)
+    np.testing.assert_allclose(lower, expected_lower, atol=0.05)
+    np.testing.assert_allclose(upper, expected_upper, atol=0.05)
+
+
+def test_bootstrap_is_reproducible_for_seed(samples):
+    a, b = samples
+    first = bootstrap_mean_diff(a, b, n_resamples=500, seed=3)
+    second = bootstrap_mean_diff(a, b, n_resamples=500, seed=3)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_significance_table(samples):
+    a, b = samples
+    columns = ["x", "y", "z"]
+    table = significance_table(pd.DataFrame(a, columns=columns), pd.DataFrame(b, columns=columns), columns)
+    assert list(table.index) == columns
+    np.testing.assert_allclose(table["mean_diff"], np.nanmean(b, axis=0) - np.nanmean(a, axis=0))
+    assert (table["ci_lower"] <= table["mean_diff"]).all()
+    assert (table["mean_diff"] <= table["ci_upper"]).all()
+    # 只有第一列存在真实的均值差
+    assert table.loc["x", "t_pvalue"] < 0.01
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from utils import data_loader, sql_engine
+
+
+@pytest.fixture
+def tables(tmp_path, monkeypatch):
+    """一个小工作簿，列式副本写在临时目录"""
+    cache_dir = tmp_path / "columnar"
+    monkeypatch.setattr(data_loader, "COLUMNAR_CACHE_DIR", cache_dir)
+    monkeypatch.setattr(sql_engine, "COLUMNAR_CACHE_DIR", cache_dir)
+    path = tmp_path / "scheme_1.xlsx"
+    pd.DataFrame({"group": ["a", "b", "a"], "value": [1, 2, 3]}).to_excel(path, index=False)
+    return {"scheme_1": path}
+
+
+def test_query_over_columnar_copy(tables):
+    sql = 'SELECT "group", sum(value) AS total FROM scheme_1 GROUP BY "group" ORDER BY "group"'
+    assert sql_engine.count_rows(sql, tables) == 2
+    page = sql_engine.fetch_page(sql, tables, 1, 100)
+    assert page["total"].tolist() == [4, 2]
+
+
+def test_table_names_are_case_insensitive(tables):
+    assert sql_engine.count_rows("SELECT * FROM SCHEME_1", tables) == 3
+    assert sql_engine.count_rows('SELECT * FROM "Scheme_1"', tables) == 3
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM read_text('/etc/passwd')",
+    "SELECT * FROM read_csv('/etc/passwd')",
+    "SELECT * FROM scheme_1 UNION ALL SELECT * FROM read_text('/etc/passwd')",
+])
+def test_cannot_read_other_files(tables, sql):
+    with pytest.raises(Exception):
+        sql_engine.fetch_all(sql, tables)
+
+
+@pytest.mark.parametrize("sql", ["DROP TABLE scheme_1", "SELECT 1; SELECT 2", "  "])
+def test_only_single_select(sql):
+    with pytest.raises(ValueError):
+        sql_engine.validate_query(sql)
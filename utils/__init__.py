@@ -0,0 +1 @@
+"""DataVizPro 共享工具模块（供各页面与命令行工具复用）"""
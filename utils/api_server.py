@@ -0,0 +1,148 @@
+"""
+本地 HTTP 分析接口
+
+基于标准库 http.server 的 JSON 接口，只读取上传目录中的工作簿：
+
+    GET /health                         存活检查
+    GET /files                          可分析的工作簿列表
+    GET /features?file=名称[&sheet=]    列类型与统计特征
+    GET /analyze?file=名称[&sheet=][&advanced=1][&figures=1]
+                                        评估分析结果（JSON）
+    GET /report?file=名称[&advanced=1]  评估分析报告（HTML）
+    GET /compare?a=名称&b=名称[&tests=0]
+                                        方案对比结果
+
+默认只监听 127.0.0.1。每个请求在独立线程中处理，已解析的工作簿按文件签名
+在进程内复用。
+"""
+import json
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.paths import UPLOAD_DIR
+from utils.report import (
+    analyze_workbook,
+    compare_workbooks,
+    report_html,
+    report_json,
+    to_jsonable,
+    workbook_features
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+WORKBOOK_SUFFIXES = (".xlsx", ".xls")
+
+
+class ApiError(Exception):
+    """带 HTTP 状态码的请求错误"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def resolve_workbook(name):
+    """把请求中的文件名解析为上传目录中的路径，拒绝目录之外的路径"""
+    if not name:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "缺少文件名参数")
+    path = (UPLOAD_DIR / name).resolve()
+    if path.parent != UPLOAD_DIR.resolve() or path.suffix.lower() not in WORKBOOK_SUFFIXES:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"无效的文件名: {name}")
+    if not path.exists():
+        raise ApiError(HTTPStatus.NOT_FOUND, f"文件不存在: {name}")
+    return path
+
+
+def list_workbooks():
+    files = sorted(p for p in UPLOAD_DIR.glob("*") if p.suffix.lower() in WORKBOOK_SUFFIXES)
+    return [{"file": p.name, "size": p.stat().st_size, "modified": p.stat().st_mtime} for p in files]
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """把 GET 请求分派到各分析函数"""
+
+    server_version = "DataVizAnalysis/0.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        route = {
+            "/health": self.health,
+            "/files": self.files,
+            "/features": self.features,
+            "/analyze": self.analyze,
+            "/report": self.report,
+            "/compare": self.compare
+        }.get(url.path.rstrip("/") or "/")
+        try:
+            if route is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"未知接口: {url.path}")
+            route(params)
+        except ApiError as e:
+            self.send_json({"error": str(e)}, e.status)
+        except Exception as e:
+            self.log_error("分析出错: %r", e)
+            self.send_json({"error": f"{type(e).__name__}: {e}"}, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def health(self, params):
+        self.send_json({"status": "ok"})
+
+    def files(self, params):
+        self.send_json({"files": list_workbooks()})
+
+    def features(self, params):
+        path = resolve_workbook(params.get("file"))
+        self.send_json(to_jsonable(workbook_features(path, params.get("sheet"))))
+
+    def analyze(self, params):
+        path = resolve_workbook(params.get("file"))
+        report = analyze_workbook(path, params.get("sheet"), advanced=_flag(params, "advanced"))
+        self.send_body(report_json(report, include_figures=_flag(params, "figures")), "application/json")
+
+    def report(self, params):
+        path = resolve_workbook(params.get("file"))
+        report = analyze_workbook(path, params.get("sheet"), advanced=_flag(params, "advanced"))
+        self.send_body(report_html(report), "text/html")
+
+    def compare(self, params):
+        path_a = resolve_workbook(params.get("a"))
+        path_b = resolve_workbook(params.get("b"))
+        result = compare_workbooks(path_a, path_b, tests=_flag(params, "tests", True))
+        self.send_body(report_json(result), "application/json")
+
+    def send_json(self, data, status=HTTPStatus.OK):
+        self.send_body(json.dumps(data, ensure_ascii=False), "application/json", status)
+
+    def send_body(self, text, content_type, status=HTTPStatus.OK):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """创建（未启动的）多线程 HTTP 服务器"""
+    return ThreadingHTTPServer((host, port), AnalysisRequestHandler)
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """启动服务器并阻塞，直到 Ctrl+C"""
+    server = make_server(host, port)
+    print(f"分析接口已启动: http://{host}:{server.server_address[1]}/（数据目录 {UPLOAD_DIR}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _flag(params, name, default=False):
+    value = params.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,116 @@
+"""
+类别列位图索引
+
+为每个类别列的每个取值建立一次位图（压缩位集），多列 AND/OR 筛选变成
+位图之间的按位运算，不再需要在每次重新运行时对整张表做 isin 扫描。
+稀疏取值以行号数组存储，稠密取值以 np.packbits 打包的位图存储，
+二者取占用空间较小者。
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+MISSING_LABEL = "未知"
+
+
+class BitmapIndex:
+    """按列、按取值组织的位图索引"""
+
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+        self.n_bytes = (n_rows + 7) // 8
+        self.containers = {}
+
+    @classmethod
+    def build(cls, df, columns):
+        """
+        为指定类别列构建位图索引
+
+        Args:
+            df (pd.DataFrame): 数据
+            columns (list): 类别列名
+
+        Returns:
+            BitmapIndex: 位图索引
+        """
+        index = cls(len(df))
+        for col in columns:
+            if col in df.columns:
+                index.add_column(col, df[col])
+        return index
+
+    @property
+    def columns(self):
+        return list(self.containers)
+
+    def add_column(self, col, series):
+        """为单列的每个取值构建位图，总代价为一次排序"""
+        values = series.astype(object).where(series.notna(), MISSING_LABEL)
+        codes, uniques = pd.factorize(values, sort=True)
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes, minlength=len(uniques))
+        groups = np.split(order, np.cumsum(counts)[:-1])
+        self.containers[col] = {
+            value: self._compress(positions) for value, positions in zip(uniques, groups)
+        }
+
+    def values(self, col):
+        """返回某列的全部取值"""
+        return list(self.containers.get(col, {}))
+
+    def column_bitmap(self, col, values):
+        """返回某列取值属于 values 的行位图（同列内为 OR）"""
+        containers = self.containers[col]
+        bitmaps = [self._as_bitmap(containers[v]) for v in values if v in containers]
+        if not bitmaps:
+            return np.zeros(self.n_bytes, dtype=np.uint8)
+        return reduce(np.bitwise_or, bitmaps)
+
+    def select(self, conditions, mode="and"):
+        """
+        按多列条件计算行位图
+
+        Args:
+            conditions (dict): 列名 -> 选中的取值列表，本索引中不存在的列会被忽略
+            mode (str): 列之间的组合方式，"and" 或 "or"
+
+        Returns:
+            np.ndarray | None: 打包后的行位图，没有有效条件时返回 None
+        """
+        bitmaps = [
+            self.column_bitmap(col, values)
+            for col, values in conditions.items()
+            if values and col in self.containers
+        ]
+        if not bitmaps:
+            return None
+        op = np.bitwise_and if mode == "and" else np.bitwise_or
+        return reduce(op, bitmaps)
+
+    def rows(self, bitmap):
+        """将行位图转换为行号数组"""
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    def count(self, bitmap):
+        """统计位图中被选中的行数"""
+        return int(np.unpackbits(bitmap, count=self.n_rows).sum())
+
+    def memory_usage(self):
+        """索引占用的字节数"""
+        return sum(c.nbytes for containers in self.containers.values() for c in containers.values())
+
+    def _compress(self, positions):
+        # 行号数组比位图更小时按数组存储（类似 Roaring 的 array container）
+        if positions.size * 4 < self.n_bytes:
+            return positions.astype(np.int32 if self.n_rows < 2 ** 31 else np.int64)
+        bits = np.zeros(self.n_bytes * 8, dtype=bool)
+        bits[positions] = True
+        return np.packbits(bits)
+
+    def _as_bitmap(self, container):
+        if container.dtype == np.uint8:
+            return container
+        packed = np.zeros(self.n_bytes, dtype=np.uint8)
+        np.bitwise_or.at(packed, container >> 3, (0x80 >> (container & 7)).astype(np.uint8))
+        return packed
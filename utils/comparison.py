@@ -0,0 +1,129 @@
+"""
+方案对比计算
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+COMPARE_STATS = ("mean", "std", "min", "max", "median")
+
+
+def describe_columns(df, columns):
+    """
+    一次向量化计算多列的 mean/std/min/max/median
+
+    Args:
+        df (pd.DataFrame): 数据
+        columns (list): 数值列
+
+    Returns:
+        pd.DataFrame: 行为统计量、列为数值列（与 df[columns].agg(COMPARE_STATS) 一致）
+    """
+    values = df[columns].to_numpy(dtype="float64", na_value=np.nan)
+    if len(values) == 0:
+        return pd.DataFrame(np.nan, index=list(COMPARE_STATS), columns=columns)
+
+    counts = (~np.isnan(values)).sum(axis=0)
+    with warnings.catch_warnings():
+        # All-NaN columns and single observations yield NaN, as in pandas
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if counts.min() == len(values):
+            stats = [
+                values.mean(axis=0),
+                values.std(axis=0, ddof=1) if len(values) > 1 else np.full(len(columns), np.nan),
+                values.min(axis=0),
+                values.max(axis=0),
+                np.median(values, axis=0)
+            ]
+        else:
+            stats = [
+                np.nanmean(values, axis=0),
+                np.nanstd(values, axis=0, ddof=1),
+                np.nanmin(values, axis=0),
+                np.nanmax(values, axis=0),
+                np.nanmedian(values, axis=0)
+            ]
+    stats[1] = np.where(counts > 1, stats[1], np.nan)
+    return pd.DataFrame(stats, index=list(COMPARE_STATS), columns=columns)
+
+
+def correlation_matrix(df, columns):
+    """
+    计算相关系数矩阵
+
+    数据无缺失值时用 np.corrcoef 的矩阵乘法实现，否则回退到 pandas 的成对删除算法。
+
+    Args:
+        df (pd.DataFrame): 数据
+        columns (list): 数值列
+
+    Returns:
+        pd.DataFrame: 相关系数矩阵
+    """
+    values = df[columns].to_numpy(dtype="float64", na_value=np.nan)
+    if len(values) < 2 or np.isnan(values).any():
+        return pd.DataFrame(values, columns=columns).corr()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.atleast_2d(np.corrcoef(values, rowvar=False))
+    return pd.DataFrame(corr, index=columns, columns=columns)
+
+
+def compare_schemes(df1, df2, features1, features2):
+    """
+    对比两个方案并返回对比结果
+
+    每个方案只对共同数值列做一次批量统计，差异由两次结果直接相减得到；
+    相关性只在共同数值列上计算，并以 DataFrame 形式返回。
+
+    Args:
+        df1 (pd.DataFrame): 方案A数据
+        df2 (pd.DataFrame): 方案B数据
+        features1 (dict): 方案A数据特征配置
+        features2 (dict): 方案B数据特征配置
+
+    Returns:
+        dict: 包含 numeric_comparison、categorical_comparison、correlation_comparison
+    """
+    comparison = {
+        "numeric_comparison": {},
+        "categorical_comparison": {},
+        "correlation_comparison": {}
+    }
+
+    # Common columns, in scheme A's column order
+    numeric_cols2 = set(features2["numeric_columns"])
+    common_numeric_cols = [col for col in features1["numeric_columns"] if col in numeric_cols2]
+    categorical_cols2 = set(features2["categorical_columns"])
+    common_categorical_cols = [col for col in features1["categorical_columns"] if col in categorical_cols2]
+
+    # Numeric comparison: one batched aggregation per scheme
+    if common_numeric_cols:
+        stats1 = describe_columns(df1, common_numeric_cols)
+        stats2 = describe_columns(df2, common_numeric_cols)
+        diff = stats2 - stats1
+        for col in common_numeric_cols:
+            comparison["numeric_comparison"][col] = {
+                "scheme1": stats1[col].to_dict(),
+                "scheme2": stats2[col].to_dict(),
+                "difference": {f"{stat}_diff": diff.at[stat, col] for stat in COMPARE_STATS}
+            }
+
+    # Categorical comparison
+    for col in common_categorical_cols:
+        comparison["categorical_comparison"][col] = {
+            "scheme1": df1[col].value_counts().to_dict(),
+            "scheme2": df2[col].value_counts().to_dict()
+        }
+
+    # Correlation comparison, restricted to the shared columns up front
+    if common_numeric_cols:
+        corr1 = correlation_matrix(df1, common_numeric_cols)
+        corr2 = correlation_matrix(df2, common_numeric_cols)
+        comparison["correlation_comparison"] = {
+            "corr1": corr1,
+            "corr2": corr2,
+            "corr_diff": corr2 - corr1
+        }
+
+    return comparison
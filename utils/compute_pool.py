@@ -0,0 +1,295 @@
+"""
+共享计算进程池
+
+PCA、宽表相关系数、聚类、Bootstrap 显著性检验等耗时计算提交到进程内共享的
+进程池，不占用 streamlit 的脚本线程：
+
+- 并发上限默认为 CPU 数的一半（需求 5.2：CPU 使用率 < 50%），可用
+  DATAVIZ_COMPUTE_WORKERS 调整，设为 0 时在调用线程中直接计算；
+- 相同键的请求在计算期间共用一个 future，多个会话同时请求同一结果只算一次；
+- 结果按键保留最近若干个，供重新运行和其他会话复用；
+- 页面等待结果时定期刷新状态提示，streamlit 借此检查是否有新的重新运行请求。
+  用户在计算期间修改控件时，本次运行在等待处被中断，尚未开始的计算若已无人
+  等待即被取消；已开始的计算无法中途终止，完成后结果仍进入缓存。
+
+参与计算的函数和参数需可 pickle；返回的结果在会话之间共享，不可原地修改。
+
+工作进程中没有当前运行的记录器，utils.memory 的预算检查看到的也是工作进程的
+RSS。指定内存阶段（stage）的计算由调用方进程先按预算检查：参数在提交时还要
+复制一份，预计超出剩余预算时改在调用线程中计算，由函数自身的抽样/分块降级
+处理；提交到进程池时工作进程测量本次计算的 RSS 变化与峰值，随结果返回并记入
+调用方的运行记录。
+工作进程由 forkserver（不支持时为 spawn）启动，而不是从多线程的 streamlit
+服务器进程直接 fork：fork 时其他线程持有的锁会原样复制到子进程，可能使
+工作进程死锁。streamlit 运行页面时把 __main__ 换成页面脚本的模块，而这两种
+启动方式会在工作进程中按 __main__.__file__ 重新执行主模块，因此提交任务
+（可能启动新的工作进程）期间 __main__ 暂时换成空模块。
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict, namedtuple
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+COMPUTE_WORKERS_ENV = "DATAVIZ_COMPUTE_WORKERS"
+# 保留的已完成结果数
+RESULT_CACHE_SIZE = 64
+# 等待期间刷新状态提示的间隔（秒），也是响应重新运行请求的延迟上限
+POLL_INTERVAL = 0.25
+
+# 工作进程返回的结果与其内存统计
+MeasuredResult = namedtuple("MeasuredResult", ["result", "memory"])
+
+_executor = None
+# 启动工作进程时使用的 __main__：没有 __file__，工作进程不会重新执行页面脚本
+_worker_main = types.ModuleType("__main__")
+_inflight = {}
+_results = OrderedDict()
+# 可重入：持锁取消 future 时会同步触发完成回调 _finish
+_lock = threading.RLock()
+
+
+def max_workers():
+    """进程池并发上限，0 表示不使用进程池"""
+    default = max(1, (os.cpu_count() or 1) // 2)
+    try:
+        return max(int(os.environ.get(COMPUTE_WORKERS_ENV, default)), 0)
+    except ValueError:
+        return default
+
+
+def submit(key, fn, *args, **kwargs):
+    """
+    提交计算，返回共享的 future
+
+    相同键的计算正在进行时不再重复提交，而是登记为该 future 的又一个等待者；
+    每次 submit 都要对应一次 release。
+
+    Args:
+        key (tuple): 标识计算结果的可哈希键，如 ("pca", 文件签名, 筛选键, 列, 主成分数)
+        fn (callable): 模块级函数
+        *args, **kwargs: 传给 fn 的参数
+
+    Returns:
+        concurrent.futures.Future: 计算结果
+    """
+    with _lock:
+        entry = _inflight.get(key)
+        if entry is not None and not entry["future"].cancelled():
+            entry["waiters"] += 1
+            return entry["future"]
+        future = _submit(fn, *args, **kwargs)
+        _inflight[key] = {"future": future, "waiters": 1}
+    future.add_done_callback(lambda done: _finish(key, done))
+    return future
+
+
+def submit_task(fn, *args, **kwargs):
+    """
+    向共享进程池提交一次性任务：不按键合并，结果不进入缓存
+
+    用于结果由调用方自行缓存的任务（如解析上传的工作簿）。调用方不再需要
+    结果时应取消返回的 future。
+
+    Args:
+        fn (callable): 模块级函数
+        *args, **kwargs: 传给 fn 的参数
+
+    Returns:
+        concurrent.futures.Future: 计算结果
+    """
+    with _lock:
+        try:
+            return _submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            _reset_pool()
+            return _submit(fn, *args, **kwargs)
+
+
+def release(key):
+    """
+    放弃等待一个已提交的计算；没有其他等待者且尚未开始时取消
+
+    Args:
+        key (tuple): submit 时使用的键
+    """
+    with _lock:
+        entry = _inflight.get(key)
+        if entry is None:
+            return
+        entry["waiters"] -= 1
+        if entry["waiters"] <= 0:
+            # 取消成功时由完成回调 _finish 移出 _inflight
+            entry["future"].cancel()
+
+
+def compute(key, fn, *args, label="正在计算", stage=None, size=None, **kwargs):
+    """
+    取得计算结果：先查已完成的结果，否则提交到进程池并等待
+
+    在 streamlit 页面中等待时显示状态提示；本次运行被新的重新运行取代时，
+    等待在下一次刷新提示时中断并放弃该计算。
+
+    Args:
+        key (tuple): 标识计算结果的可哈希键
+        fn (callable): 模块级函数
+        *args, **kwargs: 传给 fn 的参数
+        label (str): 等待时显示的说明
+        stage (str, optional): 内存阶段（见 utils.memory.STAGE_FACTORS），指定时按预算
+            决定是否使用进程池，并记录工作进程的内存
+        size (tuple, optional): 与 stage 一起使用的数据规模 (行数, 列数)
+
+    Returns:
+        fn 的返回值
+    """
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+    if max_workers() == 0 or (stage is not None and not _fits_with_copy(stage, *size)):
+        result = fn(*args, **kwargs)
+        _remember(key, result)
+        return result
+
+    if stage is not None:
+        fn, args, kwargs = _measured, (stage, fn, args, kwargs), {}
+    try:
+        future = submit(key, fn, *args, **kwargs)
+    except BrokenProcessPool:
+        _reset_pool()
+        future = submit(key, fn, *args, **kwargs)
+    try:
+        result = _wait(future, label)
+    except BrokenProcessPool:
+        _reset_pool()
+        raise
+    finally:
+        release(key)
+    if isinstance(result, MeasuredResult):
+        _record_memory(result.memory)
+        result = result.result
+    return result
+
+
+def shutdown(wait=True):
+    """
+    关闭进程池并取消尚未开始的计算，之后的计算会重新创建进程池
+
+    Args:
+        wait (bool): 是否等待工作进程退出
+    """
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+        _inflight.clear()
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _wait(future, label):
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    if get_script_run_ctx() is None:
+        return future.result()
+
+    import streamlit as st
+
+    status = st.empty()
+    started = time.perf_counter()
+    try:
+        while True:
+            try:
+                return future.result(timeout=POLL_INTERVAL)
+            except FutureTimeoutError:
+                # 每次更新提示都会让 streamlit 检查重新运行请求，有请求时在此抛出并结束本次运行
+                status.caption(f"{label}…（{time.perf_counter() - started:.1f} 秒）")
+            except CancelledError:
+                raise RuntimeError(f"{label}已被取消")
+    finally:
+        status.empty()
+
+
+def _fits_with_copy(stage, rows, cols):
+    """该阶段的峰值加上提交时复制的一份数据是否在剩余预算内"""
+    from utils.memory import headroom, projected_bytes
+
+    return projected_bytes(stage, rows, cols) + rows * cols * 8 <= headroom()
+
+
+def _measured(stage, fn, args, kwargs):
+    """在工作进程中执行 fn，并测量本次计算的 RSS 变化与工作进程的 RSS 峰值"""
+    from utils.memory import MB, current_rss
+
+    rss_start = current_rss()
+    result = fn(*args, **kwargs)
+    rss_end = current_rss()
+    return MeasuredResult(result, {
+        "stage": stage,
+        "rss_mb": round(rss_end / MB, 1),
+        "rss_delta_mb": round((rss_end - rss_start) / MB, 1),
+        # ru_maxrss 在 Linux 上以 KB 为单位，是工作进程启动以来的峰值
+        "rss_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "meta": {"process": "pool"}
+    })
+
+
+def _record_memory(entry):
+    from utils.timing import current_recorder
+
+    recorder = current_recorder()
+    if recorder is not None:
+        recorder.memory.append(entry)
+
+
+def _finish(key, future):
+    with _lock:
+        entry = _inflight.get(key)
+        if entry is not None and entry["future"] is future:
+            del _inflight[key]
+    if not future.cancelled() and future.exception() is None:
+        result = future.result()
+        # 缓存中只保留结果本身，内存统计只记入等待该计算的运行
+        _remember(key, result.result if isinstance(result, MeasuredResult) else result)
+
+
+def _remember(key, result):
+    with _lock:
+        _results[key] = result
+        _results.move_to_end(key)
+        while len(_results) > RESULT_CACHE_SIZE:
+            _results.popitem(last=False)
+
+
+def _submit(fn, *args, **kwargs):
+    """提交到进程池；此时新启动的工作进程看到的 __main__ 是空模块"""
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = _worker_main
+    try:
+        return _pool().submit(fn, *args, **kwargs)
+    finally:
+        # 其间另一个会话开始运行脚本时保留它安装的 __main__
+        if sys.modules["__main__"] is _worker_main:
+            sys.modules["__main__"] = main
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max_workers(), mp_context=_start_context())
+    return _executor
+
+
+def _start_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _reset_pool():
+    """工作进程异常退出（如被系统因内存不足杀掉）后重建进程池"""
+    shutdown(wait=False)
@@ -0,0 +1,338 @@
+"""
+数据文件加载工具
+
+提供文件签名（用作缓存键）、按签名缓存的已解析数据集，以及通过有上限的
+进程池/线程池并发读取多个 Excel 文件的加载器。读取前按工作表尺寸估算解析
+所需内存，超出内存预算时只读取预算内的前若干行。
+
+SQL 查询页面使用工作簿的 Parquet 列式副本（columnar_copy），按文件签名存放在
+data/cache/columnar，文件更新后重新生成。
+"""
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from utils import compute_pool
+from utils.memory import affordable_rows, fits_budget, format_budget, notify_fallback, track
+from utils.paths import COLUMNAR_CACHE_DIR
+
+# 线程池并发读取时的默认最大线程数
+DEFAULT_MAX_WORKERS = 4
+# 进程内缓存的已解析数据集数量上限
+DATASET_CACHE_SIZE = 32
+# 列式副本的行组大小：行组越小，按列统计信息（最小/最大值）跳过的数据越精细
+COLUMNAR_ROW_GROUP_SIZE = 65_536
+
+_dataset_cache = OrderedDict()
+_dataset_cache_lock = threading.Lock()
+
+
+def list_workbooks(directory):
+    """
+    列出目录中的 Excel 文件（先 .xlsx 后 .xls）
+
+    按目录的修改时间缓存：增删文件会更新目录的修改时间，页面重新运行时不必重复列目录。
+
+    Args:
+        directory (str | Path): 目录
+
+    Returns:
+        list: 文件路径列表，目录不存在时为空
+    """
+    try:
+        mtime_ns = Path(directory).stat().st_mtime_ns
+    except FileNotFoundError:
+        return []
+    return list(_list_workbooks(str(directory), mtime_ns))
+
+
+@lru_cache(maxsize=16)
+def _list_workbooks(directory, mtime_ns):
+    directory = Path(directory)
+    return tuple(directory.glob("*.xlsx")) + tuple(directory.glob("*.xls"))
+
+
+def file_signature(file_path, sheet_name=None):
+    """
+    返回标识文件内容版本的签名，用作各类缓存的键
+
+    Args:
+        file_path (str | Path): 文件路径
+        sheet_name (str, optional): 工作表名称
+
+    Returns:
+        tuple: (路径, 修改时间, 文件大小, 工作表)
+    """
+    stat = Path(file_path).stat()
+    return (str(file_path), stat.st_mtime_ns, stat.st_size, sheet_name)
+
+
+def loaded_signature(signature, df):
+    """
+    按读入的数据区分的缓存键：因内存预算被截断的数据在文件签名后附加实际行数
+
+    行数上限取决于读取时的剩余内存，同一文件在不同时间可能读入不同的行数，
+    由截断数据计算的结果不能与完整数据共用按文件签名缓存的条目。
+
+    Args:
+        signature (tuple): file_signature 的返回值
+        df (pd.DataFrame): 用该文件读入的数据（筛选前）
+
+    Returns:
+        tuple: 完整数据时为原签名
+    """
+    if df.attrs.get("memory_fallback"):
+        return (*signature, len(df))
+    return signature
+
+
+def excel_dimensions(file_path, sheet_name=None):
+    """
+    从工作表的尺寸记录读取行列数，不解析单元格
+
+    Args:
+        file_path (str | Path): 文件路径
+        sheet_name (str, optional): 工作表名称，默认第一个工作表
+
+    Returns:
+        tuple: (数据行数（不含表头）, 列数)，无法获取时（如 .xls 或缺少尺寸记录）为 None
+    """
+    try:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            sheet = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+            rows, cols = sheet.max_row, sheet.max_column
+        finally:
+            workbook.close()
+    except Exception:
+        return None
+    if not rows or not cols:
+        return None
+    return max(rows - 1, 0), cols
+
+
+def load_row_limit(file_path, sheet_name=None):
+    """
+    按内存预算确定最多读取的行数
+
+    Returns:
+        tuple: (行数上限或 None（可全部读取）, 数据总行数或 None)
+    """
+    dimensions = excel_dimensions(file_path, sheet_name)
+    if dimensions is None:
+        return None, None
+    rows, cols = dimensions
+    if fits_budget("load", rows, cols):
+        return None, rows
+    return affordable_rows("load", rows, cols), rows
+
+
+def truncation_message(file_name, nrows, total_rows):
+    return f"{file_name} 共 {total_rows} 行，超出内存预算（{format_budget()}），仅加载前 {nrows} 行"
+
+
+def read_excel_within_budget(file_path, sheet_name=None, **kwargs):
+    """
+    读取 Excel 文件；预计超出内存预算时只读取预算内的前若干行并记录降级说明
+
+    被截断的数据在 df.attrs["memory_fallback"] 中保留说明。
+
+    Args:
+        file_path (str | Path): 文件路径
+        sheet_name (str, optional): 工作表名称
+        **kwargs: 传给 pd.read_excel 的其他参数
+
+    Returns:
+        pd.DataFrame: 读取的数据
+    """
+    nrows, total_rows = load_row_limit(file_path, sheet_name)
+    with track("load", file=Path(file_path).name):
+        df = pd.read_excel(file_path, sheet_name=0 if sheet_name is None else sheet_name, nrows=nrows, **kwargs)
+    if nrows is not None:
+        message = truncation_message(Path(file_path).name, nrows, total_rows)
+        df.attrs["memory_fallback"] = message
+        notify_fallback("load", message)
+    return df
+
+
+def read_excel_file(file_path, sheet_name=None, nrows=None):
+    """读取单个 Excel 文件（模块级函数，可在子进程中执行）"""
+    start = time.perf_counter()
+    df = pd.read_excel(file_path, sheet_name=0 if sheet_name is None else sheet_name, nrows=nrows)
+    return df, time.perf_counter() - start
+
+
+def get_cached_dataset(signature):
+    """按签名获取已解析的数据集，未命中时返回 None（返回的数据不可原地修改）"""
+    with _dataset_cache_lock:
+        df = _dataset_cache.get(signature)
+        if df is not None:
+            _dataset_cache.move_to_end(signature)
+        return df
+
+
+def cache_dataset(signature, df):
+    """缓存已解析的数据集，超过容量时淘汰最久未使用的条目"""
+    with _dataset_cache_lock:
+        _dataset_cache[signature] = df
+        _dataset_cache.move_to_end(signature)
+        while len(_dataset_cache) > DATASET_CACHE_SIZE:
+            _dataset_cache.popitem(last=False)
+
+
+def load_dataset(file_path, sheet_name=None):
+    """
+    读取工作簿，按文件签名复用进程内已解析的数据（含后台预计算读入的数据）
+
+    命中的数据若在读取时被截断，重新记录降级说明。返回的数据不可原地修改。
+
+    Args:
+        file_path (str | Path): 文件路径
+        sheet_name (str, optional): 工作表名称
+
+    Returns:
+        pd.DataFrame: 读取的数据
+    """
+    signature = file_signature(file_path, sheet_name)
+    df = get_cached_dataset(signature)
+    if df is None:
+        df = read_excel_within_budget(file_path, sheet_name)
+        cache_dataset(signature, df)
+    elif df.attrs.get("memory_fallback"):
+        notify_fallback("load", df.attrs["memory_fallback"])
+    return df
+
+
+def columnar_copy(file_path, sheet_name=None):
+    """
+    返回工作簿的 Parquet 列式副本，不存在或文件已更新时重新生成
+
+    副本由 load_dataset 读入的数据写成，列名统一为字符串，无法直接写入的混合
+    类型列转为字符串。读取时因内存预算被截断的数据写为 .partial 副本，每次
+    调用都重新经过 load_dataset（重新记录降级说明），预算充足后被完整副本取代。
+
+    Args:
+        file_path (str | Path): 文件路径
+        sheet_name (str, optional): 工作表名称
+
+    Returns:
+        Path: 副本路径
+    """
+    file_path = Path(file_path)
+    digest = hashlib.sha256(json.dumps(file_signature(file_path, sheet_name), default=str).encode("utf-8")).hexdigest()[:16]
+    target = COLUMNAR_CACHE_DIR / f"{file_path.name}.{digest}.parquet"
+    if target.exists():
+        return target
+
+    df = load_dataset(file_path, sheet_name)
+    if df.attrs.get("memory_fallback"):
+        target = target.with_suffix(".partial.parquet")
+        if target.exists():
+            return target
+    _write_columnar(df, target)
+    # 每个文件只保留最近生成的一个副本，旧版本的副本随之删除
+    for path in COLUMNAR_CACHE_DIR.glob(f"{glob.escape(file_path.name)}.*.parquet"):
+        if path != target:
+            path.unlink(missing_ok=True)
+    return target
+
+
+def remove_columnar_copies(file_name):
+    """删除文件的所有列式副本"""
+    for path in COLUMNAR_CACHE_DIR.glob(f"{glob.escape(file_name)}.*.parquet"):
+        path.unlink(missing_ok=True)
+
+
+def _write_columnar(df, target):
+    df = df.set_axis([str(col) for col in df.columns], axis=1)
+    COLUMNAR_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件再改名，并发查询不会读到一半的副本
+    with tempfile.NamedTemporaryFile(dir=COLUMNAR_CACHE_DIR, suffix=".tmp", delete=False) as f:
+        temp_path = f.name
+    try:
+        try:
+            df.to_parquet(temp_path, index=False, row_group_size=COLUMNAR_ROW_GROUP_SIZE)
+        except (TypeError, ValueError):
+            # 混合了数字与文本的列 pyarrow 无法推断类型
+            mixed = {col: "string" for col in df.columns if df[col].dtype == object}
+            df.astype(mixed).to_parquet(temp_path, index=False, row_group_size=COLUMNAR_ROW_GROUP_SIZE)
+        os.replace(temp_path, target)
+    finally:
+        Path(temp_path).unlink(missing_ok=True)
+
+
+def iter_excel_files(file_paths, max_workers=None, use_processes=True):
+    """
+    并发读取多个 Excel 文件，按完成顺序逐个产出结果
+
+    已缓存的文件立即产出；其余文件提交到共享计算进程池（utils.compute_pool，
+    由 forkserver 启动工作进程，不从多线程的 streamlit 服务器 fork）中解析，
+    调用方可以在第一个文件就绪时开始渲染，而不必等待最慢的文件。行数上限
+    在提交前按内存预算确定，被截断的文件会记录降级说明。调用方提前停止迭代
+    时尚未开始的解析被取消。
+
+    Args:
+        file_paths (list): 文件路径列表
+        max_workers (int, optional): 使用线程池时的最大并发数，默认取 DEFAULT_MAX_WORKERS
+            与 CPU 数的较小值；进程池的并发数由 compute_pool 统一控制
+        use_processes (bool): 是否使用进程池（openpyxl 解析受 GIL 限制，线程池收益有限）；
+            compute_pool 被设为不使用进程池时改用线程池
+
+    Yields:
+        tuple: (文件路径, DataFrame 或 None, 异常或 None, 耗时秒数)
+    """
+    pending = []
+    for path in file_paths:
+        signature = file_signature(path)
+        df = get_cached_dataset(signature)
+        if df is not None:
+            if "memory_fallback" in df.attrs:
+                notify_fallback("load", df.attrs["memory_fallback"])
+            yield path, df, None, 0.0
+        else:
+            pending.append((path, signature, *load_row_limit(path)))
+
+    if not pending:
+        return
+
+    executor = None
+    if use_processes and compute_pool.max_workers() > 0:
+        submit = partial(compute_pool.submit_task, read_excel_file)
+    else:
+        workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(pending), os.cpu_count() or 1))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        submit = partial(executor.submit, read_excel_file)
+    futures = {
+        submit(str(path), None, nrows): (path, signature, nrows, total_rows)
+        for path, signature, nrows, total_rows in pending
+    }
+    try:
+        for future in as_completed(futures):
+            path, signature, nrows, total_rows = futures[future]
+            try:
+                df, elapsed = future.result()
+            except Exception as e:
+                yield path, None, e, 0.0
+                continue
+            if nrows is not None:
+                df.attrs["memory_fallback"] = truncation_message(Path(path).name, nrows, total_rows)
+                notify_fallback("load", df.attrs["memory_fallback"])
+            cache_dataset(signature, df)
+            yield path, df, None, elapsed
+    finally:
+        for future in futures:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,229 @@
+"""
+数据特征分析与评估结果分析
+
+数据配置页面用 analyze_data_features 识别列类型并生成特征配置，评估结果
+页面用 analyze_data 生成汇总与图表。放在这里以便命令行工具和基准测试直接
+调用，无需启动页面。
+"""
+import pandas as pd
+
+from utils.lazy_import import lazy_import
+from utils.memory import track
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+
+
+@track("profile")
+def analyze_data_features(df):
+    """Analyze data features and return feature information"""
+    features = {
+        "numeric_columns": [],
+        "categorical_columns": [],
+        "date_columns": [],
+        "text_columns": [],
+        "column_stats": {}
+    }
+    
+    for col in df.columns:
+        col_type = df[col].dtype
+        non_null_count = df[col].count()
+        null_count = df[col].isnull().sum()
+        
+        # Basic statistics
+        stats = {
+            "non_null_count": non_null_count,
+            "null_count": null_count,
+            "null_percentage": (null_count / len(df)) * 100 if len(df) > 0 else 0
+        }
+        
+        # Numeric columns
+        if pd.api.types.is_numeric_dtype(col_type):
+            features["numeric_columns"].append(col)
+            stats.update({
+                "min": df[col].min(),
+                "max": df[col].max(),
+                "mean": df[col].mean(),
+                "std": df[col].std()
+            })
+        
+        # Categorical columns
+        elif df[col].nunique() < len(df) * 0.5:  # If unique values are less than 50% of total rows
+            features["categorical_columns"].append(col)
+            stats.update({
+                "unique_values": df[col].nunique(),
+                "most_common": df[col].value_counts().head(3).to_dict()
+            })
+        
+        # Date columns
+        elif pd.api.types.is_datetime64_dtype(col_type):
+            features["date_columns"].append(col)
+            stats.update({
+                "min_date": df[col].min(),
+                "max_date": df[col].max()
+            })
+        
+        # Text columns
+        else:
+            features["text_columns"].append(col)
+            stats.update({
+                "avg_length": df[col].astype(str).str.len().mean(),
+                "max_length": df[col].astype(str).str.len().max()
+            })
+        
+        features["column_stats"][col] = stats
+    
+    return features
+
+
+def analyze_data(df, features, figures=True):
+    """
+    Analyze data and return analysis results
+
+    figures=False 时只计算汇总统计，visualizations 留空，由调用方通过
+    analysis_figures（或图表缓存）另行生成。
+    """
+    analysis = {
+        "numeric_analysis": {},
+        "categorical_analysis": {},
+        "correlations": {},
+        "trends": {},
+        "visualizations": {}
+    }
+    
+    # Analyze numeric columns (summaries follow the filtered rows, not the stored profile)
+    for col in features["numeric_columns"]:
+        analysis["numeric_analysis"][col] = {
+            "summary": {
+                "min": df[col].min(),
+                "max": df[col].max(),
+                "mean": df[col].mean(),
+                "std": df[col].std()
+            },
+            "distribution": df[col].value_counts().sort_index().to_dict()
+        }
+    
+    # Analyze categorical columns
+    for col in features["categorical_columns"]:
+        value_counts = df[col].value_counts()
+        analysis["categorical_analysis"][col] = {
+            "unique_values": len(value_counts),
+            "most_common": value_counts.head(3).to_dict(),
+            "distribution": value_counts.to_dict()
+        }
+    
+    # Calculate correlations between numeric columns
+    corr_matrix = None
+    if len(features["numeric_columns"]) > 1:
+        corr_matrix = df[features["numeric_columns"]].corr()
+        analysis["correlations"] = corr_matrix.to_dict()
+    
+    # Analyze trends if there are date columns
+    for date_col in features["date_columns"]:
+        for num_col in features["numeric_columns"]:
+            trend = df.groupby(date_col)[num_col].mean()
+            analysis["trends"][f"{date_col}_{num_col}"] = trend.to_dict()
+    
+    if figures:
+        analysis["visualizations"] = analysis_figures(df, features, corr_matrix)
+    return analysis
+
+
+@track("figure")
+def analysis_figures(df, features, corr_matrix=None):
+    """
+    评估结果页面的图表：柱状图、折线图、饼图、相关性热力图与雷达图、趋势图
+
+    Args:
+        df (pd.DataFrame): 数据
+        features (dict): 数据特征配置
+        corr_matrix (pd.DataFrame, optional): 已计算的数值列相关系数矩阵
+
+    Returns:
+        dict: 图表名 -> plotly 图表
+    """
+    visualizations = {}
+    
+    for col in features["numeric_columns"]:
+        # Create bar chart
+        fig_bar = px.bar(
+            df,
+            x=df.index,
+            y=col,
+            title=f"{col}柱状图"
+        )
+        visualizations[f"{col}_bar"] = fig_bar
+        
+        # Create line chart
+        fig_line = px.line(
+            df,
+            x=df.index,
+            y=col,
+            title=f"{col}趋势图"
+        )
+        visualizations[f"{col}_line"] = fig_line
+    
+    for col in features["categorical_columns"]:
+        # Create pie chart
+        fig_pie = px.pie(
+            df,
+            names=col,
+            title=f"{col}分布"
+        )
+        visualizations[f"{col}_pie"] = fig_pie
+    
+    if len(features["numeric_columns"]) > 1:
+        if corr_matrix is None:
+            corr_matrix = df[features["numeric_columns"]].corr()
+        
+        # Create correlation heatmap
+        fig_heatmap = px.imshow(
+            corr_matrix,
+            title="相关性热力图",
+            color_continuous_scale="RdBu"
+        )
+        visualizations["correlation_heatmap"] = fig_heatmap
+        
+        # Create radar chart for top correlated features
+        top_correlations = []
+        for i in range(len(corr_matrix.columns)):
+            for j in range(i+1, len(corr_matrix.columns)):
+                if abs(corr_matrix.iloc[i,j]) > 0.3:
+                    top_correlations.append((
+                        corr_matrix.columns[i],
+                        corr_matrix.columns[j],
+                        corr_matrix.iloc[i,j]
+                    ))
+        
+        if top_correlations:
+            fig_radar = go.Figure()
+            for col1, col2, corr in top_correlations:
+                fig_radar.add_trace(go.Scatterpolar(
+                    r=[df[col1].mean(), df[col2].mean()],
+                    theta=[col1, col2],
+                    fill='toself',
+                    name=f"{col1}-{col2}"
+                ))
+            fig_radar.update_layout(
+                polar=dict(
+                    radialaxis=dict(
+                        visible=True,
+                        range=[0, max(df[col].mean() for col in features["numeric_columns"]) * 1.2]
+                    )
+                ),
+                title="相关性雷达图"
+            )
+            visualizations["correlation_radar"] = fig_radar
+    
+    # Create trend line charts if there are date columns
+    for date_col in features["date_columns"]:
+        for num_col in features["numeric_columns"]:
+            trend = df.groupby(date_col)[num_col].mean()
+            fig_trend = px.line(
+                x=trend.index,
+                y=trend.values,
+                title=f"{num_col}随时间变化趋势"
+            )
+            visualizations[f"{date_col}_{num_col}_trend"] = fig_trend
+    
+    return visualizations
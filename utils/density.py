@@ -0,0 +1,246 @@
+"""
+服务端密度渲染
+
+行数较多时，散点图的每一行都会成为浏览器中的一个点。这里在服务端把点
+按网格分箱成二维直方图（三维时为体素），只把非空网格发送给前端，图表
+大小只与分箱数有关，与行数无关。
+"""
+import numpy as np
+
+from utils.lazy_import import lazy_import
+
+go = lazy_import("plotly.graph_objects")
+plotly_subplots = lazy_import("plotly.subplots")
+
+# 行数超过该值时自动切换为密度渲染
+DENSITY_ROW_THRESHOLD = 20_000
+DEFAULT_BINS = 100
+DEFAULT_MATRIX_BINS = 50
+DEFAULT_VOXEL_BINS = 20
+DENSITY_COLORSCALE = "Viridis"
+
+
+def use_density(n_rows, threshold=DENSITY_ROW_THRESHOLD):
+    """是否应使用密度渲染"""
+    return n_rows > threshold
+
+
+def bin_edges(values, bins):
+    """
+    计算覆盖全部有限值的等宽分箱边界
+
+    Args:
+        values (np.ndarray): 数值，形状 (n,) 或 (n, d)
+        bins (int): 每个维度的分箱数
+
+    Returns:
+        list: 每个维度的边界数组
+    """
+    values = np.asarray(values, dtype="float64")
+    if values.ndim == 1:
+        values = values[:, None]
+    edges = []
+    for lo, hi in zip(np.nanmin(values, axis=0), np.nanmax(values, axis=0)):
+        if not np.isfinite(lo) or not np.isfinite(hi):
+            lo, hi = 0.0, 1.0
+        if lo == hi:
+            lo, hi = lo - 0.5, hi + 0.5
+        edges.append(np.linspace(lo, hi, bins + 1))
+    return edges
+
+
+def bin_codes(values, edges):
+    """
+    等宽分箱的箱号（直接由算术计算，避免逐点二分查找）
+
+    Args:
+        values (np.ndarray): 单列数值
+        edges (np.ndarray): 等宽分箱边界
+
+    Returns:
+        np.ndarray: 箱号，缺失值或超出范围为 -1
+    """
+    bins = len(edges) - 1
+    lo, hi = edges[0], edges[-1]
+    with np.errstate(invalid="ignore"):
+        codes = np.floor((values - lo) * (bins / (hi - lo)))
+        inside = (values >= lo) & (values <= hi)
+    codes = np.clip(np.nan_to_num(codes, nan=-1), -1, bins - 1).astype("int64")
+    codes[~inside] = -1
+    return codes
+
+
+def histogram_2d(x, y, bins=DEFAULT_BINS, edges=None):
+    """
+    二维直方图（忽略缺失值）
+
+    Args:
+        x (np.ndarray): 横轴数值
+        y (np.ndarray): 纵轴数值
+        bins (int): 每个维度的分箱数
+        edges (list, optional): 预先确定的 [x 边界, y 边界]
+
+    Returns:
+        tuple: (计数矩阵 (y 分箱, x 分箱), x 边界, y 边界)
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = x[valid], y[valid]
+    if edges is None:
+        edges = bin_edges(np.column_stack([x, y]), bins)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=edges)
+    return counts.T, x_edges, y_edges
+
+
+def heatmap_trace(counts, x_edges, y_edges, showscale=True, **kwargs):
+    """由直方图构建热力图轨迹，零计数的网格显示为空白"""
+    z = np.where(counts > 0, counts, np.nan)
+    return go.Heatmap(
+        z=z,
+        x=_centers(x_edges),
+        y=_centers(y_edges),
+        colorscale=DENSITY_COLORSCALE,
+        showscale=showscale,
+        colorbar=dict(title="行数"),
+        hovertemplate="x: %{x:.3g}<br>y: %{y:.3g}<br>行数: %{z}<extra></extra>",
+        **kwargs
+    )
+
+
+def density_heatmap(x, y, title, labels, bins=DEFAULT_BINS):
+    """
+    二维密度热力图
+
+    Args:
+        x (np.ndarray): 横轴数值
+        y (np.ndarray): 纵轴数值
+        title (str): 图标题
+        labels (tuple): (横轴标题, 纵轴标题)
+        bins (int): 每个维度的分箱数
+
+    Returns:
+        go.Figure: 热力图
+    """
+    return density_figure(histogram_2d(x, y, bins), title, labels)
+
+
+def density_figure(histogram, title, labels):
+    """由 histogram_2d 的结果构建热力图"""
+    counts, x_edges, y_edges = histogram
+    fig = go.Figure(heatmap_trace(counts, x_edges, y_edges))
+    fig.update_layout(title=title, xaxis_title=labels[0], yaxis_title=labels[1])
+    return fig
+
+
+def density_scatter_matrix(df, columns, title, bins=DEFAULT_MATRIX_BINS):
+    """
+    密度版散点矩阵：非对角线为二维直方图，对角线为一维直方图
+
+    Args:
+        df (pd.DataFrame): 数据
+        columns (list): 维度列
+        title (str): 图标题
+        bins (int): 每个维度的分箱数
+
+    Returns:
+        go.Figure: 散点矩阵
+    """
+    values = df[columns].to_numpy(dtype="float64", na_value=np.nan)
+    edges = bin_edges(values, bins)
+    n = len(columns)
+    fig = plotly_subplots.make_subplots(rows=n, cols=n, horizontal_spacing=0.02, vertical_spacing=0.02)
+
+    codes = [bin_codes(values[:, j], edges[j]) for j in range(n)]
+    pair_counts = {}
+
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                valid = codes[j] >= 0
+                counts = np.bincount(codes[j][valid], minlength=bins)
+                trace = go.Bar(x=_centers(edges[j]), y=counts, marker_color="#636efa", showlegend=False)
+            else:
+                if j < i:
+                    # Panels mirror each other across the diagonal
+                    counts = pair_counts[(j, i)].T
+                else:
+                    valid = (codes[i] >= 0) & (codes[j] >= 0)
+                    counts = np.bincount(
+                        codes[i][valid] * bins + codes[j][valid], minlength=bins * bins
+                    ).reshape(bins, bins)
+                    pair_counts[(i, j)] = counts
+                trace = heatmap_trace(counts, edges[j], edges[i], showscale=False, coloraxis="coloraxis")
+            fig.add_trace(trace, row=i + 1, col=j + 1)
+        fig.update_yaxes(title_text=columns[i], row=i + 1, col=1)
+        fig.update_xaxes(title_text=columns[i], row=n, col=i + 1)
+
+    fig.update_xaxes(showticklabels=False)
+    fig.update_yaxes(showticklabels=False)
+    fig.update_layout(
+        title=title,
+        height=max(500, 180 * n),
+        bargap=0,
+        coloraxis=dict(colorscale=DENSITY_COLORSCALE, colorbar=dict(title="行数"))
+    )
+    return fig
+
+
+def voxel_counts(points, bins=DEFAULT_VOXEL_BINS, edges=None):
+    """
+    三维体素计数，只返回非空体素
+
+    Args:
+        points (np.ndarray): 形状 (n, 3) 的坐标
+        bins (int): 每个维度的分箱数
+        edges (list, optional): 预先确定的三个维度的边界
+
+    Returns:
+        tuple: (体素中心坐标 (m, 3), 计数 (m,))
+    """
+    points = np.asarray(points, dtype="float64")
+    points = points[np.isfinite(points).all(axis=1)]
+    if edges is None:
+        edges = bin_edges(points, bins)
+    counts, _ = np.histogramdd(points, bins=edges)
+    return occupied_voxels(counts, edges)
+
+
+def occupied_voxels(counts, edges):
+    """从三维直方图中取出非空体素的中心与计数"""
+    occupied = np.nonzero(counts)
+    centers = np.column_stack([_centers(edge)[idx] for edge, idx in zip(edges, occupied)])
+    return centers, counts[occupied]
+
+
+def voxel_figure(centers, counts, title, labels):
+    """
+    三维体素密度图：每个非空体素一个点，大小与颜色表示行数
+
+    Args:
+        centers (np.ndarray): 体素中心坐标 (m, 3)
+        counts (np.ndarray): 体素计数 (m,)
+        title (str): 图标题
+        labels (tuple): 三个轴的标题
+
+    Returns:
+        go.Figure: 三维散点图
+    """
+    size = 3 + 12 * np.sqrt(counts / counts.max()) if len(counts) else []
+    fig = go.Figure(go.Scatter3d(
+        x=centers[:, 0],
+        y=centers[:, 1],
+        z=centers[:, 2],
+        mode="markers",
+        marker=dict(size=size, color=counts, colorscale=DENSITY_COLORSCALE, colorbar=dict(title="行数"), opacity=0.8),
+        hovertemplate="行数: %{marker.color}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=title,
+        scene=dict(xaxis_title=labels[0], yaxis_title=labels[1], zaxis_title=labels[2])
+    )
+    return fig
+
+
+def _centers(edges):
+    return (edges[:-1] + edges[1:]) / 2
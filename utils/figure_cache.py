@@ -0,0 +1,222 @@
+"""
+图表磁盘缓存
+
+把构建好的 plotly 图表序列化为 JSON 存入 data/cache/figures，键为
+（数据集签名与筛选条件, 图表类型, 参数, 代码版本）。数据未变时，重复访问
+和其他会话访问同一数据集都直接读取缓存，跳过计算与图表构建；代码版本取自
+构建图表的模块源码与 plotly 版本，修改这些模块后旧条目自动失效。
+
+缓存总大小超过上限（默认 256 MB，可用 DATAVIZ_FIGURE_CACHE_MB 调整，设为 0
+关闭缓存）时按最近使用时间淘汰。进程内另保留最近读取的若干条目，省去重复
+反序列化。
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from utils.lazy_import import lazy_import
+from utils.paths import FIGURE_CACHE_DIR
+from utils.timing import current_recorder
+
+go = lazy_import("plotly.graph_objects")
+pio = lazy_import("plotly.io")
+
+FIGURE_CACHE_ENV = "DATAVIZ_FIGURE_CACHE_MB"
+DEFAULT_FIGURE_CACHE_MB = 256
+# 进程内保留的已反序列化条目数
+MEMORY_ENTRIES = 32
+# 参与代码版本计算的模块：修改其中任何一个都会使已缓存的图表失效
+FIGURE_MODULES = (
+    "utils.figure_cache",
+    "utils.data_processor",
+    "utils.visualizer",
+    "utils.comparison",
+    "utils.density",
+    "utils.correlation_network",
+    "utils.parallel_coords",
+    "utils.pca"
+)
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def cache_limit():
+    """磁盘缓存上限（字节），0 表示关闭"""
+    try:
+        limit_mb = float(os.environ.get(FIGURE_CACHE_ENV, DEFAULT_FIGURE_CACHE_MB))
+    except ValueError:
+        limit_mb = DEFAULT_FIGURE_CACHE_MB
+    return max(int(limit_mb * 1024 * 1024), 0)
+
+
+@lru_cache(maxsize=1)
+def code_version():
+    """构建图表的模块源码与 plotly 版本的摘要"""
+    digest = hashlib.sha256()
+    for name in FIGURE_MODULES:
+        spec = importlib.util.find_spec(name)
+        if spec is not None and spec.origin:
+            with open(spec.origin, "rb") as f:
+                digest.update(f.read())
+    digest.update(importlib.import_module("plotly").__version__.encode())
+    return digest.hexdigest()[:16]
+
+
+def figure_key(dataset, chart, params):
+    """
+    计算缓存键
+
+    Args:
+        dataset: 数据集标识，如 (文件签名, 筛选键)
+        chart (str): 图表类型
+        params: 影响图表内容的参数
+
+    Returns:
+        str: 十六进制摘要
+    """
+    payload = json.dumps([dataset, chart, params, code_version()], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_figures(dataset, chart, params, build):
+    """
+    读取缓存的图表，未命中时调用 build 构建并写入缓存
+
+    构建期间记录的降级说明（见 utils.memory.notify_fallback）随条目保存，命中时
+    重新记录，页面照常显示。
+
+    Args:
+        dataset: 数据集标识，如 (文件签名, 筛选键)
+        chart (str): 图表类型
+        params: 影响图表内容的参数，需可 JSON 序列化
+        build (callable): 无参函数，返回 (图表字典, 附加信息字典)
+
+    Returns:
+        tuple: (图表字典, 附加信息字典)
+    """
+    limit = cache_limit()
+    if limit == 0:
+        return build()
+
+    key = figure_key(dataset, chart, params)
+    entry = _read(key)
+    if entry is None:
+        recorder = current_recorder()
+        fallbacks_before = len(recorder.fallbacks) if recorder is not None else 0
+        figures, meta = build()
+        fallbacks = recorder.fallbacks[fallbacks_before:] if recorder is not None else []
+        entry = {"figures": figures, "meta": meta, "fallbacks": list(fallbacks)}
+        _write(key, entry, limit)
+    else:
+        recorder = current_recorder()
+        if recorder is not None:
+            recorder.fallbacks.extend(entry["fallbacks"])
+    return entry["figures"], entry["meta"]
+
+
+def cache_size():
+    """返回 (条目数, 总字节数)"""
+    files = list(FIGURE_CACHE_DIR.glob("*.json"))
+    return len(files), sum(_size(path) for path in files)
+
+
+def clear_figure_cache():
+    """清空磁盘与进程内缓存"""
+    with _lock:
+        _memory.clear()
+    for path in FIGURE_CACHE_DIR.glob("*.json"):
+        path.unlink(missing_ok=True)
+
+
+def _read(key):
+    path = FIGURE_CACHE_DIR / f"{key}.json"
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            _touch(path)
+            return _memory[key]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        entry = {
+            "figures": {name: go.Figure(spec) for name, spec in data["figures"].items()},
+            "meta": data["meta"],
+            "fallbacks": data["fallbacks"]
+        }
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError):
+        # 写入中断或格式损坏的条目当作未命中，稍后被覆盖
+        return None
+    _touch(path)
+    _remember(key, entry)
+    return entry
+
+
+def _write(key, entry, limit):
+    # 图表各自序列化后拼接，避免把整个条目转成 Python 结构再编码一遍
+    figures = ", ".join(
+        f"{json.dumps(name, ensure_ascii=False)}: {pio.to_json(figure, validate=False)}"
+        for name, figure in entry["figures"].items()
+    )
+    text = (
+        f'{{"meta": {json.dumps(entry["meta"], ensure_ascii=False, default=str)}, '
+        f'"fallbacks": {json.dumps(entry["fallbacks"], ensure_ascii=False)}, '
+        f'"figures": {{{figures}}}}}'
+    )
+    _remember(key, entry)
+    if len(text.encode("utf-8")) > limit:
+        return
+    FIGURE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件再改名，并发读取的会话不会读到一半的条目
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=FIGURE_CACHE_DIR, suffix=".tmp", delete=False) as f:
+        f.write(text)
+    os.replace(f.name, FIGURE_CACHE_DIR / f"{key}.json")
+    _evict(limit)
+
+
+def _evict(limit):
+    """按最近使用时间（mtime）从旧到新删除条目，直到总大小不超过上限"""
+    entries = []
+    for path in FIGURE_CACHE_DIR.glob("*.json"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        path.unlink(missing_ok=True)
+        with _lock:
+            _memory.pop(path.stem, None)
+        total -= size
+
+
+def _remember(key, entry):
+    with _lock:
+        _memory[key] = entry
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _size(path):
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,169 @@
+"""
+各页面共享的类别筛选侧边栏
+
+筛选条件保存在 session_state 中，在页面之间共享；每个数据集的位图索引
+只构建一次并缓存，筛选得到的行选择在页面内被所有图表复用。
+"""
+import json
+
+import streamlit as st
+
+from utils.bitmap_index import BitmapIndex
+
+FILTER_STATE_KEY = "category_filters"
+MODE_LABELS = {"and": "同时满足 (AND)", "or": "满足任一 (OR)"}
+DEFAULT_FILTER_STATE = {"mode": "and", "conditions": {}}
+EMPTY_RESULT_MESSAGE = "当前筛选条件下没有数据"
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def get_bitmap_index(signature, n_rows, columns, _df):
+    """
+    按数据签名与行数缓存位图索引，_df 不参与哈希
+
+    因内存预算截断的文件在不同时间可能读入不同的行数，索引中的行号只对建索引
+    时的行数有效，因此行数也是键的一部分。
+    """
+    return BitmapIndex.build(_df, list(columns))
+
+
+def current_filter_key():
+    """返回当前筛选条件的可哈希表示，供按筛选结果缓存的计算作为键"""
+    return filter_key(st.session_state.get(FILTER_STATE_KEY, DEFAULT_FILTER_STATE))
+
+
+def filter_key(state):
+    """筛选条件的可哈希表示；DEFAULT_FILTER_STATE 对应未筛选的数据（后台预计算使用）"""
+    return json.dumps(state, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def pending_filter_state(columns):
+    """
+    本次运行将要生效的筛选条件，不渲染侧边栏
+
+    侧边栏的可选取值来自所有数据集的位图索引，要等全部数据集加载后才能渲染；
+    先到的数据集按控件的当前值（用户刚修改的值在重新运行开始时已写入
+    session_state）与保存的条件推算 render_filter_sidebar 将返回的条件。
+
+    Args:
+        columns (iterable): 本页面数据集的类别列
+
+    Returns:
+        dict: {"mode": "and" | "or", "conditions": {列名: 选中取值列表}}
+    """
+    state = st.session_state.get(FILTER_STATE_KEY, DEFAULT_FILTER_STATE)
+    conditions = dict(state["conditions"])
+    for col in columns:
+        key = f"category_filter_{col}"
+        if key in st.session_state:
+            conditions[col] = st.session_state[key]
+    return {
+        "mode": st.session_state.get("category_filter_mode", state["mode"]),
+        "conditions": {col: vals for col, vals in conditions.items() if vals}
+    }
+
+
+def apply_filter(signature, df, columns, state):
+    """
+    按给定条件筛选单个数据集，不渲染侧边栏（位图索引与 filter_datasets 共用缓存）
+
+    Args:
+        signature (tuple): 数据签名
+        df (pd.DataFrame): 数据集
+        columns (list): 类别列
+        state (dict): 筛选条件
+
+    Returns:
+        pd.DataFrame: 筛选后的数据（无筛选条件时为原 DataFrame）
+    """
+    index = get_bitmap_index(signature, len(df), tuple(columns), df)
+    bitmap = index.select(state["conditions"], state["mode"])
+    return df if bitmap is None else df.iloc[index.rows(bitmap)]
+
+
+def render_filter_sidebar(options):
+    """
+    渲染类别筛选侧边栏
+
+    Args:
+        options (dict): 列名 -> 可选取值列表
+
+    Returns:
+        dict: {"mode": "and" | "or", "conditions": {列名: 选中取值列表}}
+    """
+    state = st.session_state.get(FILTER_STATE_KEY, DEFAULT_FILTER_STATE)
+
+    st.sidebar.header("类别筛选")
+    if not options:
+        st.sidebar.caption("当前数据没有可筛选的类别列")
+        return state
+
+    mode = st.sidebar.radio(
+        "条件组合方式",
+        list(MODE_LABELS),
+        format_func=MODE_LABELS.get,
+        index=list(MODE_LABELS).index(state["mode"]),
+        key="category_filter_mode"
+    )
+
+    # Conditions on columns absent from this page's data are kept for other pages
+    conditions = dict(state["conditions"])
+    for col, values in options.items():
+        default = [v for v in conditions.get(col, []) if v in values]
+        conditions[col] = st.sidebar.multiselect(
+            col,
+            values,
+            default=default,
+            key=f"category_filter_{col}"
+        )
+
+    state = {"mode": mode, "conditions": {col: vals for col, vals in conditions.items() if vals}}
+    st.session_state[FILTER_STATE_KEY] = state
+    return state
+
+
+def filter_datasets(datasets):
+    """
+    为一个或多个数据集渲染共享筛选侧边栏并返回筛选后的数据
+
+    Args:
+        datasets (dict): 名称 -> (数据签名, DataFrame, 类别列列表)
+
+    Returns:
+        dict: 名称 -> 筛选后的 DataFrame（无筛选条件时为原 DataFrame）
+    """
+    indexes = {
+        name: get_bitmap_index(signature, len(df), tuple(columns), df)
+        for name, (signature, df, columns) in datasets.items()
+    }
+
+    options = {}
+    for index in indexes.values():
+        for col in index.columns:
+            options.setdefault(col, set()).update(index.values(col))
+    options = {col: sorted(values, key=str) for col, values in options.items()}
+
+    spec = render_filter_sidebar(options)
+
+    filtered = {}
+    for name, (signature, df, columns) in datasets.items():
+        filtered[name] = apply_filter(signature, df, columns, spec)
+        if filtered[name] is not df:
+            st.sidebar.caption(f"{name}: 筛选后 {len(filtered[name])} / {len(df)} 行")
+    return filtered
+
+
+def warn_empty(filtered):
+    """
+    筛选后没有剩余行时在页面上给出提示
+
+    Args:
+        filtered (dict): 名称 -> 筛选后的 DataFrame
+
+    Returns:
+        bool: 是否有数据集被筛选为空（为 True 时调用方应跳过依赖数据的部分）
+    """
+    empty = [name for name, df in filtered.items() if df.empty]
+    if empty:
+        st.warning(f"{EMPTY_RESULT_MESSAGE}：{'、'.join(empty)}，请调整侧边栏的类别筛选")
+    return bool(empty)
@@ -0,0 +1,86 @@
+"""
+页面片段（局部重新运行）
+
+用 fragment 装饰的函数构成页面中可独立重新运行的片段：片段内的控件变化只
+重新运行该函数，而不是整个页面（不再重新列目录、读文件、计算其他图表）。
+片段所需的数据通过参数显式传入。
+
+st.fragment 自 streamlit 1.37 起提供，之前的版本回退到 st.experimental_fragment，
+都没有时按普通函数执行（整页重新运行）。片段内不能写侧边栏，共享筛选侧边栏
+须在片段之外渲染。
+
+只有片段重新运行时没有页面级的计时记录，这里为其单独记录一次运行，页面名为
+"页面名:函数名"（页面名取装饰时正在运行的页面）；定时重新运行的片段不记录。
+是否只有片段重新运行取自 streamlit 的运行上下文，而不是看线程上有没有记录器：
+被中断的整页运行不会执行 end_page，记录器可能残留在线程上。
+"""
+import functools
+
+import streamlit as st
+
+from utils.timing import begin_run, current_recorder, discard_run, end_run
+
+_st_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def fragments_supported():
+    """当前 streamlit 是否支持片段"""
+    return _st_fragment is not None
+
+
+def fragment(func=None, *, run_every=None):
+    """
+    把函数声明为可独立重新运行的页面片段
+
+    可直接作为装饰器使用，也可带参数：@fragment(run_every=2)。
+
+    Args:
+        func (callable): 渲染片段的函数
+        run_every (float, optional): 定时重新运行的间隔（秒），用于显示后台进度
+
+    Returns:
+        callable: 包装后的函数
+    """
+    if func is None:
+        return lambda f: fragment(f, run_every=run_every)
+    if _st_fragment is None:
+        return func
+    if run_every is not None:
+        return _st_fragment(func, run_every=run_every)
+
+    recorder = current_recorder()
+    run_name = f"{recorder.page}:{func.__name__}" if recorder is not None else func.__name__
+
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        if not _fragment_rerun():
+            return func(*args, **kwargs)
+        # 片段单独重新运行：页面脚本的其余部分（含 begin_page）不会执行
+        discard_run()
+        begin_run(run_name, _session_id())
+        try:
+            return func(*args, **kwargs)
+        finally:
+            end_run()
+
+    return _st_fragment(timed)
+
+
+def _fragment_rerun():
+    """本次运行是否只重新运行片段"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return False
+    if not hasattr(ctx, "fragment_ids_this_run"):
+        # 较早的 streamlit 没有该字段，只能按线程上是否有记录器判断
+        return current_recorder() is None
+    return bool(ctx.fragment_ids_this_run)
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
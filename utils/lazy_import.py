@@ -0,0 +1,108 @@
+"""
+重量级依赖的延迟导入与后台预热
+
+lazy_import 返回一个模块代理：导入语句本身几乎不耗时，第一次访问其属性时
+才通过常规导入机制加载真实模块（受导入锁保护，可与预热线程并发）。
+warm_up 在首页渲染完成后用后台线程预先导入这些模块，用户打开分析页面时
+它们通常已经加载完毕。
+"""
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import types
+
+# 设置为 0 / false / no / off 时关闭启动预热
+WARMUP_ENV = "DATAVIZ_WARMUP"
+
+# 按首次使用的大致顺序排列
+HEAVY_MODULES = (
+    "plotly.express",
+    "plotly.graph_objects",
+    "plotly.subplots",
+    "openpyxl",
+    "scipy.stats",
+    "scipy.special",
+    "sklearn.decomposition",
+    "sklearn.preprocessing",
+    "sklearn.cluster"
+)
+
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+
+
+class LazyModule(types.ModuleType):
+    """首次访问属性时才导入的模块代理"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._lazy_target = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_target"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_target"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """
+    延迟导入模块
+
+    Args:
+        name (str): 模块全名，如 "plotly.express"
+
+    Returns:
+        module: 已导入时直接返回该模块，否则返回首次访问属性时才加载的代理
+
+    Raises:
+        ImportError: 顶层包未安装
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name.partition(".")[0]) is None:
+        raise ImportError(f"No module named '{name}'")
+    return LazyModule(name)
+
+
+def warmup_enabled():
+    """是否启用启动预热（默认启用）"""
+    return os.environ.get(WARMUP_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def warm_up(modules=HEAVY_MODULES):
+    """
+    在后台守护线程中预先导入重量级模块，每个进程只启动一次
+
+    Args:
+        modules (tuple): 需要预热的模块
+
+    Returns:
+        threading.Thread: 预热线程（已启动过时返回原线程）
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(
+                target=_import_all, args=(tuple(modules),), name="dataviz-warmup", daemon=True
+            )
+            _warmup_thread.start()
+    return _warmup_thread
+
+
+def _import_all(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            # Optional dependencies may be missing; pages report that when they need them
+            continue
@@ -0,0 +1,182 @@
+"""
+分阶段内存统计与内存预算
+
+track 记录加载、特征分析、清洗、PCA、图表构建等阶段前后的进程常驻内存
+（RSS），开启 tracemalloc 时同时记录阶段内的 Python 分配峰值，结果写入
+当前运行的计时记录（见 utils.timing），随计时日志一起落盘。
+
+部署环境按进程 RSS 限制内存（默认 2 GB，可用 DATAVIZ_MEMORY_BUDGET_MB
+调整）。各阶段开始前按数据规模估算峰值，超出剩余预算时由调用方改用
+抽样或分块方式，并通过 notify_fallback 记录原因，页面以警告形式显示，
+而不是让进程因内存不足被杀掉。
+"""
+import os
+import sys
+import tracemalloc
+import warnings
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:  # 可选依赖，缺失时从 /proc 读取
+    psutil = None
+
+from utils.timing import current_recorder
+
+MEMORY_BUDGET_ENV = "DATAVIZ_MEMORY_BUDGET_MB"
+DEFAULT_MEMORY_BUDGET_MB = 2048
+# 设置为 1 / true / yes / on 时用 tracemalloc 统计阶段内的分配峰值（会拖慢分配）
+TRACEMALLOC_ENV = "DATAVIZ_TRACEMALLOC"
+
+# 各阶段峰值相对于数据本身（行数 × 列数 × 8 字节）的倍数，按 tracemalloc 实测取整
+STAGE_FACTORS = {
+    "load": 10,         # openpyxl 逐单元格解析
+    "profile": 2,
+    "clean": 3,
+    "pca": 3,           # 标准化副本 + SVD
+    "pca_chunked": 1,   # 分块协方差只需数值矩阵本身
+    "figure": 32        # 逐点绘制的图表序列化为 JSON
+}
+# 抽样降级时至少保留的行数
+MIN_SAMPLE_ROWS = 1_000
+
+MB = 1024 * 1024
+
+
+def memory_budget():
+    """进程内存预算（字节）"""
+    try:
+        budget_mb = float(os.environ.get(MEMORY_BUDGET_ENV, DEFAULT_MEMORY_BUDGET_MB))
+    except ValueError:
+        budget_mb = DEFAULT_MEMORY_BUDGET_MB
+    return int(budget_mb * MB)
+
+
+def current_rss():
+    """当前进程的常驻内存（字节），无法获取时返回 0"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss 是峰值而非当前值；macOS 上单位为字节，Linux 上为 KB
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return 0
+
+
+def headroom():
+    """距离预算还剩多少字节"""
+    return memory_budget() - current_rss()
+
+
+def projected_bytes(stage, rows, cols):
+    """
+    估算某阶段处理 rows × cols 数据时的额外峰值内存
+
+    Args:
+        stage (str): STAGE_FACTORS 中的阶段名
+        rows (int): 行数
+        cols (int): 列数
+
+    Returns:
+        int: 估算字节数
+    """
+    return int(rows) * int(cols) * 8 * STAGE_FACTORS[stage]
+
+
+def fits_budget(stage, rows, cols):
+    """某阶段处理 rows × cols 数据时预计是否不超过剩余预算"""
+    return projected_bytes(stage, rows, cols) <= headroom()
+
+
+def affordable_rows(stage, rows, cols):
+    """
+    剩余预算内该阶段最多能处理的行数（不少于 MIN_SAMPLE_ROWS，不超过 rows）
+    """
+    per_row = max(projected_bytes(stage, 1, cols), 1)
+    return int(min(rows, max(MIN_SAMPLE_ROWS, headroom() // per_row)))
+
+
+def tracemalloc_enabled():
+    return os.environ.get(TRACEMALLOC_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+@contextmanager
+def track(stage, **meta):
+    """
+    统计一个阶段的内存：开始与结束时的 RSS，以及（开启 tracemalloc 时）阶段内的分配峰值
+
+    也可作为装饰器使用。tracemalloc 峰值在阶段开始时重置，嵌套使用时外层的峰值
+    只反映内层结束之后的部分。
+
+    Args:
+        stage (str): 阶段名，如 "load"、"profile"、"clean"、"pca"、"figure"
+        **meta: 附加信息
+    """
+    recorder = current_recorder()
+    if recorder is None:
+        yield
+        return
+    trace = tracemalloc_enabled()
+    if trace:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        traced_start = tracemalloc.get_traced_memory()[0]
+    rss_start = current_rss()
+    try:
+        yield
+    finally:
+        rss_end = current_rss()
+        entry = {
+            "stage": stage,
+            "rss_mb": round(rss_end / MB, 1),
+            "rss_delta_mb": round((rss_end - rss_start) / MB, 1)
+        }
+        if trace:
+            entry["peak_mb"] = round((tracemalloc.get_traced_memory()[1] - traced_start) / MB, 1)
+        if meta:
+            entry["meta"] = {key: str(value) for key, value in meta.items()}
+        recorder.memory.append(entry)
+
+
+def notify_fallback(stage, message):
+    """
+    记录一次因内存预算而改用抽样/分块方式的降级
+
+    有当前运行时记入运行记录（页面用 show_fallbacks 显示），否则发出 ResourceWarning。
+    """
+    recorder = current_recorder()
+    if recorder is None:
+        warnings.warn(message, ResourceWarning, stacklevel=2)
+        return
+    recorder.fallbacks.append({"stage": stage, "message": message})
+
+
+def take_fallbacks():
+    """返回当前运行中尚未显示的降级说明"""
+    recorder = current_recorder()
+    if recorder is None:
+        return []
+    pending = recorder.fallbacks[recorder.fallbacks_shown:]
+    recorder.fallbacks_shown = len(recorder.fallbacks)
+    return [fallback["message"] for fallback in pending]
+
+
+def show_fallbacks():
+    """在页面上以警告形式显示尚未显示的降级说明"""
+    import streamlit as st
+
+    for message in take_fallbacks():
+        st.warning(message)
+
+
+def format_budget():
+    """预算与当前用量的简短描述，用于降级说明"""
+    return f"内存预算 {memory_budget() / MB:.0f} MB，当前已用 {current_rss() / MB:.0f} MB"
@@ -0,0 +1,365 @@
+"""
+OLAP 多维数据立方体
+
+在数据导入时，对类别维度（如 Account × business_unit × Scenario × Year）的
+全部组合或指定的维度格预先计算 sum/count/min/max 汇总。切片、切块查询直接
+读取立方体中最小的可用汇总表，不再对原始数据做布尔掩码扫描；追加新行时只需
+汇总新行并与已有汇总表合并。立方体记录已汇总行的摘要，重新导入的数据以这些
+行开头（在原工作簿末尾追加了行）时可用 extends 判断，只追加新增的行。
+"""
+import itertools
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 每个度量在汇总表中保存的统计量（mean 在查询时由 sum/count 推导）
+STORED_STATS = ("sum", "count", "min", "max")
+RESULT_STATS = ("sum", "count", "mean", "min", "max")
+ROWS_KEY = ("__rows__", "count")
+MISSING_LABEL = "未知"
+
+
+def suggest_dimensions(df, features, max_cardinality=50):
+    """
+    根据特征配置推荐立方体维度
+
+    类别型列全部作为维度；取值较少的整数列（如 Year）也作为维度。
+
+    Args:
+        df (pd.DataFrame): 原始数据
+        features (dict): 数据特征配置
+        max_cardinality (int): 整数列作为维度时允许的最大唯一值数量
+
+    Returns:
+        list: 维度列名
+    """
+    dimensions = [col for col in features.get("categorical_columns", []) if col in df.columns]
+    for col in features.get("numeric_columns", []):
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col].dtype):
+            if df[col].nunique() <= max_cardinality:
+                dimensions.append(col)
+    return dimensions
+
+
+def suggest_measures(df, features, dimensions):
+    """返回除维度外的数值型列，作为立方体的度量"""
+    return [
+        col for col in features.get("numeric_columns", [])
+        if col in df.columns and col not in dimensions
+    ]
+
+
+def lattice_up_to(dimensions, max_size):
+    """
+    生成维度数不超过 max_size 的维度格（始终包含全部维度的基础汇总表）
+
+    Args:
+        dimensions (list): 维度列名
+        max_size (int): 单个汇总表允许的最大维度数
+
+    Returns:
+        list: 维度组合列表
+    """
+    lattice = [
+        combo
+        for size in range(min(max_size, len(dimensions)) + 1)
+        for combo in itertools.combinations(dimensions, size)
+    ]
+    lattice.append(tuple(dimensions))
+    return lattice
+
+
+class OLAPCube:
+    """预聚合的多维数据立方体"""
+
+    def __init__(self, dimensions, measures, lattice=None):
+        """
+        Args:
+            dimensions (list): 维度列名
+            measures (list): 度量列名（数值型）
+            lattice (list, optional): 需要物化的维度组合，默认为全部组合
+        """
+        if not dimensions:
+            raise ValueError("立方体至少需要一个维度")
+        if not measures:
+            raise ValueError("立方体至少需要一个度量")
+
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self.row_count = 0
+        # 已汇总行（含行号）的哈希之和，按 2^64 取模，可逐批累加
+        self.row_digest = 0
+        self.cuboids = {}
+        self._indexes = {}
+
+        if lattice is None:
+            lattice = lattice_up_to(self.dimensions, len(self.dimensions))
+        order = {dim: i for i, dim in enumerate(self.dimensions)}
+        normalized = set()
+        for combo in lattice:
+            unknown = set(combo) - set(order)
+            if unknown:
+                raise KeyError(f"未知维度: {', '.join(map(str, unknown))}")
+            normalized.add(tuple(sorted(set(combo), key=order.get)))
+        # 基础汇总表用于回答任意查询，也是增量更新的合并基准
+        normalized.add(tuple(self.dimensions))
+        # 维度多的汇总表在前，便于由最小的父表上卷得到子表
+        self.lattice = sorted(normalized, key=lambda combo: (-len(combo), [order[d] for d in combo]))
+
+        self._stored_columns = pd.MultiIndex.from_tuples(
+            [(m, stat) for m in self.measures for stat in STORED_STATS] + [ROWS_KEY]
+        )
+        self.result_columns = pd.MultiIndex.from_tuples(
+            [(m, stat) for m in self.measures for stat in RESULT_STATS] + [ROWS_KEY]
+        )
+        n_measures = len(self.measures)
+        self._sum_idx = np.arange(n_measures) * len(STORED_STATS)
+        self._count_idx = self._sum_idx + 1
+        self._min_idx = self._sum_idx + 2
+        self._max_idx = self._sum_idx + 3
+        self._additive_idx = np.r_[self._sum_idx, self._count_idx, len(self._stored_columns) - 1]
+
+    @classmethod
+    def build(cls, df, dimensions, measures, lattice=None):
+        """由原始数据构建立方体"""
+        cube = cls(dimensions, measures, lattice)
+        cube.append(df)
+        return cube
+
+    def append(self, df):
+        """
+        增量追加新行
+
+        只对新行做一次分组汇总，再与已有汇总表按维度合并，代价与汇总表大小
+        相关，而与历史原始数据量无关。
+
+        Args:
+            df (pd.DataFrame): 新追加的原始数据行
+
+        Returns:
+            OLAPCube: 自身，便于链式调用
+        """
+        if df.empty:
+            return self
+
+        self.row_digest = (self.row_digest + self._digest(df, self.row_count)) % 2 ** 64
+        delta = self._materialize(self._aggregate_base(df))
+        for combo, table in delta.items():
+            if combo in self.cuboids:
+                table = self._combine(pd.concat([self.cuboids[combo], table]), combo)
+            self.cuboids[combo] = table
+            self._indexes[combo] = _CuboidIndex(table, combo)
+        self.row_count += len(df)
+        return self
+
+    def extends(self, df):
+        """
+        判断 df 是否以立方体已汇总的行开头（维度与度量列逐行相同）
+
+        成立时只需对 df.iloc[row_count:] 调用 append，结果与由 df 重新构建相同。
+
+        Args:
+            df (pd.DataFrame): 新的完整数据
+
+        Returns:
+            bool
+        """
+        if len(df) < self.row_count or not set(self.dimensions + self.measures) <= set(df.columns):
+            return False
+        # 早期版本保存的立方体没有摘要
+        digest = getattr(self, "row_digest", None)
+        return digest is not None and self._digest(df.iloc[:self.row_count], 0) == digest
+
+    def query(self, filters=None, group_by=None):
+        """
+        切片/切块查询
+
+        查询只读取预先汇总好的 numpy 数组：过滤是对维度编码的向量化比较，
+        再分组通过 reduceat 完成，全部维度取单值时直接哈希定位到一行。
+
+        Args:
+            filters (dict, optional): 维度 -> 取值（单个值或取值列表）
+            group_by (list, optional): 结果按这些维度分组
+
+        Returns:
+            pd.Series | pd.DataFrame: 未分组时返回 (度量, 统计量) 索引的 Series，
+            否则返回按 group_by 索引的 DataFrame
+        """
+        filters = dict(filters or {})
+        group_by = list(group_by or [])
+        needed = set(filters) | set(group_by)
+        unknown = needed - set(self.dimensions)
+        if unknown:
+            raise KeyError(f"未知维度: {', '.join(map(str, unknown))}")
+
+        combo = self._best_cuboid(needed)
+        cuboid = self._indexes[combo]
+
+        # 快速路径：汇总表的所有维度都被指定为单个取值
+        scalar = all(not _is_list_like(v) for v in filters.values())
+        if not group_by and scalar and set(filters) == set(combo):
+            pos = cuboid.lookup.get(tuple(filters[d] for d in combo))
+            if pos is None:
+                return self._empty_result()
+            return pd.Series(self._finalize(cuboid.values[pos:pos + 1])[0], index=self.result_columns)
+
+        values, codes = cuboid.values, cuboid.codes
+        if filters:
+            mask = np.ones(len(values), dtype=bool)
+            for dim, value in filters.items():
+                j = combo.index(dim)
+                wanted = list(value) if _is_list_like(value) else [value]
+                wanted_codes = [cuboid.level_maps[j][v] for v in wanted if v in cuboid.level_maps[j]]
+                mask &= np.isin(codes[:, j], wanted_codes)
+            values, codes = values[mask], codes[mask]
+
+        if not group_by:
+            if len(values) == 0:
+                return self._empty_result()
+            rolled = self._reduce(values, np.array([0]))
+            return pd.Series(self._finalize(rolled)[0], index=self.result_columns)
+
+        positions = [combo.index(dim) for dim in group_by]
+        shape = [len(cuboid.levels[j]) for j in positions]
+        if len(values) == 0:
+            return pd.DataFrame(columns=self.result_columns)
+        flat = np.ravel_multi_index(codes[:, positions].T, shape)
+        groups, inverse = np.unique(flat, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        starts = np.flatnonzero(np.r_[True, np.diff(inverse[order]) != 0])
+        rolled = self._reduce(values[order], starts)
+
+        group_codes = np.unravel_index(groups, shape)
+        arrays = [cuboid.levels[j][c] for j, c in zip(positions, group_codes)]
+        if len(arrays) == 1:
+            index = pd.Index(arrays[0], name=group_by[0])
+        else:
+            index = pd.MultiIndex.from_arrays(arrays, names=group_by)
+        return pd.DataFrame(self._finalize(rolled), index=index, columns=self.result_columns)
+
+    def dimension_values(self, dim):
+        """返回某个维度的全部取值"""
+        base = self.cuboids.get(tuple(self.dimensions))
+        if base is None:
+            return []
+        return sorted(base.index.get_level_values(dim).unique().tolist(), key=str)
+
+    def save(self, path):
+        """将立方体序列化到磁盘"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path):
+        """从磁盘加载立方体，文件不存在时返回 None"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def _digest(self, df, start):
+        """df 各行（行号从 start 起）的维度与度量列哈希之和"""
+        rows = df[self.dimensions + self.measures].set_axis(pd.RangeIndex(start, start + len(df)))
+        hashes = pd.util.hash_pandas_object(rows, index=True).to_numpy()
+        return int(hashes.sum(dtype=np.uint64))
+
+    def _aggregate_base(self, df):
+        """对原始数据按全部维度分组，得到基础汇总表"""
+        keys = {dim: df[dim].astype(object).where(df[dim].notna(), MISSING_LABEL) for dim in self.dimensions}
+        measures = df[self.measures].apply(pd.to_numeric, errors="coerce")
+        work = measures.assign(**keys)
+        grouped = work.groupby(self.dimensions, sort=True, observed=True)
+        table = grouped[self.measures].agg(list(STORED_STATS))
+        table[ROWS_KEY] = grouped.size()
+        return table.reindex(columns=self._stored_columns)
+
+    def _materialize(self, base):
+        """由基础汇总表上卷出维度格中的全部汇总表"""
+        tables = {tuple(self.dimensions): base}
+        for combo in self.lattice:
+            if combo in tables:
+                continue
+            parents = [c for c in tables if set(combo) <= set(c)]
+            parent = min(parents, key=lambda c: len(tables[c]))
+            tables[combo] = self._combine(tables[parent], combo)
+        return tables
+
+    def _combine(self, table, dims):
+        """按 dims 对汇总表再次上卷：sum/count 相加，min/max 取极值"""
+        stats = table.columns.get_level_values(1)
+        additive = table.columns[np.isin(stats, ("sum", "count"))]
+        minimum = table.columns[stats == "min"]
+        maximum = table.columns[stats == "max"]
+
+        if dims:
+            grouped = table.groupby(level=list(dims), sort=True)
+            parts = [grouped[additive].sum(), grouped[minimum].min(), grouped[maximum].max()]
+        else:
+            parts = [
+                table[additive].sum().to_frame().T,
+                table[minimum].min().to_frame().T,
+                table[maximum].max().to_frame().T
+            ]
+        return pd.concat(parts, axis=1).reindex(columns=self._stored_columns)
+
+    def _reduce(self, values, starts):
+        """对按组排序的汇总数组做分段上卷，starts 为每组的起始行"""
+        rolled = np.empty((len(starts), values.shape[1]))
+        rolled[:, self._additive_idx] = np.add.reduceat(values[:, self._additive_idx], starts, axis=0)
+        rolled[:, self._min_idx] = np.fmin.reduceat(values[:, self._min_idx], starts, axis=0)
+        rolled[:, self._max_idx] = np.fmax.reduceat(values[:, self._max_idx], starts, axis=0)
+        return rolled
+
+    def _finalize(self, values):
+        """由存储的统计量计算查询结果（补充 mean 列）"""
+        sums = values[:, self._sum_idx]
+        counts = values[:, self._count_idx]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        per_measure = np.stack(
+            [sums, counts, means, values[:, self._min_idx], values[:, self._max_idx]],
+            axis=2
+        ).reshape(len(values), -1)
+        return np.hstack([per_measure, values[:, -1:]])
+
+    def _best_cuboid(self, needed):
+        """选择包含所需维度且行数最少的已物化汇总表"""
+        candidates = [c for c in self.cuboids if needed <= set(c)]
+        return min(candidates, key=lambda c: (len(self.cuboids[c]), len(c)))
+
+    def _empty_result(self):
+        values = np.zeros((1, len(self._stored_columns)))
+        values[:, self._min_idx] = np.nan
+        values[:, self._max_idx] = np.nan
+        return pd.Series(self._finalize(values)[0], index=self.result_columns)
+
+
+class _CuboidIndex:
+    """汇总表的 numpy 视图：维度编码、取值映射和单行哈希索引"""
+
+    def __init__(self, table, combo):
+        self.values = table.to_numpy(dtype="float64")
+        if not combo:
+            self.codes = np.empty((len(table), 0), dtype=np.intp)
+            self.levels = []
+        elif isinstance(table.index, pd.MultiIndex):
+            self.codes = np.column_stack([np.asarray(c, dtype=np.intp) for c in table.index.codes])
+            self.levels = [np.asarray(level, dtype=object) for level in table.index.levels]
+        else:
+            codes, uniques = pd.factorize(table.index, sort=True)
+            self.codes = codes.astype(np.intp).reshape(-1, 1)
+            self.levels = [np.asarray(uniques, dtype=object)]
+        self.level_maps = [{value: code for code, value in enumerate(level)} for level in self.levels]
+        self.lookup = {
+            tuple(level[c] for level, c in zip(self.levels, row)): pos
+            for pos, row in enumerate(self.codes.tolist())
+        }
+
+
+def _is_list_like(value):
+    return isinstance(value, (list, tuple, set, frozenset, np.ndarray, pd.Index, pd.Series))
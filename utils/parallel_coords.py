@@ -0,0 +1,160 @@
+"""
+平行坐标图的抽样与聚类渲染
+
+行数较多时每行一条折线既慢又无法辨认。这里先用 MiniBatchKMeans 对标准化
+后的数据聚类，然后只绘制各簇的中心，或在行数预算内按簇分层抽样，折线
+按簇着色。坐标轴范围始终取自全部数据，抽样后的图与全量图可以直接对照。
+"""
+import numpy as np
+import pandas as pd
+
+from utils.lazy_import import lazy_import
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+
+# 行数不超过该值时直接绘制全部行
+PARALLEL_ROW_BUDGET = 2_000
+DEFAULT_CLUSTERS = 8
+# 聚类模型最多在这么多行上拟合，其余行只做最近中心分配
+CLUSTER_FIT_ROWS = 100_000
+PARALLEL_MODES = {
+    "auto": "自动",
+    "all": "全部行",
+    "sample": "分层抽样",
+    "centroids": "聚类中心"
+}
+CLUSTER_COLORSCALE = "Turbo"
+
+
+def cluster_rows(df, columns, n_clusters=DEFAULT_CLUSTERS, seed=0):
+    """
+    用 MiniBatchKMeans 对数值列聚类（含缺失值的行不参与，标签为 -1）
+
+    Args:
+        df (pd.DataFrame): 数据
+        columns (list): 数值列
+        n_clusters (int): 簇数量
+        seed (int): 随机种子
+
+    Returns:
+        dict: {"labels": 每行的簇标签, "centroids": 原始量纲下的簇中心 DataFrame, "sizes": 各簇行数}
+    """
+    from sklearn.cluster import MiniBatchKMeans
+
+    values = df[columns].to_numpy(dtype="float64", na_value=np.nan)
+    complete = ~np.isnan(values).any(axis=1)
+    labels = np.full(len(df), -1, dtype="int64")
+    n_clusters = max(1, min(n_clusters, int(complete.sum())))
+    if not complete.any():
+        return {"labels": labels, "centroids": pd.DataFrame(columns=columns), "sizes": np.zeros(0, dtype="int64")}
+
+    data = values[complete]
+    mean = data.mean(axis=0)
+    scale = data.std(axis=0)
+    scale[scale == 0] = 1.0
+    scaled = (data - mean) / scale
+    fit_rows = scaled
+    if len(scaled) > CLUSTER_FIT_ROWS:
+        rng = np.random.default_rng(seed)
+        fit_rows = scaled[rng.choice(len(scaled), CLUSTER_FIT_ROWS, replace=False)]
+    model = MiniBatchKMeans(n_clusters=n_clusters, random_state=seed, batch_size=4096, n_init=3)
+    model.fit(fit_rows)
+    labels[complete] = model.predict(scaled)
+
+    centroids = pd.DataFrame(model.cluster_centers_ * scale + mean, columns=columns)
+    sizes = np.bincount(labels[complete], minlength=n_clusters)
+    return {"labels": labels, "centroids": centroids, "sizes": sizes}
+
+
+def stratified_sample(labels, budget=PARALLEL_ROW_BUDGET, seed=0):
+    """
+    按簇分层抽样，各簇按行数比例分配名额（每个非空簇至少一行）
+
+    Args:
+        labels (np.ndarray): 每行的簇标签，-1 表示不参与抽样
+        budget (int): 行数预算
+        seed (int): 随机种子
+
+    Returns:
+        np.ndarray: 抽中行的位置（升序）
+    """
+    rng = np.random.default_rng(seed)
+    valid = np.flatnonzero(labels >= 0)
+    if len(valid) <= budget:
+        return valid
+
+    clusters, counts = np.unique(labels[valid], return_counts=True)
+    quota = np.maximum(1, np.floor(counts * budget / len(valid))).astype("int64")
+    chosen = [
+        rng.choice(valid[labels[valid] == cluster], size=min(q, c), replace=False)
+        for cluster, q, c in zip(clusters, quota, counts)
+    ]
+    return np.sort(np.concatenate(chosen))
+
+
+def resolve_mode(mode, n_rows, budget=PARALLEL_ROW_BUDGET):
+    """将 "auto" 解析为实际的渲染方式：行数未超过预算时绘制全部行，否则分层抽样"""
+    if mode == "auto":
+        return "all" if n_rows <= budget else "sample"
+    return mode
+
+
+def parallel_coordinates_figure(df, columns, mode="auto", clusters=None, budget=PARALLEL_ROW_BUDGET,
+                                n_clusters=DEFAULT_CLUSTERS, title="平行坐标图"):
+    """
+    构建平行坐标图
+
+    Args:
+        df (pd.DataFrame): 数据
+        columns (list): 维度列
+        mode (str): "auto"、"all"、"sample" 或 "centroids"；auto 在行数超过预算时使用分层抽样
+        clusters (dict, optional): cluster_rows 的结果，未提供时按需计算
+        budget (int): 抽样的行数预算
+        n_clusters (int): 簇数量
+        title (str): 图标题
+
+    Returns:
+        go.Figure: 平行坐标图
+    """
+    mode = resolve_mode(mode, len(df), budget)
+    if mode == "all":
+        return px.parallel_coordinates(df, dimensions=columns, title=title)
+
+    if clusters is None:
+        clusters = cluster_rows(df, columns, n_clusters)
+    values = df[columns].apply(pd.to_numeric, errors="coerce")
+    ranges = {col: (values[col].min(), values[col].max()) for col in columns}
+
+    if mode == "centroids":
+        data = clusters["centroids"]
+        color = np.arange(len(data))
+        dimensions = [_dimension(col, data[col], ranges[col]) for col in columns]
+        dimensions.append(dict(label="簇大小", values=clusters["sizes"]))
+        title = f"{title}（{len(data)} 个聚类中心）"
+    else:
+        rows = stratified_sample(clusters["labels"], budget)
+        data = values.iloc[rows]
+        color = clusters["labels"][rows]
+        dimensions = [_dimension(col, data[col], ranges[col]) for col in columns]
+        title = f"{title}（分层抽样 {len(rows)} / {len(df)} 行）"
+
+    fig = go.Figure(go.Parcoords(
+        line=dict(
+            color=color,
+            colorscale=CLUSTER_COLORSCALE,
+            showscale=True,
+            colorbar=dict(title="簇")
+        ),
+        dimensions=dimensions
+    ))
+    fig.update_layout(title=title)
+    return fig
+
+
+def _dimension(column, values, value_range):
+    lo, hi = value_range
+    dimension = dict(label=column, values=values)
+    if pd.notna(lo) and pd.notna(hi):
+        dimension["range"] = [lo, hi]
+    return dimension
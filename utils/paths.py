@@ -0,0 +1,21 @@
+"""
+数据目录
+
+所有页面和工具共用的数据目录。默认为仓库下的 data/，可用环境变量
+DATAVIZ_DATA_DIR 指向其他位置（如负载测试使用的临时目录），需在导入
+本模块之前设置。
+"""
+import os
+from pathlib import Path
+
+DATA_DIR_ENV = "DATAVIZ_DATA_DIR"
+DATA_DIR = Path(os.environ.get(DATA_DIR_ENV) or Path(__file__).parent.parent / "data")
+
+UPLOAD_DIR = DATA_DIR / "uploaded_excel"
+CLEANED_DIR = DATA_DIR / "cleaned_excel"
+FEATURES_DIR = DATA_DIR / "features"
+SUMMARIES_DIR = DATA_DIR / "summaries"
+CUBES_DIR = DATA_DIR / "cubes"
+LOGS_DIR = DATA_DIR / "logs"
+FIGURE_CACHE_DIR = DATA_DIR / "cache" / "figures"
+COLUMNAR_CACHE_DIR = DATA_DIR / "cache" / "columnar"
@@ -0,0 +1,205 @@
+"""
+主成分分析
+
+数据量较小时直接使用 sklearn 的 StandardScaler + PCA；数据量较大时分块
+累积标准化后的协方差矩阵并做特征分解，载荷与解释方差仍为精确值，内存
+只与分块大小和列数相关。列数极多时改用分块的 IncrementalPCA。
+用于绘图的投影只对抽样后的行计算；行数较多时另外分块统计全部行投影的
+二维直方图与三维体素，供密度渲染使用。
+精确计算预计超出内存预算时改用分块协方差；连数值矩阵本身都放不下时先
+抽样，再在样本上计算，降级说明放在结果的 fallback 中。
+"""
+import numpy as np
+
+from utils.density import (
+    DEFAULT_BINS,
+    DEFAULT_VOXEL_BINS,
+    bin_edges,
+    occupied_voxels,
+    use_density
+)
+from utils.memory import affordable_rows, fits_budget, format_budget, track
+
+# 行数不超过该值时直接使用 sklearn PCA
+EXACT_MAX_ROWS = 50_000
+# 列数超过该值时协方差矩阵过大，改用 IncrementalPCA
+COVARIANCE_MAX_COLUMNS = 2_000
+DEFAULT_CHUNK_SIZE = 50_000
+DEFAULT_MAX_POINTS = 5_000
+
+
+@track("pca")
+def fit_pca(df, columns, n_components=3, max_points=DEFAULT_MAX_POINTS, chunk_size=DEFAULT_CHUNK_SIZE, seed=0):
+    """
+    对数值列做标准化后的主成分分析
+
+    与原实现一致，含缺失值的行会被剔除。
+
+    Args:
+        df (pd.DataFrame): 数据
+        columns (list): 数值列
+        n_components (int): 主成分数量
+        max_points (int): 投影结果最多保留的行数
+        chunk_size (int): 分块计算时每块的行数
+        seed (int): 抽样随机种子
+
+    Returns:
+        dict: {
+            "components": 载荷矩阵 (n_components, 列数),
+            "explained_variance": 解释方差,
+            "explained_variance_ratio": 解释方差比例,
+            "projection": 抽样行的投影 (行数, n_components),
+            "sample_index": 抽样行在原数据中的索引,
+            "n_samples": 参与计算的行数,
+            "method": 使用的计算方式,
+            "density": 全部行投影的密度（行数未超过密度渲染阈值时为 None）,
+            "fallback": 因内存预算而降级时的说明，否则为 None
+        }
+    """
+    fallback = None
+    if not fits_budget("pca_chunked", len(df), len(columns)):
+        # Not even the numeric matrix fits: fit on a uniform sample of rows
+        keep = affordable_rows("pca_chunked", len(df), len(columns))
+        rows = np.sort(np.random.default_rng(seed).choice(len(df), keep, replace=False))
+        fallback = f"PCA 数据超出内存预算（{format_budget()}），基于 {keep} / {len(df)} 行抽样计算"
+        df = df.iloc[rows, df.columns.get_indexer(columns)]
+    data = df[columns].to_numpy(dtype="float64", na_value=np.nan)
+    complete = ~np.isnan(data).any(axis=1)
+    index = df.index[complete]
+    if not complete.all():
+        data = data[complete]
+    n_samples, n_features = data.shape
+    n_components = min(n_components, n_samples, n_features)
+
+    exact = n_samples <= EXACT_MAX_ROWS
+    if exact and not fits_budget("pca", n_samples, n_features):
+        # Same result from chunked covariance, without the scaled copy and SVD workspace
+        exact = False
+        fallback = fallback or f"PCA 超出内存预算（{format_budget()}），改用分块协方差计算"
+
+    if exact:
+        method = "exact"
+        mean, scale, components, variance, total_variance = _fit_sklearn(data, n_components)
+    elif n_features <= COVARIANCE_MAX_COLUMNS:
+        method = "covariance"
+        mean, scale, components, variance, total_variance = _fit_covariance(data, n_components, chunk_size)
+    else:
+        method = "incremental"
+        mean, scale, components, variance, total_variance = _fit_incremental(data, n_components, chunk_size)
+
+    rng = np.random.default_rng(seed)
+    if n_samples > max_points:
+        rows = np.sort(rng.choice(n_samples, max_points, replace=False))
+    else:
+        rows = np.arange(n_samples)
+    projection = ((data[rows] - mean) / scale) @ components.T
+    density = None
+    if use_density(n_samples) and len(components) >= 2:
+        density = _projection_density(data, mean, scale, components, chunk_size)
+
+    return {
+        "components": components,
+        "explained_variance": variance,
+        "explained_variance_ratio": variance / total_variance if total_variance > 0 else np.zeros_like(variance),
+        "projection": projection,
+        "sample_index": index[rows],
+        "n_samples": n_samples,
+        "method": method,
+        "density": density,
+        "fallback": fallback
+    }
+
+
+def _fit_sklearn(data, n_components):
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    scaled = scaler.fit_transform(data)
+    pca = PCA(n_components=n_components).fit(scaled)
+    return scaler.mean_, scaler.scale_, pca.components_, pca.explained_variance_, float(scaled.var(axis=0, ddof=1).sum())
+
+
+def _fit_covariance(data, n_components, chunk_size):
+    """两遍分块扫描：先求均值，再累积中心化后的 Gram 矩阵，最后做特征分解"""
+    n_samples, n_features = data.shape
+    total = np.zeros(n_features)
+    for start in range(0, n_samples, chunk_size):
+        total += data[start:start + chunk_size].sum(axis=0)
+    mean = total / n_samples
+
+    gram = np.zeros((n_features, n_features))
+    for start in range(0, n_samples, chunk_size):
+        centered = data[start:start + chunk_size] - mean
+        gram += centered.T @ centered
+
+    # Same scaling rule as StandardScaler: population std, zero std -> 1
+    scale = np.sqrt(np.diag(gram) / n_samples)
+    scale[scale == 0] = 1.0
+    covariance = gram / np.outer(scale, scale) / (n_samples - 1)
+
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    order = np.argsort(eigenvalues)[::-1][:n_components]
+    components = _flip_signs(eigenvectors[:, order].T)
+    variance = np.clip(eigenvalues[order], 0.0, None)
+    return mean, scale, components, variance, float(np.trace(covariance))
+
+
+def _fit_incremental(data, n_components, chunk_size):
+    """列数极多时使用 IncrementalPCA 逐块拟合（近似）"""
+    from sklearn.decomposition import IncrementalPCA
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    for start in range(0, len(data), chunk_size):
+        scaler.partial_fit(data[start:start + chunk_size])
+
+    # Every batch passed to partial_fit needs at least n_components rows
+    chunk_size = max(chunk_size, n_components)
+    pca = IncrementalPCA(n_components=n_components)
+    for start in range(0, len(data), chunk_size):
+        chunk = data[start:start + chunk_size]
+        if len(chunk) >= n_components:
+            pca.partial_fit(scaler.transform(chunk))
+    total_variance = float(np.sum(scaler.var_ / scaler.scale_ ** 2)) * len(data) / max(len(data) - 1, 1)
+    return scaler.mean_, scaler.scale_, _flip_signs(pca.components_), pca.explained_variance_, total_variance
+
+
+def _projection_density(data, mean, scale, components, chunk_size):
+    """
+    分块投影全部行并累积密度
+
+    Returns:
+        dict: {"histogram": (PC1 × PC2 计数, x 边界, y 边界), "voxels": (体素中心, 计数) 或 None}
+    """
+    def projections():
+        for start in range(0, len(data), chunk_size):
+            yield ((data[start:start + chunk_size] - mean) / scale) @ components.T
+
+    lo = np.full(len(components), np.inf)
+    hi = np.full(len(components), -np.inf)
+    for chunk in projections():
+        lo = np.minimum(lo, chunk.min(axis=0))
+        hi = np.maximum(hi, chunk.max(axis=0))
+    bounds = np.vstack([lo, hi])
+
+    edges_2d = bin_edges(bounds[:, :2], DEFAULT_BINS)
+    counts_2d = np.zeros((DEFAULT_BINS, DEFAULT_BINS))
+    edges_3d = bin_edges(bounds[:, :3], DEFAULT_VOXEL_BINS) if len(components) >= 3 else None
+    counts_3d = np.zeros((DEFAULT_VOXEL_BINS,) * 3) if edges_3d else None
+    for chunk in projections():
+        counts_2d += np.histogram2d(chunk[:, 0], chunk[:, 1], bins=edges_2d)[0]
+        if edges_3d:
+            counts_3d += np.histogramdd(chunk[:, :3], bins=edges_3d)[0]
+
+    return {
+        "histogram": (counts_2d.T, edges_2d[0], edges_2d[1]),
+        "voxels": occupied_voxels(counts_3d, edges_3d) if edges_3d else None
+    }
+
+
+def _flip_signs(components):
+    """使每个主成分中绝对值最大的载荷为正，与 sklearn 的符号约定一致"""
+    signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+    signs[signs == 0] = 1.0
+    return components * signs[:, None]
@@ -0,0 +1,327 @@
+"""
+上传后的后台预计算
+
+数据配置页面保存上传的工作簿后调用 enqueue_precompute，由进程内的后台线程
+按计划依次执行：读取数据、生成 SQL 查询页面使用的列式副本、特征配置、评估
+结果页面的图表（柱状图、分布、相关性热力图与雷达图）、高级可视化页面的 PCA、
+相关性网络、散点矩阵与平行坐标。数据放入 utils.data_loader 的数据集缓存，
+图表写入 utils.figure_cache，缓存键与页面未筛选时的默认参数一致，因此新数据
+集的首次访问与重复访问一样直接命中缓存；方案对比页面复用读入的数据与导入时保存的汇总向量。
+
+每个任务作为一次独立运行记录计时（页面名 precompute），构建时的降级说明随
+图表缓存保存。任务进度保存在进程内，页面用 show_precompute_progress 显示，
+支持片段时进度面板自动刷新。
+同一文件重新上传时，旧任务在当前步骤结束后放弃。
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from utils.comparison import correlation_matrix
+from utils.correlation_network import DEFAULT_THRESHOLD, correlation_network_figure
+from utils.data_loader import cache_dataset, columnar_copy, file_signature, load_dataset, loaded_signature
+from utils.data_processor import analysis_figures, analyze_data_features
+from utils.figure_cache import cached_figures
+from utils.filter_sidebar import DEFAULT_FILTER_STATE, filter_key
+from utils.fragments import fragment, fragments_supported
+from utils.parallel_coords import (
+    DEFAULT_CLUSTERS,
+    PARALLEL_MODES,
+    cluster_rows,
+    parallel_coordinates_figure,
+    resolve_mode
+)
+from utils.paths import FEATURES_DIR
+from utils.pca import fit_pca
+from utils.timing import begin_run, end_run, span
+from utils.visualizer import pca_figures, scatter_matrix_figure
+
+PRECOMPUTE_STEPS = {
+    "load": "读取数据",
+    "columnar": "列式副本",
+    "profile": "特征配置",
+    "evaluation": "评估结果图表",
+    "pca": "主成分分析",
+    "correlation_network": "相关性网络",
+    "scatter_matrix": "散点矩阵",
+    "parallel_coordinates": "平行坐标"
+}
+# 预计算与页面争用同一批 CPU，只用一个后台线程按上传顺序执行
+PRECOMPUTE_WORKERS = 1
+# 进度面板保留最近这么多个已结束的任务
+FINISHED_JOBS_KEPT = 8
+# 有任务未结束时进度面板的自动刷新间隔（秒）
+PROGRESS_REFRESH_SECONDS = 2
+
+_executor = ThreadPoolExecutor(max_workers=PRECOMPUTE_WORKERS, thread_name_prefix="precompute")
+_jobs = {}
+_lock = threading.Lock()
+
+
+class PrecomputeJob:
+    """一个工作簿的预计算任务及其进度"""
+
+    def __init__(self, file_path):
+        self.file_path = Path(file_path)
+        self.file_name = self.file_path.name
+        self.signature = file_signature(self.file_path)
+        self.status = "queued"
+        self.current = None
+        self.completed = []
+        self.error = None
+        self.cancelled = False
+        self.queued_at = time.time()
+        self.finished_at = None
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    @property
+    def progress(self):
+        return len(self.completed) / len(PRECOMPUTE_STEPS)
+
+    def describe(self):
+        """进度的简短描述"""
+        if self.status == "queued":
+            return "排队中"
+        if self.status == "running":
+            return f"{PRECOMPUTE_STEPS[self.current]}（{len(self.completed)}/{len(PRECOMPUTE_STEPS)}）"
+        if self.status == "failed":
+            return f"失败: {self.error}"
+        if self.status == "cancelled":
+            return "已取消（文件已更新）"
+        return f"完成，用时 {self.finished_at - self.queued_at:.1f} 秒"
+
+
+def enqueue_precompute(file_path):
+    """
+    为工作簿排入后台预计算任务
+
+    文件未变化且已有任务在执行时直接返回该任务；文件已更新时放弃旧任务。
+
+    Args:
+        file_path (str | Path): 上传目录中的工作簿
+
+    Returns:
+        PrecomputeJob: 任务
+    """
+    job = PrecomputeJob(file_path)
+    with _lock:
+        previous = _jobs.get(job.file_name)
+        if previous is not None and previous.active:
+            if previous.signature == job.signature:
+                return previous
+            previous.cancelled = True
+        _jobs[job.file_name] = job
+        _prune_jobs()
+    _executor.submit(run_precompute, job)
+    return job
+
+
+def precompute_jobs(file_name=None):
+    """返回预计算任务（按排队时间排序），可按文件名过滤"""
+    with _lock:
+        jobs = sorted(_jobs.values(), key=lambda job: job.queued_at)
+    if file_name is not None:
+        jobs = [job for job in jobs if job.file_name == file_name]
+    return jobs
+
+
+def run_precompute(job):
+    """
+    在当前线程中执行预计算计划
+
+    Args:
+        job (PrecomputeJob): 任务
+    """
+    if job.cancelled:
+        job.status = "cancelled"
+        return
+    job.status = "running"
+    begin_run("precompute")
+    context = {}
+    try:
+        for step in PRECOMPUTE_STEPS:
+            if job.cancelled:
+                job.status = "cancelled"
+                return
+            job.current = step
+            with span("precompute", step=step, file=job.file_name):
+                _STEP_FUNCTIONS[step](job, context)
+            job.completed.append(step)
+        job.status = "done"
+    except Exception as e:
+        job.error = f"{type(e).__name__}: {e}"
+        job.status = "failed"
+    finally:
+        job.current = None
+        job.finished_at = time.time()
+        end_run()
+
+
+def show_precompute_progress(file_name=None):
+    """
+    显示预计算进度
+
+    Args:
+        file_name (str, optional): 只显示该文件的任务；页面只在任务未结束时显示
+
+    Returns:
+        bool: 是否有未结束的任务
+    """
+    import streamlit as st
+
+    jobs = precompute_jobs(file_name)
+    active = [job for job in jobs if job.active]
+    if file_name is not None:
+        for job in active:
+            st.info(f"{job.file_name} 正在后台预计算：{job.describe()}。完成前本页按需计算，完成后直接读取缓存。")
+        return bool(active)
+
+    if not jobs:
+        return False
+    if active and fragments_supported():
+        _live_progress()
+    else:
+        _render_progress(jobs)
+        if active:
+            st.button("刷新进度", key="refresh_precompute")
+    return bool(active)
+
+
+def _render_progress(jobs):
+    import streamlit as st
+
+    st.subheader("后台预计算")
+    for job in reversed(jobs):
+        st.progress(job.progress, text=f"{job.file_name}: {job.describe()}")
+
+
+@fragment(run_every=PROGRESS_REFRESH_SECONDS)
+def _live_progress():
+    """定时刷新的进度面板，只重新运行面板本身"""
+    _render_progress(precompute_jobs())
+
+
+def _load(job, context):
+    df = load_dataset(job.file_path)
+    # 多工作表文件在评估结果页面默认选中第一个工作表，其签名带工作表名称
+    sheet_names = pd.ExcelFile(job.file_path).sheet_names
+    if len(sheet_names) > 1:
+        cache_dataset(file_signature(job.file_path, sheet_names[0]), df)
+        context["evaluation_signature"] = loaded_signature(file_signature(job.file_path, sheet_names[0]), df)
+    else:
+        context["evaluation_signature"] = loaded_signature(job.signature, df)
+    # 高级可视化页面的数据集标识（读取第一个工作表，未筛选）
+    context["dataset"] = (loaded_signature(job.signature, df), _default_filter_key())
+    context["df"] = df
+
+
+def _columnar(job, context):
+    columnar_copy(job.file_path)
+
+
+def _profile(job, context):
+    features_file = FEATURES_DIR / f"{job.file_name}.json"
+    if features_file.exists():
+        with open(features_file, 'r', encoding='utf-8') as f:
+            features = json.load(f)
+    else:
+        features = analyze_data_features(context["df"])
+    context["features"] = features
+    context["numeric_columns"] = tuple(features["numeric_columns"])
+
+
+def _evaluation(job, context):
+    df, features = context["df"], context["features"]
+    cached_figures(
+        (context["evaluation_signature"], _default_filter_key()),
+        "evaluation",
+        features,
+        lambda: (analysis_figures(df, features), {})
+    )
+
+
+def _pca(job, context):
+    df, columns = context["df"], context["numeric_columns"]
+    if len(columns) < 2:
+        return
+    n_components = min(3, len(columns))
+
+    def build():
+        pca = fit_pca(df, list(columns), n_components)
+        info = {
+            "n_samples": pca["n_samples"],
+            "n_projected": len(pca["projection"]),
+            "density": pca["density"] is not None
+        }
+        return pca_figures(pca), info
+
+    cached_figures(context["dataset"], "pca", [columns, n_components], build)
+
+
+def _correlation_network(job, context):
+    df, columns = context["df"], context["numeric_columns"]
+    if len(columns) < 2:
+        return
+
+    def build():
+        corr = correlation_matrix(df, list(columns))
+        return {"correlation_network": correlation_network_figure(corr.to_numpy(), list(columns), DEFAULT_THRESHOLD)}, {}
+
+    cached_figures(context["dataset"], "correlation_network", [columns, DEFAULT_THRESHOLD], build)
+
+
+def _scatter_matrix(job, context):
+    df, columns = context["df"], context["numeric_columns"]
+    if len(columns) < 2:
+        return
+    dimensions = list(columns[:5])
+    cached_figures(
+        context["dataset"],
+        "scatter_matrix",
+        dimensions,
+        lambda: ({"scatter_matrix": scatter_matrix_figure(df, dimensions)}, {})
+    )
+
+
+def _parallel_coordinates(job, context):
+    df = context["df"]
+    dimensions = list(context["numeric_columns"][:5])
+    if len(dimensions) < 2:
+        return
+    mode = resolve_mode(next(iter(PARALLEL_MODES)), len(df))
+
+    def build():
+        clusters = cluster_rows(df, dimensions, DEFAULT_CLUSTERS) if mode != "all" else None
+        figure = parallel_coordinates_figure(df, dimensions, mode, clusters, n_clusters=DEFAULT_CLUSTERS)
+        return {"parallel_coordinates": figure}, {}
+
+    cached_figures(context["dataset"], "parallel_coordinates", [dimensions, mode, DEFAULT_CLUSTERS], build)
+
+
+_STEP_FUNCTIONS = {
+    "load": _load,
+    "columnar": _columnar,
+    "profile": _profile,
+    "evaluation": _evaluation,
+    "pca": _pca,
+    "correlation_network": _correlation_network,
+    "scatter_matrix": _scatter_matrix,
+    "parallel_coordinates": _parallel_coordinates
+}
+
+
+def _default_filter_key():
+    return filter_key(DEFAULT_FILTER_STATE)
+
+
+def _prune_jobs():
+    finished = sorted((job for job in _jobs.values() if not job.active), key=lambda job: job.queued_at)
+    for job in finished[:max(len(finished) - FINISHED_JOBS_KEPT, 0)]:
+        del _jobs[job.file_name]
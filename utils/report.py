@@ -0,0 +1,340 @@
+"""
+无界面分析与批量报告
+
+把页面上的分析流程（特征识别、评估分析、高级可视化、方案对比）封装成
+不依赖 streamlit 的函数，供命令行工具（analysis_api.py）、本地 HTTP 接口
+（utils/api_server.py）和批量报告使用。批量报告在进程池中逐个工作簿生成，
+输出静态 JSON / HTML，并生成索引页。
+"""
+import html
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.comparison import compare_schemes
+from utils.data_loader import file_signature, load_dataset, loaded_signature
+from utils.data_processor import analysis_figures, analyze_data, analyze_data_features
+from utils.figure_cache import cached_figures
+from utils.lazy_import import lazy_import
+from utils.significance import significance_table
+from utils.visualizer import create_advanced_visualizations
+
+pio = lazy_import("plotly.io")
+
+REPORT_FORMATS = ("json", "html")
+# 批量报告的默认最大工作进程数
+DEFAULT_MAX_WORKERS = 4
+PLOTLY_JS = "plotly.min.js"
+
+
+def load_workbook(path, sheet_name=None):
+    """读取工作簿（按文件签名复用进程内已解析的数据，返回的数据不可原地修改）"""
+    return load_dataset(path, sheet_name)
+
+
+def workbook_features(path, sheet_name=None):
+    """识别工作簿各列的类型与统计特征"""
+    return analyze_data_features(load_workbook(path, sheet_name))
+
+
+def analyze_workbook(path, sheet_name=None, advanced=False):
+    """
+    对单个工作簿执行评估分析
+
+    Args:
+        path (str | Path): 工作簿路径
+        sheet_name (str, optional): 工作表名称，默认第一个工作表
+        advanced (bool): 是否同时生成高级可视化（PCA、相关性网络、散点矩阵、平行坐标）
+
+    Returns:
+        dict: {"file", "sheet", "rows", "cols", "generated_at", "features", "analysis", "figures"}，
+            figures 为 plotly 图表对象
+    """
+    df = load_workbook(path, sheet_name)
+    features = analyze_data_features(df)
+    analysis = analyze_data(df, features, figures=False)
+    del analysis["visualizations"]
+    # 未筛选的数据集用 None 作为筛选键；图表与 API 的其他请求、批量任务的其他进程共用磁盘缓存
+    dataset = (loaded_signature(file_signature(path, sheet_name), df), None)
+    figures, _ = cached_figures(dataset, "evaluation", features, lambda: (analysis_figures(df, features), {}))
+    if advanced:
+        advanced_figures, _ = cached_figures(
+            dataset, "advanced", features["numeric_columns"],
+            lambda: (create_advanced_visualizations(df, features), {})
+        )
+        figures = {**figures, **advanced_figures}
+    return {
+        "file": Path(path).name,
+        "sheet": sheet_name,
+        "rows": len(df),
+        "cols": len(df.columns),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "features": features,
+        "analysis": analysis,
+        "figures": figures,
+        "memory_fallback": df.attrs.get("memory_fallback")
+    }
+
+
+def compare_workbooks(path_a, path_b, tests=True, n_resamples=2000, confidence=0.95):
+    """
+    对比两个工作簿
+
+    Args:
+        path_a (str | Path): 方案A路径
+        path_b (str | Path): 方案B路径
+        tests (bool): 是否对共同数值列做显著性检验
+        n_resamples (int): bootstrap 重抽样次数
+        confidence (float): 置信水平
+
+    Returns:
+        dict: {"scheme_a", "scheme_b", "generated_at", "comparison", "significance"}
+    """
+    df1 = load_workbook(path_a)
+    df2 = load_workbook(path_b)
+    features1 = analyze_data_features(df1)
+    features2 = analyze_data_features(df2)
+    comparison = compare_schemes(df1, df2, features1, features2)
+    significance = None
+    if tests and comparison["numeric_comparison"]:
+        significance = significance_table(df1, df2, list(comparison["numeric_comparison"]), n_resamples, confidence)
+    return {
+        "scheme_a": Path(path_a).name,
+        "scheme_b": Path(path_b).name,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "comparison": comparison,
+        "significance": significance
+    }
+
+
+def to_jsonable(value):
+    """
+    把分析结果转换为可 JSON 序列化的结构
+
+    DataFrame 转为 {列: {行: 值}}，numpy / pandas 标量转为 Python 标量，NaN 与无穷转为 None，
+    plotly 图表转为其 JSON 结构。
+    """
+    if isinstance(value, dict):
+        return {_json_key(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, pd.DataFrame):
+        return to_jsonable(value.to_dict())
+    if isinstance(value, pd.Series):
+        return to_jsonable(value.to_dict())
+    if isinstance(value, np.ndarray):
+        return to_jsonable(value.tolist())
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if hasattr(value, "to_plotly_json"):
+        return json.loads(pio.to_json(value))
+    return value
+
+
+def report_json(report, include_figures=False):
+    """
+    报告的 JSON 文本
+
+    Args:
+        report (dict): analyze_workbook 或 compare_workbooks 的结果
+        include_figures (bool): 是否包含图表的 plotly JSON（体积较大）
+    """
+    data = dict(report)
+    if "figures" in data:
+        data["figures"] = data["figures"] if include_figures else sorted(data["figures"])
+    return json.dumps(to_jsonable(data), ensure_ascii=False, indent=2, default=str)
+
+
+def report_html(report, plotlyjs="cdn"):
+    """
+    单个工作簿报告的静态 HTML
+
+    Args:
+        report (dict): analyze_workbook 的结果
+        plotlyjs (str): plotly.js 的引用方式，"cdn"、"inline"（内嵌，约 4 MB）或同目录下的脚本文件名
+    """
+    sections = [
+        f"<h1>{html.escape(report['file'])}</h1>",
+        f"<p>{report['rows']} 行 × {report['cols']} 列，生成于 {report['generated_at']}</p>"
+    ]
+    if report.get("memory_fallback"):
+        sections.append(f"<p class='warning'>{html.escape(report['memory_fallback'])}</p>")
+
+    numeric = report["analysis"]["numeric_analysis"]
+    if numeric:
+        table = pd.DataFrame({col: data["summary"] for col, data in numeric.items()}).T
+        table.columns = ["最小值", "最大值", "平均值", "标准差"]
+        sections.append("<h2>数值型指标</h2>" + table.to_html(float_format=lambda v: f"{v:.4g}", classes="summary"))
+
+    categorical = report["analysis"]["categorical_analysis"]
+    if categorical:
+        table = pd.DataFrame({
+            col: {
+                "唯一值数量": data["unique_values"],
+                "最常见值": ", ".join(f"{k}({v})" for k, v in data["most_common"].items())
+            }
+            for col, data in categorical.items()
+        }).T
+        sections.append("<h2>类别型指标</h2>" + table.to_html(classes="summary"))
+
+    if report["figures"]:
+        sections.append("<h2>图表</h2>")
+        for i, (name, fig) in enumerate(report["figures"].items()):
+            include = {"cdn": "cdn", "inline": True}.get(plotlyjs, plotlyjs) if i == 0 else False
+            if include not in ("cdn", True, False):
+                sections.append(f"<script src='{html.escape(include)}'></script>")
+                include = False
+            sections.append(pio.to_html(fig, full_html=False, include_plotlyjs=include, div_id=f"fig-{i}"))
+
+    return _page(report["file"], "\n".join(sections))
+
+
+def write_report(report, output_dir, formats=REPORT_FORMATS, include_figures=False, plotlyjs="cdn"):
+    """
+    把单个工作簿报告写入输出目录
+
+    Returns:
+        dict: 格式 -> 输出文件路径
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(report["file"]).stem if report.get("sheet") is None else f"{Path(report['file']).stem}_{report['sheet']}"
+    outputs = {}
+    if "json" in formats:
+        outputs["json"] = output_dir / f"{stem}.json"
+        outputs["json"].write_text(report_json(report, include_figures), encoding="utf-8")
+    if "html" in formats:
+        outputs["html"] = output_dir / f"{stem}.html"
+        outputs["html"].write_text(report_html(report, plotlyjs), encoding="utf-8")
+    return outputs
+
+
+def _report_job(path, output_dir, formats, advanced, include_figures, plotlyjs):
+    """进程池中的单个任务：生成并写出一个工作簿的报告，失败时返回错误信息而不抛出"""
+    start = time.perf_counter()
+    try:
+        report = analyze_workbook(path, advanced=advanced)
+        outputs = write_report(report, output_dir, formats, include_figures, plotlyjs)
+        return {
+            "file": Path(path).name,
+            "status": "ok",
+            "rows": report["rows"],
+            "cols": report["cols"],
+            "outputs": {fmt: Path(p).name for fmt, p in outputs.items()},
+            "seconds": time.perf_counter() - start,
+            "memory_fallback": report["memory_fallback"]
+        }
+    except Exception as e:
+        return {
+            "file": Path(path).name,
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "seconds": time.perf_counter() - start
+        }
+
+
+def generate_reports(paths, output_dir, formats=REPORT_FORMATS, max_workers=None, advanced=False,
+                     include_figures=False, progress=None):
+    """
+    在进程池中为多个工作簿生成报告，并写出索引（index.json / index.html）
+
+    单个工作簿出错不会中断整批任务，错误记录在索引中。HTML 报告共用输出目录下的
+    一份 plotly.min.js，无需联网即可打开。
+
+    Args:
+        paths (list): 工作簿路径
+        output_dir (str | Path): 输出目录
+        formats (tuple): 输出格式，"json" 和/或 "html"
+        max_workers (int, optional): 最大工作进程数，默认取 DEFAULT_MAX_WORKERS 与 CPU 数的较小值
+        advanced (bool): 是否生成高级可视化
+        include_figures (bool): JSON 报告是否包含图表
+        progress (callable, optional): 每完成一个工作簿调用 progress(已完成数, 总数, 结果)
+
+    Returns:
+        list: 每个工作簿的结果（按输入顺序）
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if "html" in formats:
+        (output_dir / PLOTLY_JS).write_text(lazy_import("plotly.offline").get_plotlyjs(), encoding="utf-8")
+
+    paths = [Path(p) for p in paths]
+    workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(paths) or 1, os.cpu_count() or 1))
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_report_job, str(path), str(output_dir), tuple(formats), advanced, include_figures, PLOTLY_JS): path
+            for path in paths
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results[futures[future]] = result
+            if progress:
+                progress(done, len(paths), result)
+
+    ordered = [results[path] for path in paths]
+    index = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "formats": list(formats),
+        "reports": ordered
+    }
+    (output_dir / "index.json").write_text(json.dumps(index, ensure_ascii=False, indent=2), encoding="utf-8")
+    (output_dir / "index.html").write_text(_index_html(ordered), encoding="utf-8")
+    return ordered
+
+
+def _index_html(results):
+    rows = []
+    for result in results:
+        if result["status"] == "ok":
+            links = " ".join(
+                f"<a href='{html.escape(name)}'>{fmt.upper()}</a>" for fmt, name in result["outputs"].items()
+            )
+            detail = f"{result['rows']} 行 × {result['cols']} 列"
+            if result.get("memory_fallback"):
+                detail += f"（{html.escape(result['memory_fallback'])}）"
+        else:
+            links = ""
+            detail = f"<span class='warning'>{html.escape(result['error'])}</span>"
+        rows.append(
+            f"<tr><td>{html.escape(result['file'])}</td><td>{detail}</td>"
+            f"<td>{result['seconds']:.1f} s</td><td>{links}</td></tr>"
+        )
+    n_errors = sum(result["status"] != "ok" for result in results)
+    body = (
+        f"<h1>分析报告</h1><p>共 {len(results)} 个工作簿，失败 {n_errors} 个</p>"
+        "<table class='summary'><tr><th>文件</th><th>规模</th><th>耗时</th><th>报告</th></tr>"
+        + "".join(rows) + "</table>"
+    )
+    return _page("分析报告", body)
+
+
+def _page(title, body):
+    return (
+        "<!DOCTYPE html><html lang='zh-CN'><head><meta charset='utf-8'>"
+        f"<title>{html.escape(title)}</title>"
+        "<style>body{font-family:sans-serif;margin:2em}table.summary{border-collapse:collapse}"
+        "table.summary td,table.summary th{border:1px solid #ccc;padding:4px 8px}.warning{color:#b45309}</style>"
+        f"</head><body>{body}</body></html>"
+    )
+
+
+def _json_key(key):
+    if isinstance(key, (pd.Timestamp, datetime, date)):
+        return key.isoformat()
+    if isinstance(key, np.generic):
+        key = key.item()
+    return key if isinstance(key, (str, int, float, bool)) or key is None else str(key)
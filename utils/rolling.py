@@ -0,0 +1,91 @@
+"""
+基于前缀和的滚动统计
+
+每个 (数据集, 列) 只需计算一次前缀和与前缀平方和，之后任意窗口大小的
+滚动均值/标准差都只是一次 O(n) 的向量化差分；批量模式通过广播一次算出
+多个窗口大小的结果，便于叠加对比。
+"""
+import numpy as np
+
+# 离差平方和低于 前缀平方和 × eps × 该倍数 的窗口视为数值不稳定
+_PRECISION_MARGIN = 1e8
+
+
+class RollingStats:
+    """单列数据的滚动统计引擎（语义与 pandas rolling(window).mean()/.std() 一致）"""
+
+    def __init__(self, values):
+        """
+        Args:
+            values (array-like): 一列数值，缺失值为 NaN
+        """
+        x = np.asarray(values, dtype="float64")
+        valid = ~np.isnan(x)
+        self.n = len(x)
+        # 以均值为中心累加，降低平方和相减时的精度损失
+        self.shift = float(x[valid].mean()) if valid.any() else 0.0
+        centered = np.where(valid, x - self.shift, 0.0)
+        self._centered = centered
+        self._count = np.concatenate([[0], np.cumsum(valid)])
+        self._sum = np.concatenate([[0.0], np.cumsum(centered)])
+        self._sumsq = np.concatenate([[0.0], np.cumsum(centered * centered)])
+
+    def window(self, size, ddof=1):
+        """
+        计算单个窗口大小的滚动均值与标准差
+
+        Args:
+            size (int): 窗口大小
+            ddof (int): 标准差的自由度修正，默认与 pandas 一致为 1
+
+        Returns:
+            tuple: (均值数组, 标准差数组)，长度与原数据相同；窗口不完整或含缺失值处为 NaN
+        """
+        means, stds = self.windows([size], ddof=ddof)
+        return means[0], stds[0]
+
+    def windows(self, sizes, ddof=1):
+        """
+        批量计算多个窗口大小的滚动均值与标准差
+
+        Args:
+            sizes (list): 窗口大小列表
+            ddof (int): 标准差的自由度修正
+
+        Returns:
+            tuple: (均值矩阵, 标准差矩阵)，形状均为 (len(sizes), n)
+        """
+        sizes = np.asarray(sizes, dtype=np.int64).reshape(-1, 1)
+        end = np.arange(1, self.n + 1).reshape(1, -1)
+        start = end - sizes
+        complete = start >= 0
+        start = np.clip(start, 0, None)
+
+        count = self._count[end] - self._count[start]
+        total = self._sum[end] - self._sum[start]
+        total_sq = self._sumsq[end] - self._sumsq[start]
+        full = complete & (count == sizes)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / sizes
+            m2 = total_sq - total * mean
+
+        # 窗口内离差平方和远小于前缀和量级时，差分会损失精度，这些窗口直接重算
+        unstable = full & (sizes > ddof) & (
+            m2 < _PRECISION_MARGIN * np.finfo("float64").eps * self._sumsq[end]
+        )
+        for row in np.flatnonzero(unstable.any(axis=1)):
+            size = int(sizes[row, 0])
+            cols = np.flatnonzero(unstable[row])
+            windows = self._centered[cols[:, None] + np.arange(1 - size, 1)]
+            window_mean = windows.mean(axis=1)
+            mean[row, cols] = window_mean
+            m2[row, cols] = np.sum((windows - window_mean[:, None]) ** 2, axis=1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = m2 / (sizes - ddof)
+        var = np.where(sizes > ddof, np.clip(var, 0.0, None), np.nan)
+
+        means = np.where(full, mean + self.shift, np.nan)
+        stds = np.where(full, np.sqrt(var), np.nan)
+        return means, stds
@@ -0,0 +1,210 @@
+"""
+两个方案之间的行级差异
+
+按用户选择的键列将两个方案的行编码为同一套整数键，再用直接寻址的哈希
+索引完成连接，一次得到新增、删除和变化的行以及逐单元格的差值。结果只
+保存行号与单元格位置，明细按页取出，百万行级别的方案也可以分页浏览。
+"""
+import numpy as np
+import pandas as pd
+
+DIFF_KINDS = ("changed", "added", "removed")
+
+
+class RowDiff:
+    """按键列连接两个方案后得到的行级差异"""
+
+    def __init__(self, df1, df2, keys, value_columns):
+        self.df1 = df1
+        self.df2 = df2
+        self.keys = list(keys)
+        self.value_columns = list(value_columns)
+        self.matched_a = np.empty(0, dtype="int64")
+        self.matched_b = np.empty(0, dtype="int64")
+        self.added = np.empty(0, dtype="int64")
+        self.removed = np.empty(0, dtype="int64")
+        self.cell_rows = np.empty(0, dtype="int64")
+        self.cell_columns = np.empty(0, dtype="int64")
+        self.values_a = np.empty((0, len(self.value_columns)))
+        self.values_b = np.empty((0, len(self.value_columns)))
+        self.duplicate_keys = {"a": 0, "b": 0}
+
+    @classmethod
+    def compute(cls, df1, df2, keys, value_columns=None, tolerance=0.0):
+        """
+        计算两个方案的行级差异
+
+        键重复时按出现顺序配对：方案A中某个键的第 n 次出现与方案B中同一键的
+        第 n 次出现比较，多出的行记为新增或删除。
+
+        Args:
+            df1 (pd.DataFrame): 方案A数据
+            df2 (pd.DataFrame): 方案B数据
+            keys (list): 键列
+            value_columns (list, optional): 比较的数值列，默认取两方案共有的非键数值列
+            tolerance (float): 差值绝对值不超过该值时视为未变化
+
+        Returns:
+            RowDiff: 差异结果
+        """
+        if value_columns is None:
+            value_columns = [
+                col for col in df1.columns
+                if col in df2.columns and col not in keys
+                and pd.api.types.is_numeric_dtype(df1[col]) and pd.api.types.is_numeric_dtype(df2[col])
+            ]
+        diff = cls(df1, df2, keys, value_columns)
+
+        code_a, code_b = _encode_keys(df1, df2, diff.keys)
+        diff.duplicate_keys = {"a": _count_duplicate_keys(code_a), "b": _count_duplicate_keys(code_b)}
+        if diff.duplicate_keys["a"] or diff.duplicate_keys["b"]:
+            code_a, code_b = _combine_codes(
+                (code_a, code_b), (_occurrence(code_a), _occurrence(code_b))
+            )
+
+        # Direct-address hash index: key code -> row position on each side
+        size = int(max(code_a.max(initial=-1), code_b.max(initial=-1))) + 1
+        position_a = np.full(size, -1, dtype="int64")
+        position_b = np.full(size, -1, dtype="int64")
+        position_a[code_a] = np.arange(len(code_a))
+        position_b[code_b] = np.arange(len(code_b))
+
+        partner = position_b[code_a]
+        diff.matched_a = np.flatnonzero(partner >= 0)
+        diff.matched_b = partner[diff.matched_a]
+        diff.removed = np.flatnonzero(partner < 0)
+        diff.added = np.flatnonzero(position_a[code_b] < 0)
+
+        if diff.value_columns:
+            values_a = _numeric_values(df1, diff.value_columns)[diff.matched_a]
+            values_b = _numeric_values(df2, diff.value_columns)[diff.matched_b]
+            with np.errstate(invalid="ignore"):
+                unchanged = (np.abs(values_b - values_a) <= tolerance) | (np.isnan(values_a) & np.isnan(values_b))
+            diff.cell_rows, diff.cell_columns = np.nonzero(~unchanged)
+            diff.values_a = values_a
+            diff.values_b = values_b
+        return diff
+
+    @property
+    def changed_rows(self):
+        """存在变化单元格的匹配行序号（对应 matched_a / matched_b 的下标）"""
+        return np.unique(self.cell_rows)
+
+    def summary(self):
+        """返回各类差异的数量"""
+        return {
+            "matched": len(self.matched_a),
+            "changed_rows": len(self.changed_rows),
+            "changed_cells": len(self.cell_rows),
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "duplicate_keys_a": self.duplicate_keys["a"],
+            "duplicate_keys_b": self.duplicate_keys["b"]
+        }
+
+    def column_summary(self):
+        """
+        按列汇总变化的单元格
+
+        Returns:
+            pd.DataFrame: 每列的变化单元格数、差值合计与平均绝对差值
+        """
+        n_columns = len(self.value_columns)
+        deltas = self._deltas(slice(None))
+        finite = np.isfinite(deltas)
+        counts = np.bincount(self.cell_columns, minlength=n_columns)
+        total = np.bincount(self.cell_columns[finite], weights=deltas[finite], minlength=n_columns)
+        absolute = np.bincount(self.cell_columns[finite], weights=np.abs(deltas[finite]), minlength=n_columns)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_abs = absolute / np.bincount(self.cell_columns[finite], minlength=n_columns)
+        return pd.DataFrame(
+            {"changed_cells": counts, "delta_sum": total, "mean_abs_delta": mean_abs},
+            index=pd.Index(self.value_columns, name="column")
+        )
+
+    def n_rows(self, kind):
+        """返回某类差异明细的总行数"""
+        return {"changed": len(self.cell_rows), "added": len(self.added), "removed": len(self.removed)}[kind]
+
+    def n_pages(self, kind, page_size):
+        """返回某类差异明细的总页数"""
+        return max(1, -(-self.n_rows(kind) // page_size))
+
+    def page(self, kind, number, page_size=100):
+        """
+        取出某类差异的一页明细
+
+        Args:
+            kind (str): "changed"（逐单元格变化）、"added"（仅B有）或 "removed"（仅A有）
+            number (int): 页码，从 0 开始
+            page_size (int): 每页行数
+
+        Returns:
+            pd.DataFrame: 该页明细
+        """
+        window = slice(number * page_size, (number + 1) * page_size)
+        if kind == "added":
+            return self.df2.iloc[self.added[window]]
+        if kind == "removed":
+            return self.df1.iloc[self.removed[window]]
+
+        rows = self.cell_rows[window]
+        columns = self.cell_columns[window]
+        page = self.df1.iloc[self.matched_a[rows]][self.keys].reset_index(drop=True)
+        page["column"] = np.asarray(self.value_columns, dtype=object)[columns]
+        page["value_a"] = self.values_a[rows, columns]
+        page["value_b"] = self.values_b[rows, columns]
+        page["delta"] = self._deltas(window)
+        return page
+
+    def iter_pages(self, kind, page_size=10000):
+        """逐页产出某类差异的全部明细"""
+        for number in range(-(-self.n_rows(kind) // page_size)):
+            yield self.page(kind, number, page_size)
+
+    def _deltas(self, window):
+        rows = self.cell_rows[window]
+        columns = self.cell_columns[window]
+        return self.values_b[rows, columns] - self.values_a[rows, columns]
+
+
+def _encode_keys(df1, df2, keys):
+    """将两个方案的键列联合编码为稠密整数，相同键得到相同编码"""
+    n1 = len(df1)
+    code_a = np.zeros(n1, dtype="int64")
+    code_b = np.zeros(len(df2), dtype="int64")
+    for col in keys:
+        values = pd.concat([df1[col], df2[col]], ignore_index=True)
+        codes, _ = pd.factorize(values, use_na_sentinel=False)
+        code_a, code_b = _combine_codes((code_a, code_b), (codes[:n1], codes[n1:]))
+    return code_a, code_b
+
+
+def _combine_codes(left, right):
+    """按混合进制合并两组编码，并重新压缩为稠密编码以避免溢出"""
+    n1 = len(left[0])
+    base = int(max(right[0].max(initial=0), right[1].max(initial=0))) + 1
+    combined = np.concatenate(left) * base + np.concatenate(right)
+    dense, _ = pd.factorize(combined)
+    dense = dense.astype("int64")
+    return dense[:n1], dense[n1:]
+
+
+def _occurrence(codes):
+    """每行在相同键中的出现序号（0, 1, 2, ...）"""
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]] if len(codes) else np.empty(0, dtype=bool)
+    group_start = np.maximum.accumulate(np.where(starts, np.arange(len(codes)), 0))
+    occurrence = np.empty(len(codes), dtype="int64")
+    occurrence[order] = np.arange(len(codes)) - group_start
+    return occurrence
+
+
+def _count_duplicate_keys(codes):
+    """出现不止一次的键的数量"""
+    return int((np.bincount(codes) > 1).sum()) if len(codes) else 0
+
+
+def _numeric_values(df, columns):
+    return df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
@@ -0,0 +1,146 @@
+"""
+方案汇总向量
+
+在数据导入时为每个方案计算并保存汇总向量（矩、分位数、类别计数），
+多方案对比直接基于这些汇总向量构建差异矩阵与排名，无需重新打开原始数据。
+"""
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils.paths import SUMMARIES_DIR
+
+MOMENT_STATS = ("count", "sum", "mean", "std", "min", "max")
+QUANTILE_STATS = {0.05: "q05", 0.25: "q25", 0.5: "median", 0.75: "q75", 0.95: "q95"}
+SUMMARY_STATS = MOMENT_STATS + tuple(QUANTILE_STATS.values())
+
+
+def compute_scheme_summary(df, features):
+    """
+    计算方案的汇总向量
+
+    Args:
+        df (pd.DataFrame): 方案数据
+        features (dict): 数据特征配置
+
+    Returns:
+        dict: {"rows": 行数, "numeric": {列: {统计量: 值}}, "categorical": {列: {取值: 计数}}}
+    """
+    numeric_columns = [col for col in features.get("numeric_columns", []) if col in df.columns]
+    categorical_columns = [col for col in features.get("categorical_columns", []) if col in df.columns]
+
+    numeric = {}
+    if numeric_columns:
+        data = df[numeric_columns].apply(pd.to_numeric, errors="coerce")
+        moments = data.agg(list(MOMENT_STATS))
+        quantiles = data.quantile(list(QUANTILE_STATS))
+        for col in numeric_columns:
+            entry = {stat: _to_float(moments.at[stat, col]) for stat in MOMENT_STATS}
+            entry.update({name: _to_float(quantiles.at[q, col]) for q, name in QUANTILE_STATS.items()})
+            numeric[col] = entry
+
+    categorical = {
+        col: {str(value): int(count) for value, count in df[col].value_counts(dropna=False).items()}
+        for col in categorical_columns
+    }
+
+    return {"rows": len(df), "numeric": numeric, "categorical": categorical}
+
+
+def save_scheme_summary(file_name, summary):
+    """保存方案汇总向量"""
+    SUMMARIES_DIR.mkdir(parents=True, exist_ok=True)
+    with open(SUMMARIES_DIR / f"{file_name}.json", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def load_scheme_summary(file_name):
+    """加载方案汇总向量，不存在时返回 None"""
+    summary_file = SUMMARIES_DIR / f"{file_name}.json"
+    if summary_file.exists():
+        with open(summary_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return None
+
+
+def summary_matrix(summaries, stat, columns=None):
+    """
+    将多个方案的某个统计量排成矩阵
+
+    Args:
+        summaries (dict): 方案名 -> 汇总向量
+        stat (str): 统计量名称
+        columns (list, optional): 数值列，默认取所有方案共有的数值列
+
+    Returns:
+        pd.DataFrame: 行为方案、列为数值列的矩阵
+    """
+    if columns is None:
+        columns = common_numeric_columns(summaries)
+    data = [
+        [_from_json(summary["numeric"].get(col, {}).get(stat)) for col in columns]
+        for summary in summaries.values()
+    ]
+    return pd.DataFrame(data, index=list(summaries), columns=columns, dtype="float64")
+
+
+def common_numeric_columns(summaries):
+    """返回所有方案共有的数值列（保持第一个方案中的列顺序）"""
+    column_sets = [list(summary["numeric"]) for summary in summaries.values()]
+    if not column_sets:
+        return []
+    return [col for col in column_sets[0] if all(col in cols for cols in column_sets[1:])]
+
+
+def pairwise_difference(values):
+    """
+    计算方案两两之间的差异矩阵
+
+    Args:
+        values (pd.Series): 方案名 -> 数值
+
+    Returns:
+        pd.DataFrame: diff[a][b] = values[b] - values[a]
+    """
+    v = values.to_numpy(dtype="float64")
+    return pd.DataFrame(v[None, :] - v[:, None], index=values.index, columns=values.index)
+
+
+def scheme_distance(matrix):
+    """
+    基于全部数值列计算方案之间的标准化欧氏距离
+
+    每列先在方案之间做 z 标准化，使量纲不同的列贡献相当；缺失值按该列均值处理。
+    通过 |a|² + |b|² - 2a·b 计算，内存占用为 O(方案数²)。
+
+    Args:
+        matrix (pd.DataFrame): summary_matrix 返回的方案 × 列矩阵
+
+    Returns:
+        pd.DataFrame: 方案 × 方案的距离矩阵
+    """
+    values = matrix.to_numpy(dtype="float64")
+    std = np.nanstd(values, axis=0)
+    std[~(std > 0)] = 1.0
+    z = np.nan_to_num((values - np.nanmean(values, axis=0)) / std)
+    squared = np.einsum("ij,ij->i", z, z)
+    dist = np.sqrt(np.clip(squared[:, None] + squared[None, :] - 2.0 * z @ z.T, 0.0, None))
+    np.fill_diagonal(dist, 0.0)
+    return pd.DataFrame(dist, index=matrix.index, columns=matrix.index)
+
+
+def category_count_matrix(summaries, column):
+    """返回某个类别列在各方案中的计数矩阵（行为方案，列为类别取值）"""
+    rows = {name: summary["categorical"].get(column, {}) for name, summary in summaries.items()}
+    return pd.DataFrame.from_dict(rows, orient="index").fillna(0).astype("int64")
+
+
+def _to_float(value):
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _from_json(value):
+    return np.nan if value is None else value
@@ -0,0 +1,144 @@
+"""
+方案间显著性检验
+
+对所有共同数值列同时进行 Welch t 检验、Mann–Whitney U 检验，并通过
+批量化的 bootstrap 重抽样估计均值差的置信区间。重抽样以权重矩阵乘法
+一次计算一批样本的均值。本模块在调用进程中计算，不自建进程池：页面把
+整张检验表提交到共享计算进程池（utils.compute_pool），并发由其统一控制。
+"""
+import numpy as np
+import pandas as pd
+
+from utils.lazy_import import lazy_import
+
+special = lazy_import("scipy.special")
+stats = lazy_import("scipy.stats")
+
+# 单批重抽样权重矩阵的最大元素数（控制内存占用）
+MAX_BATCH_ELEMENTS = 5_000_000
+
+
+def welch_ttest(a, b):
+    """
+    按列向量化的 Welch t 检验（忽略缺失值）
+
+    Args:
+        a (np.ndarray): 方案A数据，形状 (n1, k)
+        b (np.ndarray): 方案B数据，形状 (n2, k)
+
+    Returns:
+        tuple: (t 统计量, 自由度, 双侧 p 值)，均为长度 k 的数组
+    """
+    n1 = (~np.isnan(a)).sum(axis=0)
+    n2 = (~np.isnan(b)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        m1, m2 = _nanmean(a, n1), _nanmean(b, n2)
+        v1 = _nanvar(a, m1, n1)
+        v2 = _nanvar(b, m2, n2)
+        se1, se2 = v1 / n1, v2 / n2
+        t = (m2 - m1) / np.sqrt(se1 + se2)
+        dof = (se1 + se2) ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+        p = 2 * special.stdtr(dof, -np.abs(t))
+    return t, dof, p
+
+
+def mann_whitney(a, b):
+    """
+    按列向量化的 Mann–Whitney U 检验（双侧，忽略缺失值）
+
+    Returns:
+        tuple: (U 统计量, p 值)，均为长度 k 的数组
+    """
+    result = stats.mannwhitneyu(b, a, alternative="two-sided", axis=0, nan_policy="omit")
+    return np.asarray(result.statistic, dtype="float64"), np.asarray(result.pvalue, dtype="float64")
+
+
+def bootstrap_mean_diff(a, b, n_resamples=2000, confidence=0.95, seed=0):
+    """
+    bootstrap 估计各列均值差（B - A）的百分位置信区间
+
+    Args:
+        a (np.ndarray): 方案A数据，形状 (n1, k)
+        b (np.ndarray): 方案B数据，形状 (n2, k)
+        n_resamples (int): 重抽样次数
+        confidence (float): 置信水平
+        seed (int): 随机种子
+
+    Returns:
+        tuple: (下界数组, 上界数组)
+    """
+    diffs = _resample_mean_diff(a, b, n_resamples, seed)
+    alpha = (1 - confidence) / 2
+    lower, upper = np.nanpercentile(diffs, [100 * alpha, 100 * (1 - alpha)], axis=0)
+    return lower, upper
+
+
+def significance_table(df1, df2, columns, n_resamples=2000, confidence=0.95, seed=0):
+    """
+    对共同数值列执行全部检验并汇总为表格
+
+    Args:
+        df1 (pd.DataFrame): 方案A数据
+        df2 (pd.DataFrame): 方案B数据
+        columns (list): 共同数值列
+        n_resamples (int): bootstrap 重抽样次数
+        confidence (float): 置信水平
+        seed (int): 随机种子
+
+    Returns:
+        pd.DataFrame: 以列名为索引的检验结果
+    """
+    a = df1[columns].to_numpy(dtype="float64", na_value=np.nan)
+    b = df2[columns].to_numpy(dtype="float64", na_value=np.nan)
+
+    t, dof, t_p = welch_ttest(a, b)
+    u, u_p = mann_whitney(a, b)
+    lower, upper = bootstrap_mean_diff(a, b, n_resamples, confidence, seed)
+    with np.errstate(invalid="ignore"):
+        mean_diff = np.nanmean(b, axis=0) - np.nanmean(a, axis=0)
+
+    return pd.DataFrame({
+        "mean_diff": mean_diff,
+        "t_statistic": t,
+        "t_dof": dof,
+        "t_pvalue": t_p,
+        "u_statistic": u,
+        "u_pvalue": u_p,
+        "ci_lower": lower,
+        "ci_upper": upper
+    }, index=pd.Index(columns, name="column"))
+
+
+def _resample_mean_diff(a, b, n_resamples, seed):
+    """生成 n_resamples 组重抽样的均值差，形状 (n_resamples, k)"""
+    rng = np.random.default_rng(seed)
+    means_a = _resample_means(a, n_resamples, rng)
+    means_b = _resample_means(b, n_resamples, rng)
+    return means_b - means_a
+
+
+def _resample_means(x, n_resamples, rng):
+    """以有放回抽样的计数矩阵乘以数据矩阵，批量得到重抽样均值"""
+    n = len(x)
+    valid = ~np.isnan(x)
+    filled = np.where(valid, x, 0.0)
+    valid = valid.astype("float64")
+    batch = max(1, MAX_BATCH_ELEMENTS // max(n, 1))
+
+    means = np.empty((n_resamples, x.shape[1]))
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        idx = rng.integers(0, n, size=(size, n)) + np.arange(size)[:, None] * n
+        weights = np.bincount(idx.ravel(), minlength=size * n).reshape(size, n).astype("float64")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means[start:start + size] = (weights @ filled) / (weights @ valid)
+    return means
+
+
+def _nanmean(x, n):
+    return np.where(np.isnan(x), 0.0, x).sum(axis=0) / n
+
+
+def _nanvar(x, mean, n):
+    centered = np.where(np.isnan(x), 0.0, x - mean)
+    return (centered * centered).sum(axis=0) / (n - 1)
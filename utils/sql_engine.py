@@ -0,0 +1,249 @@
+"""
+嵌入式 SQL 查询
+
+SQL 查询页面在上传工作簿的列式副本（见 utils.data_loader.columnar_copy）上执行
+只读查询，每个工作簿注册为一张表，表名为去掉扩展名的文件名。
+
+安装 duckdb 时直接查询 Parquet 副本：只读取查询用到的列，WHERE 条件按行组的
+最小/最大值跳过无关数据，并用多个线程执行（默认 CPU 数的一半，可用
+DATAVIZ_SQL_THREADS 调整），内存上限取剩余的内存预算。注册视图后连接被锁定
+为只能访问列式副本目录，查询无法用 read_text、read_csv 等函数读取服务器上的
+其他文件，也无法改回设置。分页时只取当前页的行，
+总行数按查询缓存。未安装 duckdb 时降级为标准库 sqlite3：查询用到的表整表读入
+内存数据库后执行。
+
+查询结果可保存为上传目录中的新工作簿，与上传的文件一样供其他页面使用。
+"""
+import json
+import os
+import re
+import sqlite3
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # 可选依赖，缺失时降级为 sqlite3
+    duckdb = None
+
+from utils.data_loader import columnar_copy, file_signature, list_workbooks
+from utils.data_processor import analyze_data_features
+from utils.memory import MB, headroom
+from utils.paths import COLUMNAR_CACHE_DIR, FEATURES_DIR, UPLOAD_DIR
+from utils.precompute import enqueue_precompute
+from utils.scheme_summary import compute_scheme_summary, save_scheme_summary
+from utils.timing import span
+
+SQL_THREADS_ENV = "DATAVIZ_SQL_THREADS"
+PAGE_SIZES = (100, 500, 1000)
+# 缓存的查询总行数个数
+COUNT_CACHE_SIZE = 32
+# Excel 工作表的最大数据行数（不含表头）
+EXCEL_MAX_ROWS = 1_048_575
+
+_counts = OrderedDict()
+
+
+def engine_name():
+    """当前使用的查询引擎"""
+    return "duckdb" if duckdb is not None else "sqlite"
+
+
+def sql_threads():
+    """duckdb 的执行线程数"""
+    default = max(1, (os.cpu_count() or 1) // 2)
+    try:
+        return max(int(os.environ.get(SQL_THREADS_ENV, default)), 1)
+    except ValueError:
+        return default
+
+
+def dataset_tables(directory=UPLOAD_DIR):
+    """
+    可查询的表
+
+    Args:
+        directory (Path): 工作簿目录
+
+    Returns:
+        dict: {表名: 工作簿路径}，同名（不区分大小写）的 .xlsx 优先于 .xls
+    """
+    tables = {}
+    seen = set()
+    for path in list_workbooks(directory):
+        # 表名不区分大小写，只差大小写的文件名只注册第一个
+        if path.stem.lower() not in seen:
+            seen.add(path.stem.lower())
+            tables[path.stem] = path
+    return tables
+
+
+def table_columns(path):
+    """返回工作簿列式副本的 [(列名, 类型), ...]"""
+    import pyarrow.parquet as pq
+
+    schema = pq.read_schema(columnar_copy(path))
+    return [(field.name, str(field.type)) for field in schema]
+
+
+def validate_query(sql):
+    """
+    检查查询是否为单条 SELECT（或 WITH ... SELECT）语句
+
+    Args:
+        sql (str): 查询
+
+    Returns:
+        str: 去掉首尾空白与末尾分号的查询
+
+    Raises:
+        ValueError: 不是单条只读查询
+    """
+    sql = sql.strip().rstrip(";").strip()
+    if not sql:
+        raise ValueError("查询为空")
+    if ";" in sql:
+        raise ValueError("一次只能执行一条查询")
+    if not re.match(r"(select|with)\b", sql, re.IGNORECASE):
+        raise ValueError("只支持 SELECT 查询")
+    return sql
+
+
+def referenced_tables(sql, tables):
+    """查询中出现的表名（带或不带双引号，与 duckdb/sqlite 的标识符一样不区分大小写）"""
+    found = []
+    for name in tables:
+        pattern = rf'"{re.escape(name)}"|(?<![\w"]){re.escape(name)}(?![\w"])'
+        if re.search(pattern, sql, re.IGNORECASE):
+            found.append(name)
+    return found
+
+
+def count_rows(sql, tables):
+    """
+    查询结果的总行数，按（查询, 所用表的文件签名）缓存
+
+    Args:
+        sql (str): 查询
+        tables (dict): {表名: 工作簿路径}
+
+    Returns:
+        int: 行数
+    """
+    sql = validate_query(sql)
+    used = referenced_tables(sql, tables)
+    key = (sql, tuple(file_signature(tables[name]) for name in used))
+    if key in _counts:
+        _counts.move_to_end(key)
+        return _counts[key]
+    with _connect(used, tables) as con, span("query", engine=engine_name(), step="count"):
+        total = con.execute(f"SELECT count(*) FROM ({sql}) AS q").fetchone()[0]
+    _counts[key] = total
+    while len(_counts) > COUNT_CACHE_SIZE:
+        _counts.popitem(last=False)
+    return total
+
+
+def fetch_page(sql, tables, page, page_size):
+    """
+    取查询结果的一页
+
+    Args:
+        sql (str): 查询
+        tables (dict): {表名: 工作簿路径}
+        page (int): 页码（从 1 开始）
+        page_size (int): 每页行数
+
+    Returns:
+        pd.DataFrame: 该页的行
+    """
+    sql = validate_query(sql)
+    offset = (page - 1) * page_size
+    with _connect(referenced_tables(sql, tables), tables) as con, span("query", engine=engine_name(), step="page"):
+        return _fetch_df(con, f"SELECT * FROM ({sql}) AS q LIMIT {int(page_size)} OFFSET {int(offset)}")
+
+
+def fetch_all(sql, tables):
+    """取查询的全部结果"""
+    sql = validate_query(sql)
+    with _connect(referenced_tables(sql, tables), tables) as con, span("query", engine=engine_name(), step="all"):
+        return _fetch_df(con, sql)
+
+
+def save_query_result(df, name, directory=UPLOAD_DIR):
+    """
+    把查询结果保存为新的工作簿，并像上传的文件一样分析特征、计算汇总、排入预计算
+
+    Args:
+        df (pd.DataFrame): 查询结果
+        name (str): 数据集名称（不含扩展名）
+        directory (Path): 保存目录
+
+    Returns:
+        Path: 工作簿路径
+
+    Raises:
+        ValueError: 名称无效、文件已存在或行数超出 Excel 上限
+    """
+    name = name.strip()
+    if not name or Path(name).name != name:
+        raise ValueError("数据集名称无效")
+    if len(df) > EXCEL_MAX_ROWS:
+        raise ValueError(f"结果有 {len(df)} 行，超出 Excel 工作表上限 {EXCEL_MAX_ROWS} 行")
+    file_path = Path(directory) / f"{name}.xlsx"
+    if file_path.exists():
+        raise ValueError(f"文件 {file_path.name} 已存在")
+
+    with span("save", file=file_path.name):
+        df.to_excel(file_path, index=False)
+        features = analyze_data_features(df)
+        FEATURES_DIR.mkdir(parents=True, exist_ok=True)
+        with open(FEATURES_DIR / f"{file_path.name}.json", 'w', encoding='utf-8') as f:
+            json.dump(features, f, ensure_ascii=False, indent=2, default=str)
+        save_scheme_summary(file_path.name, compute_scheme_summary(df, features))
+    enqueue_precompute(file_path)
+    return file_path
+
+
+@contextmanager
+def _connect(used, tables):
+    """打开只注册了查询所用表的内存连接"""
+    if duckdb is not None:
+        con = duckdb.connect(":memory:")
+        con.execute(f"SET threads TO {sql_threads()}")
+        limit_mb = headroom() // MB
+        if limit_mb > 0:
+            con.execute(f"SET memory_limit = '{limit_mb}MB'")
+        for name in used:
+            path = _literal(columnar_copy(tables[name]))
+            # 视图在查询时才扫描副本，duckdb 把投影和过滤条件下推到 Parquet 读取
+            con.execute(f"CREATE VIEW {_quote(name)} AS SELECT * FROM read_parquet({path})")
+        # 页面对所有用户开放：查询只能读取列式副本，不能访问服务器上的其他文件
+        con.execute(f"SET allowed_directories = [{_literal(f'{COLUMNAR_CACHE_DIR}{os.sep}')}]")
+        con.execute("SET enable_external_access = false")
+        con.execute("SET lock_configuration = true")
+    else:
+        con = sqlite3.connect(":memory:")
+        for name in used:
+            pd.read_parquet(columnar_copy(tables[name])).to_sql(name, con, index=False)
+    try:
+        yield con
+    finally:
+        con.close()
+
+
+def _fetch_df(con, sql):
+    if duckdb is not None:
+        return con.execute(sql).df()
+    return pd.read_sql_query(sql, con)
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(path):
+    return "'" + str(path).replace("'", "''") + "'"
@@ -0,0 +1,63 @@
+"""
+多文件统计引擎
+
+将所选文件按文件名堆叠为一张带键的长表，通过一次分组聚合计算所有文件、
+所有列的汇总统计量，供历史分析页面的各个标签页共享。
+"""
+import pandas as pd
+
+SUMMARY_STATS = ("mean", "std", "min", "max", "median")
+DATASET_KEY = "文件"
+
+
+def stack_datasets(dfs, columns, key=DATASET_KEY):
+    """
+    将多个数据集堆叠为一张带键的表（只做一次 concat）
+
+    Args:
+        dfs (dict): 文件名 -> DataFrame
+        columns (list): 需要保留的列，某个数据集缺少的列以 NaN 补齐
+        key (str): 键列名称
+
+    Returns:
+        pd.DataFrame: 包含键列和所选列的长表
+    """
+    frames = [df.reindex(columns=columns) for df in dfs.values()]
+    stacked = pd.concat(frames, keys=list(dfs), names=[key, None])
+    return stacked.reset_index(level=0)
+
+
+def summarize_datasets(dfs, columns, stats=SUMMARY_STATS):
+    """
+    一次分组聚合计算每个文件、每列的汇总统计量
+
+    Args:
+        dfs (dict): 文件名 -> DataFrame
+        columns (list): 数值列
+        stats (tuple): 统计量名称
+
+    Returns:
+        pd.DataFrame: 以文件名为索引、(列, 统计量) 为列的汇总表
+    """
+    columns = list(columns)
+    if not dfs or not columns:
+        return pd.DataFrame(index=pd.Index(list(dfs), name=DATASET_KEY))
+    stacked = stack_datasets(dfs, columns)
+    summary = stacked.groupby(DATASET_KEY, sort=False)[columns].agg(list(stats))
+    return summary.reindex(list(dfs))
+
+
+def column_summary(summary, column):
+    """取出单列在各文件上的统计量（行为文件，列为统计量）"""
+    return summary[column]
+
+
+def long_summary(summary, columns):
+    """将汇总表展开为 (文件, 指标) 两级索引的长表"""
+    columns = [col for col in columns if col in summary.columns.get_level_values(0)]
+    if not columns:
+        return pd.DataFrame()
+    table = pd.concat({col: summary[col] for col in columns}, names=["指标", DATASET_KEY])
+    table = table.swaplevel(0, 1)
+    order = pd.MultiIndex.from_product([summary.index, columns], names=[DATASET_KEY, "指标"])
+    return table.reindex(order)
@@ -0,0 +1,261 @@
+"""
+热点路径计时
+
+每次页面运行（或命令行工具运行）对应一个 SpanRecorder，用 span 上下文
+管理器记录 load / profile / compute / render 等步骤的耗时（utils.memory 也把
+各阶段的内存统计和降级说明记在这里）。运行结束时记录连同会话 ID、数据规模
+一起追加到 JSONL 日志，可离线按页面统计 p50 / p95
+（见 benchmarks/timing_report.py）。日志超过大小上限时轮转为 .1 备份（只保留
+一份），磁盘占用不超过上限的两倍。页面可选择在侧边栏显示本次运行的计时。
+
+本模块不依赖 streamlit，命令行工具也可以直接使用；页面相关的辅助函数在
+调用时才导入 streamlit。
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from utils.paths import LOGS_DIR
+
+# 设置为 0 / false / no / off 时不写计时日志
+TIMING_ENV = "DATAVIZ_TIMING"
+TIMING_LOG_ENV = "DATAVIZ_TIMING_LOG"
+DEFAULT_TIMING_LOG = LOGS_DIR / "timing.jsonl"
+# 单个日志文件的大小上限（MB），超过后轮转
+TIMING_LOG_MAX_MB_ENV = "DATAVIZ_TIMING_LOG_MAX_MB"
+DEFAULT_TIMING_LOG_MAX_MB = 20
+PANEL_STATE_KEY = "show_timing_panel"
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class SpanRecorder:
+    """一次运行中的全部计时区间"""
+
+    def __init__(self, page, session_id=None):
+        self.page = page
+        self.session_id = session_id or uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.timestamp = datetime.now().isoformat(timespec="milliseconds")
+        self.spans = []
+        self.depth = 0
+        self.memory = []
+        self.fallbacks = []
+        self.fallbacks_shown = 0
+        self.rows = None
+        self.cols = None
+
+    def set_dataset(self, rows, cols):
+        """记录本次运行处理的数据规模（多次调用时取最大值）"""
+        self.rows = max(rows, self.rows or 0)
+        self.cols = max(cols, self.cols or 0)
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def to_record(self):
+        return {
+            "timestamp": self.timestamp,
+            "page": self.page,
+            "session_id": self.session_id,
+            "rows": self.rows,
+            "cols": self.cols,
+            "total_ms": round(self.total_ms(), 3),
+            "spans": self.spans,
+            "memory": self.memory,
+            "fallbacks": self.fallbacks
+        }
+
+
+def begin_run(page, session_id=None):
+    """开始一次运行的计时，并设为当前线程的记录器"""
+    recorder = SpanRecorder(page, session_id)
+    _local.recorder = recorder
+    return recorder
+
+
+def current_recorder():
+    """当前线程的记录器，未开始运行时为 None"""
+    return getattr(_local, "recorder", None)
+
+
+def discard_run():
+    """丢弃当前线程上未结束的记录（不写日志）"""
+    _local.recorder = None
+
+
+def end_run(write_log=True):
+    """
+    结束当前运行，按需写入日志
+
+    Returns:
+        dict: 本次运行的记录，未开始运行时为 None
+    """
+    recorder = current_recorder()
+    if recorder is None:
+        return None
+    _local.recorder = None
+    record = recorder.to_record()
+    if write_log and logging_enabled():
+        append_record(record)
+    return record
+
+
+@contextmanager
+def span(name, **meta):
+    """
+    记录一个计时区间，可嵌套；没有当前记录器时只执行代码块
+
+    Args:
+        name (str): 区间名称，如 "load"、"profile"、"compute"、"render"
+        **meta: 附加信息（文件名、图表类型等）
+    """
+    recorder = current_recorder()
+    if recorder is None:
+        yield
+        return
+    start = time.perf_counter()
+    depth = recorder.depth
+    recorder.depth += 1
+    try:
+        yield
+    finally:
+        recorder.depth = depth
+        end = time.perf_counter()
+        entry = {
+            "name": name,
+            "start_ms": round((start - recorder.started) * 1000, 3),
+            "ms": round((end - start) * 1000, 3),
+            "depth": depth
+        }
+        if meta:
+            entry["meta"] = {key: _jsonable(value) for key, value in meta.items()}
+        recorder.spans.append(entry)
+
+
+def set_dataset(rows, cols):
+    """记录当前运行的数据规模"""
+    recorder = current_recorder()
+    if recorder is not None:
+        recorder.set_dataset(rows, cols)
+
+
+def logging_enabled():
+    return os.environ.get(TIMING_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def log_path():
+    return Path(os.environ.get(TIMING_LOG_ENV, DEFAULT_TIMING_LOG))
+
+
+def log_max_bytes():
+    """单个日志文件的大小上限（字节）"""
+    try:
+        max_mb = float(os.environ.get(TIMING_LOG_MAX_MB_ENV, DEFAULT_TIMING_LOG_MAX_MB))
+    except ValueError:
+        max_mb = DEFAULT_TIMING_LOG_MAX_MB
+    return int(max_mb * 1024 * 1024)
+
+
+def rotated_path(path):
+    """轮转后的备份日志路径"""
+    return path.with_name(path.name + ".1")
+
+
+def append_record(record):
+    """向 JSONL 日志追加一条运行记录，超过大小上限时先把现有日志轮转为备份"""
+    path = log_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    with _log_lock:
+        try:
+            if path.stat().st_size + len(line) > log_max_bytes():
+                path.replace(rotated_path(path))
+        except FileNotFoundError:
+            pass
+        with open(path, 'ab') as f:
+            f.write(line)
+
+
+def read_records(path=None):
+    """读取日志（先读轮转备份）中的全部运行记录（忽略损坏的行）"""
+    path = Path(path) if path else log_path()
+    records = []
+    for file in (rotated_path(path), path):
+        if not file.exists():
+            continue
+        with open(file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def begin_page(page):
+    """
+    页面开头调用：以 streamlit 会话 ID 开始本次重新运行的计时
+
+    上一次运行被重新运行请求或未捕获的异常中断时 end_page 不会执行，而
+    streamlit 在同一线程上执行之后的运行，残留的记录器在这里丢弃。
+    """
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    discard_run()
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx is not None else st.session_state.setdefault("_timing_session_id", uuid.uuid4().hex)
+    return begin_run(page, session_id)
+
+
+def end_page():
+    """页面结尾调用：写入日志，并在用户开启时于侧边栏显示本次运行的计时"""
+    import streamlit as st
+
+    recorder = current_recorder()
+    if recorder is None:
+        return None
+    try:
+        show = st.sidebar.checkbox("显示性能计时", key=PANEL_STATE_KEY)
+    finally:
+        # 重新运行请求可能在渲染控件时抛出，记录器不能留在线程上
+        record = end_run()
+    if show:
+        render_timing_panel(record)
+    return record
+
+
+def render_timing_panel(record):
+    """在侧边栏显示一次运行的计时明细"""
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander("性能计时", expanded=True):
+        size = f"，{record['rows']} 行 × {record['cols']} 列" if record["rows"] is not None else ""
+        st.caption(f"本次运行 {record['total_ms']:.0f} ms{size}")
+        if record["spans"]:
+            spans = sorted(record["spans"], key=lambda s: s["start_ms"])
+            st.dataframe(pd.DataFrame({
+                "步骤": ["　" * s["depth"] + s["name"] for s in spans],
+                "耗时 (ms)": [s["ms"] for s in spans],
+                "开始 (ms)": [s["start_ms"] for s in spans]
+            }), hide_index=True, use_container_width=True)
+        if record.get("memory"):
+            st.caption("内存（MB）")
+            st.dataframe(pd.DataFrame(record["memory"]).drop(columns="meta", errors="ignore").rename(columns={
+                "stage": "阶段", "rss_mb": "RSS", "rss_delta_mb": "RSS 变化", "peak_mb": "分配峰值",
+                "rss_peak_mb": "RSS 峰值"
+            }), hide_index=True, use_container_width=True)
+
+
+def _jsonable(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
@@ -0,0 +1,135 @@
+"""
+高级可视化
+
+PCA、相关性网络、散点矩阵与平行坐标图的构建。页面会传入按数据签名缓存的
+中间结果；命令行工具和基准测试不传时在这里按默认参数计算。
+"""
+from utils.comparison import correlation_matrix
+from utils.correlation_network import DEFAULT_THRESHOLD, correlation_network_figure
+from utils.density import density_figure, density_scatter_matrix, use_density, voxel_figure
+from utils.lazy_import import lazy_import
+from utils.memory import fits_budget, format_budget, notify_fallback, track
+from utils.parallel_coords import parallel_coordinates_figure
+from utils.pca import fit_pca
+
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+
+
+def pca_figures(pca):
+    """
+    PCA 投影与解释方差图
+
+    Args:
+        pca (dict): fit_pca 的结果
+
+    Returns:
+        dict: pca_2d、pca_3d（三个主成分时）、pca_variance
+    """
+    figures = {}
+    pca_result = pca["projection"]
+    density = pca["density"]
+    
+    # Create 2D PCA plot: binned density of all rows when large, otherwise sampled points
+    if density is not None:
+        fig_2d = density_figure(density["histogram"], "PCA 2D 投影（密度）", ("主成分1", "主成分2"))
+    else:
+        fig_2d = px.scatter(
+            x=pca_result[:, 0],
+            y=pca_result[:, 1],
+            title="PCA 2D 投影",
+            labels={'x': '主成分1', 'y': '主成分2'}
+        )
+    figures["pca_2d"] = fig_2d
+    
+    # Create 3D PCA plot if possible
+    if pca_result.shape[1] > 2:
+        if density is not None and density["voxels"] is not None:
+            centers, counts = density["voxels"]
+            fig_3d = voxel_figure(centers, counts, "PCA 3D 投影（体素密度）", ("主成分1", "主成分2", "主成分3"))
+        else:
+            fig_3d = px.scatter_3d(
+                x=pca_result[:, 0],
+                y=pca_result[:, 1],
+                z=pca_result[:, 2],
+                title="PCA 3D 投影",
+                labels={'x': '主成分1', 'y': '主成分2', 'z': '主成分3'}
+            )
+        figures["pca_3d"] = fig_3d
+    
+    # Create explained variance plot
+    explained_variance = pca["explained_variance_ratio"]
+    fig_variance = go.Figure()
+    fig_variance.add_trace(go.Bar(
+        x=[f"PC{i+1}" for i in range(len(explained_variance))],
+        y=explained_variance,
+        text=[f"{v:.1%}" for v in explained_variance],
+        textposition="auto",
+    ))
+    fig_variance.update_layout(
+        title="主成分解释方差比例",
+        xaxis_title="主成分",
+        yaxis_title="解释方差比例"
+    )
+    figures["pca_variance"] = fig_variance
+    return figures
+
+
+@track("figure")
+def scatter_matrix_figure(df, dimensions):
+    """
+    散点矩阵图，超过密度阈值或内存预算时改为服务端分箱的密度图
+
+    Args:
+        df (pd.DataFrame): 数据
+        dimensions (list): 参与的数值列
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    dense = use_density(len(df))
+    if not dense and not fits_budget("figure", len(df), len(dimensions)):
+        dense = True
+        notify_fallback("figure", f"散点矩阵超出内存预算（{format_budget()}），改为密度渲染")
+    if dense:
+        return density_scatter_matrix(df, dimensions, title="散点矩阵图（密度）")
+    return px.scatter_matrix(df, dimensions=dimensions, title="散点矩阵图")
+
+
+@track("figure")
+def create_advanced_visualizations(df, features, pca=None, network=None, parallel=None):
+    """Create advanced visualizations based on data features"""
+    visualizations = {}
+    
+    # PCA Analysis
+    if len(features["numeric_columns"]) > 1:
+        if pca is None:
+            pca = fit_pca(df, features["numeric_columns"], min(3, len(features["numeric_columns"])))
+            if pca["fallback"]:
+                notify_fallback("pca", pca["fallback"])
+        visualizations.update(pca_figures(pca))
+    
+    # Correlation Network
+    if len(features["numeric_columns"]) > 1:
+        if network is None:
+            corr_matrix = correlation_matrix(df, features["numeric_columns"])
+            network = correlation_network_figure(corr_matrix.to_numpy(), list(corr_matrix.columns), DEFAULT_THRESHOLD)
+        visualizations["correlation_network"] = network
+    
+    # Scatter Matrix (server-side binned above the density threshold or the memory budget)
+    if len(features["numeric_columns"]) > 1:
+        visualizations["scatter_matrix"] = scatter_matrix_figure(
+            df,
+            features["numeric_columns"][:5]  # Limit to 5 dimensions for clarity
+        )
+    
+    # Parallel Coordinates (stratified sample colored by cluster above the row budget)
+    if len(features["numeric_columns"]) > 1:
+        if parallel is None:
+            parallel = parallel_coordinates_figure(
+                df,
+                features["numeric_columns"][:5]  # Limit to 5 dimensions for clarity
+            )
+        visualizations["parallel_coordinates"] = parallel
+    
+    return visualizations